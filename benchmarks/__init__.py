@@ -0,0 +1,3 @@
+"""
+Page-object microbenchmarks package initialization
+"""
@@ -0,0 +1,9 @@
+"""
+Run the page-object microbenchmarks: python -m benchmarks
+"""
+import sys
+from benchmarks.page_objects import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
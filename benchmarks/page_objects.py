@@ -0,0 +1,209 @@
+"""
+Microbenchmarks for core page-object operations against the local stand-in shop
+
+Each benchmark has an untimed setup that puts the browser in the right state
+and a timed operation. Results report median/p95 latency and WebDriver round
+trips per operation and are compared against a stored baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+# (name, factory) pairs; a factory takes the driver and returns (setup, operation)
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register a benchmark factory"""
+    def decorator(factory):
+        BENCHMARKS.append((name, factory))
+        return factory
+    return decorator
+
+
+@benchmark('HomePage.search_product')
+def bench_search_product(driver):
+    from pages import HomePage
+    home_page = HomePage(driver)
+    return home_page.navigate_to_home, lambda: home_page.search_product("computer")
+
+
+@benchmark('HomePage.open_search_results')
+def bench_open_search_results(driver):
+    from pages import HomePage
+    home_page = HomePage(driver)
+    return home_page.navigate_to_home, lambda: home_page.open_search_results("computer")
+
+
+@benchmark('SearchResultsPage.get_product_titles')
+def bench_get_product_titles(driver):
+    from pages import SearchResultsPage
+    results_page = SearchResultsPage(driver)
+    results_page.navigate_to("search?q=computer")
+    return (lambda: None), results_page.get_product_titles
+
+
+@benchmark('ShoppingCartPage.get_item_details')
+def bench_get_item_details(driver):
+    from pages import ProductDetailsPage, ShoppingCartPage
+    product_page = ProductDetailsPage(driver)
+    product_page.navigate_to("141-inch-laptop")
+    product_page.click_add_to_cart()
+    product_page.get_success_message()
+    cart_page = ShoppingCartPage(driver)
+    cart_page.navigate_to_cart()
+    return (lambda: None), lambda: cart_page.get_item_details(0)
+
+
+@benchmark('LoginPage.login')
+def bench_login(driver, typed=True):
+    from pages import LoginPage
+    from utils import TestDataHelper
+    login_page = LoginPage(driver)
+    credentials = TestDataHelper.get_test_credentials()
+
+    def setup():
+        login_page.navigate_to("logout")
+        login_page.navigate_to_login()
+
+    return setup, lambda: login_page.login(credentials['email'], credentials['password'], typed=typed)
+
+
+@benchmark('LoginPage.login (batched)')
+def bench_login_batched(driver):
+    return bench_login(driver, typed=False)
+
+
+def _wait_benchmark(method_name, *args):
+    """Build a factory timing one WaitHelper method on the home page"""
+    def factory(driver):
+        from pages import HomePage
+        home_page = HomePage(driver)
+        home_page.navigate_to_home()
+        method = getattr(home_page.wait_helper, method_name)
+        return (lambda: None), lambda: method(*args)
+    return factory
+
+
+for _method, _args in [
+    ('wait_for_element_visible', ((By.ID, "small-searchterms"),)),
+    ('wait_for_element_clickable', ((By.CSS_SELECTOR, "input[value='Search']"),)),
+    ('wait_for_element_present', ((By.ID, "topcartlink"),)),
+    ('wait_for_text_in_element', ((By.CSS_SELECTOR, ".header-links"), "Log in")),
+    ('wait_for_url_contains', ("127.0.0.1",)),
+]:
+    benchmark(f'WaitHelper.{_method}')(_wait_benchmark(_method, *_args))
+
+
+def run_benchmark(factory, driver, iterations, warmup):
+    """Time an operation and count its WebDriver round trips"""
+    from utils.command_tracer import command_tracer
+    from utils.stats import percentile
+
+    setup, operation = factory(driver)
+    samples = []
+    round_trips = []
+    for iteration in range(warmup + iterations):
+        setup()
+        commands_before = command_tracer.commands
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        if iteration >= warmup:
+            samples.append(elapsed * 1000)
+            round_trips.append(command_tracer.commands - commands_before)
+
+    return {
+        'median_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(percentile(samples, 0.95), 2),
+        'round_trips': statistics.median(round_trips),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (name, reason) for every benchmark that regressed against the baseline or has none"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            regressions.append((name, "no baseline; run with --update-baseline"))
+            continue
+        if result['median_ms'] > reference['median_ms'] * (1 + threshold):
+            regressions.append((name, f"median {result['median_ms']} ms > baseline {reference['median_ms']} ms"))
+        if result['round_trips'] > reference['round_trips']:
+            regressions.append((name, f"{result['round_trips']} round trips > baseline {reference['round_trips']}"))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page-object operations against the local stand-in shop")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed median slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', default='reports/benchmarks.json')
+    args = parser.parse_args(argv)
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists() and not args.update_baseline:
+        # Without a baseline every comparison would pass silently
+        print(f"No baseline at {baseline_path}; create one with --update-baseline")
+        return 2
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.exists() else {}
+
+    # Importing config loads .env, so point config.base_url at the stand-in shop afterwards
+    from config import config
+    from local_shop import LocalShopServer
+    from utils import WebDriverManager
+    from utils.command_tracer import command_tracer
+
+    os.environ['ENVIRONMENT'] = 'local'
+    server = LocalShopServer(port=config.local_shop_port).start()
+    os.environ['LOCAL_SHOP_PORT'] = str(server.httpd.server_address[1])
+    if command_tracer.mode == 'off':
+        command_tracer.install('counters')
+    driver_manager = WebDriverManager()
+
+    results = {}
+    try:
+        for name, factory in BENCHMARKS:
+            if args.filter not in name:
+                continue
+            driver = driver_manager.get_driver(headless=True)
+            results[name] = run_benchmark(factory, driver, args.iterations, args.warmup)
+            driver_manager.quit_driver()
+    finally:
+        driver_manager.quit_driver()
+        server.stop()
+        command_tracer.uninstall()
+
+    print(f"{'benchmark':<45} {'median ms':>10} {'p95 ms':>10} {'trips':>6} {'baseline ms':>12}")
+    for name, result in results.items():
+        reference = baseline.get(name, {}).get('median_ms', '-')
+        print(f"{name:<45} {result['median_ms']:>10} {result['p95_ms']:>10} {result['round_trips']:>6} {reference:>12}")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    if args.update_baseline:
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True), encoding='utf-8')
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, reason in regressions:
+        print(f"REGRESSION {name}: {reason}")
+    return 1 if regressions else 0
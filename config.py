@@ -2,6 +2,7 @@
 Simple configuration using environment variables
 """
 import os
+import re
 from pathlib import Path
 
 
@@ -26,12 +27,39 @@ class Config:
     
     @property
     def base_url(self):
+        if self.environment == 'local':
+            return f"http://127.0.0.1:{self.local_shop_port}/"
+        if self.http_cassette_mode != 'off':
+            # The cassette proxy serves the shop to the browser over plain http
+            return re.sub(r'^https://', 'http://', self.shop_url)
+        return self.shop_url
+    
+    @property
+    def shop_url(self):
         return os.getenv('BASE_URL', 'https://demowebshop.tricentis.com/')
     
+    @property
+    def local_shop_port(self):
+        # 0 picks a free port; the local_shop fixture stores the port it was given
+        return int(os.getenv('LOCAL_SHOP_PORT', '0'))
+    
     @property
     def browser(self):
         return os.getenv('BROWSER', 'chrome')
     
+    @property
+    def remote_url(self):
+        # Selenium standalone/grid, or chromedriver in server mode (e.g. http://browser-host:9515)
+        return os.getenv('REMOTE_URL', 'http://127.0.0.1:4444').rstrip('/')
+    
+    @property
+    def remote_browser(self):
+        return os.getenv('REMOTE_BROWSER', 'chrome')
+    
+    @property
+    def remote_session_reuse(self):
+        return os.getenv('REMOTE_SESSION_REUSE', 'true').lower() == 'true'
+    
     @property
     def headless(self):
         return os.getenv('HEADLESS', 'false').lower() == 'true'
@@ -50,11 +78,11 @@ class Config:
     
     @property
     def test_email(self):
-        return os.getenv('TEST_EMAIL', '')
+        return os.getenv('TEST_EMAIL', 'shopper@local.test' if self.environment == 'local' else '')
     
     @property
     def test_password(self):
-        return os.getenv('TEST_PASSWORD', '')
+        return os.getenv('TEST_PASSWORD', 'local-password' if self.environment == 'local' else '')
     
     @property
     def screenshot_on_failure(self):
@@ -63,6 +91,199 @@ class Config:
     @property
     def environment(self):
         return os.getenv('ENVIRONMENT', 'test')
+    
+    @property
+    def step_profiling(self):
+        return os.getenv('STEP_PROFILING', 'false').lower() == 'true'
+    
+    @property
+    def step_profiling_top_n(self):
+        return int(os.getenv('STEP_PROFILING_TOP_N', '10'))
+    
+    @property
+    def step_profiling_output(self):
+        return os.getenv('STEP_PROFILING_OUTPUT', 'reports/step_timings.json')
+    
+    @property
+    def command_trace(self):
+        return os.getenv('COMMAND_TRACE', 'off').lower()
+    
+    @property
+    def command_trace_capacity(self):
+        return int(os.getenv('COMMAND_TRACE_CAPACITY', '100000'))
+    
+    @property
+    def command_trace_dir(self):
+        return os.getenv('COMMAND_TRACE_DIR', 'reports/traces')
+    
+    @property
+    def http_cassette_mode(self):
+        return os.getenv('HTTP_CASSETTE_MODE', 'off').lower()
+    
+    @property
+    def cassette_dir(self):
+        return os.getenv('CASSETTE_DIR', 'cassettes')
+    
+    @property
+    def cassette_proxy_port(self):
+        # 0 picks a free port; the http_cassette fixture stores the port it was given
+        return int(os.getenv('CASSETTE_PROXY_PORT', '0'))
+    
+    @property
+    def chrome_profile_template(self):
+        return os.getenv('CHROME_PROFILE_TEMPLATE', 'false').lower() == 'true'
+    
+    @property
+    def chrome_profile_dir(self):
+        return os.getenv('CHROME_PROFILE_DIR', 'reports/chrome-profile')
+    
+    @property
+    def chrome_profile_ttl_hours(self):
+        return float(os.getenv('CHROME_PROFILE_TTL_HOURS', '24'))
+    
+    @property
+    def cdp_network_events(self):
+        return os.getenv('CDP_NETWORK_EVENTS', 'false').lower() == 'true'
+    
+    @property
+    def fast_nav(self):
+        return os.getenv('FAST_NAV', 'false').lower() == 'true'
+    
+    @property
+    def batched_form_fill(self):
+        return os.getenv('BATCHED_FORM_FILL', 'false').lower() == 'true'
+    
+    @property
+    def form_parity_check(self):
+        return os.getenv('FORM_PARITY_CHECK', 'false').lower() == 'true'
+    
+    @property
+    def background_fast_path(self):
+        return os.getenv('BACKGROUND_FAST_PATH', 'true').lower() == 'true'
+    
+    @property
+    def catalog_index_dir(self):
+        return os.getenv('CATALOG_INDEX_DIR', 'reports/catalog')
+    
+    @property
+    def catalog_index_ttl_hours(self):
+        return float(os.getenv('CATALOG_INDEX_TTL_HOURS', '24'))
+    
+    @property
+    def adaptive_timeouts(self):
+        return os.getenv('ADAPTIVE_TIMEOUTS', 'false').lower() == 'true'
+    
+    @property
+    def locator_history_db(self):
+        return os.getenv('LOCATOR_HISTORY_DB', 'reports/locator_history.db')
+    
+    @property
+    def locator_timeout_factor(self):
+        return float(os.getenv('LOCATOR_TIMEOUT_FACTOR', '3'))
+    
+    @property
+    def locator_timeout_min(self):
+        return float(os.getenv('LOCATOR_TIMEOUT_MIN', '1'))
+    
+    @property
+    def locator_timeout_min_samples(self):
+        return int(os.getenv('LOCATOR_TIMEOUT_MIN_SAMPLES', '20'))
+    
+    @property
+    def locator_timeout_window(self):
+        return int(os.getenv('LOCATOR_TIMEOUT_WINDOW', '200'))
+    
+    @property
+    def run_history(self):
+        return os.getenv('RUN_HISTORY', 'false').lower() == 'true'
+    
+    @property
+    def run_history_db(self):
+        return os.getenv('RUN_HISTORY_DB', 'reports/run_history.db')
+    
+    @property
+    def run_history_batch_size(self):
+        return int(os.getenv('RUN_HISTORY_BATCH_SIZE', '500'))
+    
+    @property
+    def report_stream(self):
+        return os.getenv('REPORT_STREAM', 'false').lower() == 'true'
+    
+    @property
+    def report_stream_dir(self):
+        return os.getenv('REPORT_STREAM_DIR', 'reports/stream')
+    
+    @property
+    def failure_bundle(self):
+        return os.getenv('FAILURE_BUNDLE', 'true').lower() == 'true'
+    
+    @property
+    def failure_bundle_budget_ms(self):
+        return float(os.getenv('FAILURE_BUNDLE_BUDGET_MS', '3000'))
+    
+    @property
+    def failure_bundle_dir(self):
+        return os.getenv('FAILURE_BUNDLE_DIR', 'reports/failure_bundles')
+    
+    @property
+    def failure_bundle_network(self):
+        return os.getenv('FAILURE_BUNDLE_NETWORK', 'false').lower() == 'true'
+    
+    @property
+    def failure_bundle_network_entries(self):
+        return int(os.getenv('FAILURE_BUNDLE_NETWORK_ENTRIES', '200'))
+    
+    @property
+    def screencast_on_failure(self):
+        return os.getenv('SCREENCAST_ON_FAILURE', 'false').lower() == 'true'
+    
+    @property
+    def screencast_seconds(self):
+        return float(os.getenv('SCREENCAST_SECONDS', '10'))
+    
+    @property
+    def screencast_fps(self):
+        return float(os.getenv('SCREENCAST_FPS', '2'))
+    
+    @property
+    def screencast_max_kb(self):
+        return int(os.getenv('SCREENCAST_MAX_KB', '4096'))
+    
+    @property
+    def screencast_max_width(self):
+        return int(os.getenv('SCREENCAST_MAX_WIDTH', '640'))
+    
+    @property
+    def preflight(self):
+        return os.getenv('PREFLIGHT', 'true').lower() == 'true'
+    
+    @property
+    def preflight_max_latency_ms(self):
+        return float(os.getenv('PREFLIGHT_MAX_LATENCY_MS', '5000'))
+    
+    @property
+    def circuit_breaker_threshold(self):
+        return int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5'))
+    
+    @property
+    def circuit_breaker_action(self):
+        return os.getenv('CIRCUIT_BREAKER_ACTION', 'error').lower()
+    
+    @property
+    def page_performance(self):
+        return os.getenv('PAGE_PERFORMANCE', 'false').lower() == 'true'
+    
+    @property
+    def perf_history_db(self):
+        return os.getenv('PERF_HISTORY_DB', 'reports/perf_history.db')
+    
+    @property
+    def perf_budgets(self):
+        return os.getenv('PERF_BUDGETS', '')
+    
+    @property
+    def perf_budget_mode(self):
+        return os.getenv('PERF_BUDGET_MODE', 'warn').lower()
 
 
 # Global config instance
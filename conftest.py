@@ -1,20 +1,87 @@
 """
 Pytest configuration and fixtures
 """
+import os
+import warnings
 import pytest
 import allure
-from selenium.webdriver.support.events import EventFiringWebDriver, AbstractEventListener
 from utils import WebDriverManager, ScreenshotHelper
+from utils.command_tracer import command_tracer
+from utils.step_profiler import step_profiler
+from utils.page_performance import page_performance
+from utils.locator_timeouts import locator_timeouts
+from utils.locator_profiler import LocatorProfiler
+from utils.bdd_steps import StepRegistry
+from utils.site_health import circuit_breaker, is_site_failure, preflight
+from utils.background_cache import background_cache, IDEMPOTENT_BACKGROUND_TAG
+from utils.http_cassette import CassetteProxy
+from utils.remote_webdriver import remote_command_stats, RemoteCommandStats
+from utils.screencast import ScreencastRecorder
+from utils.failure_bundle import failure_bundle, NetworkLog
+from utils.report_stream import report_stream
+from utils.run_history import register_plugin as register_run_history
+from local_shop import LocalShopServer
 from config import config
 
 
-class TestEventListener(AbstractEventListener):
-    """Event listener for WebDriver events"""
+# Step timing records collected from all test reports (including xdist workers)
+_step_timings = []
+
+# Navigation timings collected from all test reports and regressions found at session end
+_navigation_timings = []
+_navigation_regressions = []
+
+# Locator wait samples collected from passed tests
+_locator_waits = []
+
+# Locator profile results collected from the locator cost tests
+_locator_profile = []
+
+# Remote WebDriver command round trips collected per test
+_remote_commands = []
+
+# Index of the streaming report, once rendered
+_report_index = []
+
+
+@pytest.fixture(scope='session', autouse=True)
+def local_shop():
+    """Start the local stand-in webshop when running in the local environment"""
+    if config.environment != 'local':
+        yield None
+        return
+    
+    server = LocalShopServer(port=config.local_shop_port).start()
+    # config.base_url reads the port, so every page object targets this server
+    os.environ['LOCAL_SHOP_PORT'] = str(server.httpd.server_address[1])
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def http_cassette():
+    """Start the record/replay proxy when HTTP_CASSETTE_MODE is record or replay"""
+    if config.http_cassette_mode == 'off':
+        yield None
+        return
     
-    def on_exception(self, exception, driver):
-        """Handle exceptions during test execution"""
-        test_name = pytest.current_pytest_item.name if hasattr(pytest, 'current_pytest_item') else 'exception'
-        ScreenshotHelper.take_screenshot(driver, f"exception_{test_name}")
+    proxy = CassetteProxy(config.http_cassette_mode, config.cassette_dir, config.shop_url,
+                          config.cassette_proxy_port).start()
+    # WebDriverFactory reads the port when it configures the browser proxy
+    os.environ['CASSETTE_PROXY_PORT'] = str(proxy.port)
+    yield proxy
+    proxy.stop()
+
+
+@pytest.fixture(autouse=True)
+def site_circuit_breaker():
+    """End the test immediately once the pre-flight failed or the circuit breaker tripped"""
+    reason = circuit_breaker.open_reason
+    if reason:
+        message = f"Circuit breaker open: {reason}"
+        if config.circuit_breaker_action == 'skip':
+            pytest.skip(message)
+        pytest.fail(message, pytrace=False)
 
 
 @pytest.fixture(scope='session')
@@ -28,24 +95,27 @@ def driver(driver_manager):
     """Function-scoped WebDriver instance"""
     driver_instance = driver_manager.get_driver()
     
-    # Add event listener for better debugging
-    event_driver = EventFiringWebDriver(driver_instance, TestEventListener())
-    
-    yield event_driver
+    yield driver_instance
     
     # Cleanup
     driver_manager.quit_driver()
 
 
 @pytest.fixture(scope='function')
-def browser_context(driver_manager):
+def browser_context(request, driver_manager):
     """Browser context fixture for BDD tests"""
     driver = driver_manager.get_driver()
     
+    # URL navigation instead of typing and clicking: @fast-nav opts in, @ui-nav keeps the UI path under FAST_NAV
+    fast_nav = request.node.get_closest_marker('fast-nav') is not None or (
+        config.fast_nav and request.node.get_closest_marker('ui-nav') is None
+    )
+    
     context = {
         'driver': driver,
         'driver_manager': driver_manager,
-        'base_url': config.base_url
+        'base_url': config.base_url,
+        'fast_nav': fast_nav
     }
     
     yield context
@@ -77,42 +147,140 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     rep = outcome.get_result()
     
+    # A page that missed its budget fails the test itself rather than its teardown
+    if rep.when == "call" and rep.passed and config.perf_budget_mode == 'fail':
+        message = _budget_message(item.nodeid)
+        if message:
+            rep.outcome = "failed"
+            rep.longrepr = message
+    
     # Store the report in the item for later use
     setattr(item, f"rep_{rep.when}", rep)
     
-    # Add screenshot to Allure on failure
-    if rep.when == "call" and rep.failed:
-        if hasattr(item, 'funcargs') and 'driver' in item.funcargs:
-            driver = item.funcargs['driver']
-            screenshot_path = ScreenshotHelper.take_screenshot(driver, item.name)
-            
-            if screenshot_path:
-                with open(screenshot_path, 'rb') as f:
-                    allure.attach(
-                        f.read(),
-                        name=f"Screenshot_{item.name}",
-                        attachment_type=allure.attachment_type.PNG
-                    )
-        # Also handle browser_context fixture for BDD tests
-        elif hasattr(item, 'funcargs') and 'browser_context' in item.funcargs:
-            browser_context = item.funcargs['browser_context']
-            screenshot_path = ScreenshotHelper.take_screenshot(browser_context['driver'], item.name)
-            
-            if screenshot_path:
-                with open(screenshot_path, 'rb') as f:
-                    allure.attach(
-                        f.read(),
-                        name=f"Screenshot_{item.name}",
-                        attachment_type=allure.attachment_type.PNG
-                    )
+    # Consecutive navigation/timeout failures trip the circuit breaker; any other outcome means the site responded
+    if rep.when == "call" and not rep.skipped:
+        if rep.failed and call.excinfo is not None and is_site_failure(call.excinfo.value):
+            circuit_breaker.record_failure(f"{item.nodeid}: {call.excinfo.typename}")
+        else:
+            circuit_breaker.record_success()
+    
+    # Add screenshot and failure bundle to Allure on failure
+    driver = _item_driver(item)
+    if rep.when == "call" and rep.failed and driver is not None:
+        screenshot_path = ScreenshotHelper.take_screenshot(driver, item.name)
+        
+        if screenshot_path:
+            with open(screenshot_path, 'rb') as f:
+                allure.attach(
+                    f.read(),
+                    name=f"Screenshot_{item.name}",
+                    attachment_type=allure.attachment_type.PNG
+                )
+            report_stream.attach(rep, 'screenshot', screenshot_path, 'png')
+        
+        if config.failure_bundle:
+            bundle_path = failure_bundle.capture(driver, item.name, screenshot_path, getattr(item, 'network_log', None))
+            allure.attach.file(bundle_path, name=f"FailureBundle_{item.name}",
+                               attachment_type='application/gzip', extension='tar.gz')
+            report_stream.attach(rep, 'failure bundle', bundle_path, 'tar.gz')
+    
+    # Attach the last seconds of the screencast on failure
+    recorder = getattr(item, 'screencast', None)
+    if rep.when == "call" and rep.failed and recorder is not None:
+        encoded = ScreencastRecorder.encode(recorder.snapshot())
+        if encoded:
+            body, mime_type, extension = encoded
+            allure.attach(body, name=f"Screencast_{item.name}", attachment_type=mime_type, extension=extension)
+            report_stream.attach(rep, 'screencast', body, extension)
+
+
+def _item_driver(item):
+    """The WebDriver of a test's driver or browser_context fixture, if it has one"""
+    funcargs = getattr(item, 'funcargs', {})
+    if 'driver' in funcargs:
+        return funcargs['driver']
+    # BDD tests reach the driver through browser_context
+    if 'browser_context' in funcargs:
+        return funcargs['browser_context']['driver']
+    return None
+
+
+def _request_driver(request):
+    """Set up and return the test's browser, or None for tests without one"""
+    for name in ('browser_context', 'driver'):
+        if name in request.fixturenames:
+            value = request.getfixturevalue(name)
+            return value['driver'] if name == 'browser_context' else value
+    return None
+
+
+@pytest.fixture(autouse=True)
+def failure_network_log(request):
+    """Keep the test's recent network requests for its failure bundle"""
+    driver = _request_driver(request) if config.failure_bundle and config.failure_bundle_network else None
+    if driver is None:
+        yield
+        return
+    network_log = NetworkLog(driver)
+    if network_log.start():
+        request.node.network_log = network_log
+    yield
+    network_log.stop()
+
+
+@pytest.fixture(autouse=True)
+def failure_screencast(request):
+    """Record a screencast ring buffer for tests that use a browser; it is only kept if the test fails"""
+    driver = _request_driver(request) if config.screencast_on_failure else None
+    if driver is None:
+        yield
+        return
+    recorder = ScreencastRecorder(driver)
+    if recorder.start():
+        request.node.screencast = recorder
+    yield
+    # Stopped before the browser fixture's teardown quits or resets the session
+    recorder.stop()
+
+
+@pytest.fixture(autouse=True)
+def command_trace(request):
+    """Export the WebDriver commands of each test as a Chrome trace timeline"""
+    mark = command_tracer.mark()
+    yield
+    if command_tracer.tracing:
+        events = command_tracer.events_since(mark)
+        if events:
+            command_tracer.export_chrome_trace(events, config.command_trace_dir, request.node.nodeid)
+
+
+def _budget_message(nodeid):
+    """Describe the performance budgets a test exceeded, or None"""
+    violations = page_performance.violations_for(nodeid)
+    if not violations:
+        return None
+    return "Performance budget exceeded: " + "; ".join(
+        f"{target} {metric} {value:.0f} ms >= {limit:.0f} ms ({url})"
+        for _, target, metric, value, limit, url in violations
+    )
+
+
+@pytest.fixture(autouse=True)
+def navigation_timing(request):
+    """Attribute navigation timings to the test and warn about exceeded budgets (fail mode fails the call)"""
+    page_performance.current_nodeid = request.node.nodeid
+    yield
+    for timing in page_performance.captures_for(request.node.nodeid):
+        request.node.user_properties.append(('navigation_timing', timing))
+    
+    message = _budget_message(request.node.nodeid)
+    if message and config.perf_budget_mode != 'fail':
+        warnings.warn(message)
 
 
 @pytest.fixture(autouse=True)
 def setup_test_data(request):
     """Setup test data and metadata"""
-    # Set current test item for event listener
-    pytest.current_pytest_item = request.node
-    
     # Add test metadata to Allure
     if hasattr(request.node, 'get_closest_marker'):
         smoke_marker = request.node.get_closest_marker('smoke')
@@ -136,8 +304,84 @@ def setup_test_data(request):
             allure.dynamic.feature("End-to-End")
 
 
+@pytest.fixture(autouse=True)
+def locator_wait_history(request):
+    """Attribute locator wait samples to the test and keep them if it passed"""
+    locator_timeouts.current_nodeid = request.node.nodeid
+    yield
+    samples = locator_timeouts.pop_samples(request.node.nodeid)
+    # Waits of a failed test may have run against a broken page; only passed runs feed the history
+    report = getattr(request.node, 'rep_call', None)
+    if report is not None and report.passed:
+        request.node.user_properties.extend(('locator_wait', sample) for sample in samples)
+
+
+@pytest.fixture(autouse=True)
+def remote_command_overhead(request):
+    """Attribute remote WebDriver round trips and network overhead to the test"""
+    if config.browser.lower() != 'remote':
+        yield
+        return
+    snapshot = remote_command_stats.snapshot()
+    yield
+    request.node.user_properties.append(('remote_commands', remote_command_stats.since(snapshot)))
+
+
+def pytest_addoption(parser):
+    """Register the locator profiling options"""
+    group = parser.getgroup('locator profile')
+    group.addoption('--locator-profile', action='store_true', default=False,
+                    help="profile the in-browser cost of every page object locator")
+    group.addoption('--locator-cost-threshold', type=float, default=None, metavar='US',
+                    help="fail the locator profile when a locator query costs more than US microseconds")
+    group.addoption('--locator-repetitions', type=int, default=200,
+                    help="queries per locator in the locator profile")
+    group = parser.getgroup('bdd dry run')
+    group.addoption('--dry-run-steps', action='store_true', default=False,
+                    help="resolve the steps of the collected scenarios against the step definitions and exit")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Validate steps without running for --dry-run-steps; deselect the locator cost tests unless --locator-profile is given"""
+    if config.getoption('dry_run_steps'):
+        _dry_run_steps(config, items)
+    if config.getoption('locator_profile'):
+        return
+    deselected = [item for item in items if item.get_closest_marker('locator_profile')]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if not item.get_closest_marker('locator_profile')]
+
+
+def _dry_run_steps(config, items):
+    """Resolve every step of the collected scenarios, report and exit before any fixture runs"""
+    scenarios = []
+    for item in items:
+        template = getattr(getattr(item, 'obj', None), '__scenario__', None)
+        if template is not None:
+            example = item.callspec.params.get('_pytest_bdd_example', {}) if hasattr(item, 'callspec') else {}
+            scenarios.append(template.render(example))
+    
+    registry = StepRegistry()
+    result = registry.validate(scenarios)
+    reporter = config.pluginmanager.get_plugin('terminalreporter')
+    reporter.section("bdd step dry run")
+    for line in registry.format_validation(result):
+        reporter.write_line(line)
+    pytest.exit(f"Dry run of {len(scenarios)} scenarios", returncode=1 if registry.has_errors(result) else 0)
+
+
+def _check_cassette_recording(pytest_config):
+    """Refuse to record cassettes from parallel workers, which would all write the same files"""
+    parallel = hasattr(pytest_config, 'workerinput') or pytest_config.getoption('numprocesses', None)
+    if config.http_cassette_mode == 'record' and parallel:
+        raise pytest.UsageError("HTTP_CASSETTE_MODE=record cannot run under pytest-xdist; drop -n to record cassettes")
+
+
 def pytest_configure(config):
-    """Configure pytest with custom markers"""
+    """Configure pytest with custom markers and the run history plugin"""
+    _check_cassette_recording(config)
+    register_run_history(config)
     config.addinivalue_line(
         "markers", "smoke: mark test as smoke test"
     )
@@ -155,4 +399,168 @@ def pytest_configure(config):
     )
     config.addinivalue_line(
         "markers", "slow: mark test as slow running"
-    )
\ No newline at end of file
+    )
+    config.addinivalue_line(
+        "markers", "fast-nav: navigate by URL instead of through the search box and header links"
+    )
+    config.addinivalue_line(
+        "markers", "ui-nav: always navigate through the UI, even when FAST_NAV is on"
+    )
+    config.addinivalue_line(
+        "markers", f"{IDEMPOTENT_BACKGROUND_TAG}: the Background only navigates; later scenarios deep-link to where it ends"
+    )
+    config.addinivalue_line(
+        "markers", "locator_profile: page object locator cost test, selected by --locator-profile"
+    )
+    config.addinivalue_line(
+        "markers", "performance: page load budget scenario, run only with PAGE_PERFORMANCE=true"
+    )
+
+
+def pytest_sessionstart(session):
+    """Install session-wide instrumentation and check the site is up"""
+    command_tracer.install(config.command_trace, config.command_trace_capacity)
+    
+    # xdist workers share the state the controller reset and pre-flighted
+    controller = not hasattr(session.config, 'workerinput')
+    # Results reach the controller from every worker; it alone writes the streaming report
+    if controller and report_stream.enabled and not session.config.option.collectonly:
+        report_stream.open()
+    # Only runs that execute tests keep breaker state; workers get the controller's state file
+    will_run = not session.config.option.collectonly and not session.config.getoption('dry_run_steps')
+    if controller and will_run:
+        circuit_breaker.arm(session.config._tmp_path_factory.getbasetemp() / 'circuit_breaker.json', reset=True)
+    elif not controller and session.config.workerinput.get('circuit_breaker_file'):
+        circuit_breaker.arm(session.config.workerinput['circuit_breaker_file'])
+    # The local shop and the replay proxy are started by fixtures; there is nothing to probe yet
+    if controller and will_run and config.preflight and config.environment != 'local' \
+            and config.http_cassette_mode != 'replay':
+        problems = preflight()
+        if problems:
+            circuit_breaker.trip(f"pre-flight of {config.shop_url} failed: " + "; ".join(problems))
+    if config.step_profiling:
+        step_profiler.install()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Hand the controller's circuit breaker state file to an xdist worker"""
+    if circuit_breaker.armed:
+        node.workerinput['circuit_breaker_file'] = str(circuit_breaker.path)
+
+
+def pytest_runtest_setup(item):
+    """Skip page load budget scenarios unless page performance is being measured"""
+    if item.get_closest_marker('performance') and not config.page_performance:
+        pytest.skip("page load budgets run only with PAGE_PERFORMANCE=true")
+
+
+def pytest_bdd_before_scenario(request, feature, scenario):
+    """Select the feature's cassette for the scenario and deep-link past an idempotent Background"""
+    proxy = request.getfixturevalue('http_cassette')
+    if proxy:
+        proxy.begin_scenario(feature.filename, request.node.nodeid)
+    background_cache.start_scenario(request, feature)
+
+
+def pytest_bdd_after_scenario(request, feature, scenario):
+    """Persist the scenario's recording"""
+    proxy = request.getfixturevalue('http_cassette')
+    if proxy:
+        proxy.end_scenario()
+
+
+def pytest_bdd_before_step(request, feature, scenario, step, step_func):
+    """Start timing a BDD step"""
+    background_cache.before_step(request, feature, step)
+    command_tracer.start_span(f"{step.keyword} {step.name}")
+    if step_profiler.installed:
+        step_profiler.start_step(scenario, step)
+
+
+def pytest_bdd_after_step(request, feature, scenario, step, step_func, step_func_args):
+    """Finish timing a passed BDD step"""
+    _finish_step_timing(request, 'passed')
+    background_cache.after_step(request, feature, step)
+
+
+def pytest_bdd_step_error(request, feature, scenario, step, step_func, step_func_args, exception):
+    """Finish timing a failed BDD step"""
+    _finish_step_timing(request, 'failed')
+
+
+def _finish_step_timing(request, status):
+    """Store the step timing record on the test item and in Allure"""
+    command_tracer.finish_span()
+    if not step_profiler.installed:
+        return
+    record = step_profiler.finish_step(request.node.nodeid, status)
+    if record:
+        # user_properties travel with the report, so xdist workers reach the controller too
+        request.node.user_properties.append(('step_timing', record))
+        step_profiler.report_to_allure(record)
+
+
+def pytest_runtest_logreport(report):
+    """Collect step timing records from call reports and stream results to the report"""
+    report_stream.add_report(report)
+    if report.when == 'call':
+        _step_timings.extend(value for name, value in report.user_properties if name == 'step_timing')
+    elif report.when == 'teardown':
+        _navigation_timings.extend(value for name, value in report.user_properties if name == 'navigation_timing')
+        _locator_waits.extend(value for name, value in report.user_properties if name == 'locator_wait')
+        _remote_commands.extend(value for name, value in report.user_properties if name == 'remote_commands')
+    if report.when == 'call':
+        _locator_profile.extend(value for name, value in report.user_properties if name == 'locator_profile')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write collected step timings to JSON and navigation timings and locator waits to their history databases"""
+    if not hasattr(session.config, 'workerinput'):
+        if _step_timings:
+            step_profiler.write_json(_step_timings, config.step_profiling_output)
+        if _navigation_timings:
+            _navigation_regressions.extend(page_performance.regressions(_navigation_timings))
+            page_performance.write_history(_navigation_timings)
+        locator_timeouts.write_history(_locator_waits)
+        if _locator_profile:
+            LocatorProfiler.write_json(_locator_profile, 'reports/locator_profile.json')
+        index_path = report_stream.close()
+        if index_path:
+            _report_index.append(index_path)
+    # Sessions kept for reuse on the remote endpoint end with the run
+    WebDriverManager().quit_driver(force=True)
+    step_profiler.uninstall()
+    command_tracer.uninstall()
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Show the slowest BDD steps, page performance regressions, locator costs and remote overhead of the run"""
+    if _report_index:
+        terminalreporter.write_sep("-", f"streaming report: {_report_index[0]}")
+    if _remote_commands:
+        lines = RemoteCommandStats.format_report(RemoteCommandStats.merge(_remote_commands))
+        if lines:
+            terminalreporter.section(f"remote WebDriver overhead ({config.remote_url})")
+            for line in lines:
+                terminalreporter.write_line(line)
+    if _locator_profile:
+        terminalreporter.section("locator profile")
+        results = sorted(_locator_profile, key=lambda result: result['cost_us'], reverse=True)
+        for line in LocatorProfiler.format_report(results):
+            terminalreporter.write_line(line)
+        terminalreporter.write_line("Locator profile written to reports/locator_profile.json")
+    if _navigation_regressions:
+        terminalreporter.section("page performance regressions")
+        for pattern, metric, current, baseline in _navigation_regressions:
+            terminalreporter.write_line(f"{pattern}: {metric} median {current:.0f} ms (history median {baseline:.0f} ms)")
+    if not _step_timings:
+        return
+    terminalreporter.section(f"slowest {config.step_profiling_top_n} BDD steps")
+    terminalreporter.write_line(f"{'wall ms':>9} {'cmds':>5} {'cmd ms':>9} {'wait ms':>9} {'sleep ms':>9}  step")
+    for record in step_profiler.slowest_steps(_step_timings, config.step_profiling_top_n):
+        terminalreporter.write_line(
+            f"{record['wall_ms']:>9} {record['commands']:>5} {record['command_ms']:>9} "
+            f"{record['wait_ms']:>9} {record['sleep_ms']:>9}  {record['step']} ({record['nodeid']})"
+        )
+    terminalreporter.write_line(f"Step timings written to {config.step_profiling_output}")
@@ -1,3 +1,4 @@
+@idempotent-background
 Feature: User Login
   As a user of the demo web shop
   I want to be able to log in to my account
@@ -39,6 +40,10 @@ Feature: User Login
     Then I should see an authentication error message
     And I should remain on the login page
 
+  @login @regression
+  Scenario: Login in one round trip ends like typing
+    Then submitting valid credentials by typing and in one round trip should end the same way
+
   @login
   Scenario: Navigate to registration from login page
     When I click on the register link
@@ -6,12 +6,24 @@ Feature: Product Search and Shopping Cart
   Background:
     Given I am on the demo webshop homepage
 
-  @smoke @shopping
+  @smoke @shopping @ui-nav
   Scenario: Search for a product and view results
     When I search for "computer"
     Then I should see search results
     And the search results should contain products related to "computer"
 
+  @performance @shopping
+  Scenario: Search results load within their budget
+    When I search for "computer"
+    Then I should see search results
+    And the "search results" page DOMContentLoaded should be under 5000 ms
+
+  @shopping
+  Scenario: Sort all search results by price
+    When I search for "computer"
+    And I sort the search results by "Price: Low to High"
+    Then all search results should be sorted by price from low to high
+
   @shopping @regression
   Scenario: Add a product to cart from search results
     When I search for "book"
@@ -69,7 +81,7 @@ Feature: Product Search and Shopping Cart
     And I click continue shopping
     Then I should be redirected to the homepage
 
-  @shopping
+  @shopping @fast-nav
   Scenario Outline: Search for different product categories
     When I search for "<product_category>"
     Then I should see search results
@@ -80,4 +92,15 @@ Feature: Product Search and Shopping Cart
       | book            |
       | computer        |
       | camcorder       |
-      | jewelry         |
\ No newline at end of file
+      | jewelry         |
+
+  @shopping
+  Scenario Outline: Product pages match the catalog index
+    When I open the cheapest product in the "<category>" category
+    Then the product details should match the catalog
+
+    Examples:
+      | category    |
+      | books       |
+      | computers   |
+      | electronics |
@@ -5,10 +5,12 @@ import pytest
 from pytest_bdd import given, when, then, parsers
 from pages import HomePage, LoginPage, SearchResultsPage, ProductDetailsPage, ShoppingCartPage
 from utils import WebDriverManager, TestDataHelper
+from utils.background_cache import background_step
 from config import config
 
 
 @given('I am on the demo webshop homepage')
+@background_step
 def navigate_to_homepage(browser_context):
     """Navigate to the demo webshop homepage"""
     home_page = HomePage(browser_context['driver'])
@@ -17,6 +19,7 @@ def navigate_to_homepage(browser_context):
 
 
 @when('I click on the login link')
+@background_step
 def click_login_link(browser_context):
     """Click on the login link"""
     home_page = browser_context['home_page']
@@ -42,8 +45,16 @@ def enter_valid_credentials(browser_context):
         login_page = browser_context['login_page']
     
     test_data = TestDataHelper.get_test_credentials()
-    login_page.enter_email(test_data['email'])
-    login_page.enter_password(test_data['password'])
+    if not config.batched_form_fill or login_page.fill_credentials(test_data['email'], test_data['password']):
+        login_page.type_credentials(test_data['email'], test_data['password'])
+
+
+@then('submitting valid credentials by typing and in one round trip should end the same way')
+def verify_login_form_parity(browser_context):
+    """Submit the login form both ways and compare the outcomes"""
+    login_page = browser_context.get('login_page') or LoginPage(browser_context['driver'])
+    test_data = TestDataHelper.get_test_credentials()
+    login_page.check_form_parity(test_data['email'], test_data['password'])
 
 
 @when('I click the login button')
@@ -0,0 +1,18 @@
+"""
+Page performance budget step definitions
+"""
+from pytest_bdd import then, parsers
+from pages import BasePage
+from utils.page_performance import page_performance, metric_name
+
+
+@then(parsers.parse('the "{page}" page {metric} should be under {budget:d} ms'))
+def verify_page_performance_budget(browser_context, page, metric, budget):
+    """Verify a navigation timing metric of a page is within its budget"""
+    BasePage(browser_context['driver']).capture_navigation_timing(force=True)
+    timing = page_performance.latest(page, page_performance.current_nodeid)
+    assert timing is not None, f"No navigation timing captured for the {page} page"
+    
+    value = timing[metric_name(metric)]
+    assert value is not None, f"{metric} is not available for {timing['url']}"
+    assert value < budget, f"{page} page {metric} took {value:.0f} ms, budget is {budget} ms"
@@ -0,0 +1,6 @@
+"""
+Load generation from the feature-file shopper journeys
+"""
+from .metrics import LoadMetrics
+
+__all__ = ['LoadMetrics']
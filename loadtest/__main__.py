@@ -0,0 +1,104 @@
+"""
+Command line entry point: python -m loadtest <mode> [options]
+"""
+import argparse
+import os
+import sys
+
+from loadtest.metrics import LoadMetrics
+
+
+DEFAULT_FEATURES = ['end_to_end.feature', 'shopping_cart.feature']
+
+
+def add_common_arguments(parser):
+    """Arguments shared by every load mode"""
+    parser.add_argument('--users', type=int, default=5, help="number of concurrent virtual users")
+    limit = parser.add_mutually_exclusive_group(required=True)
+    limit.add_argument('--duration', type=float, help="seconds to keep generating load after ramp-up")
+    limit.add_argument('--iterations', type=int, help="journeys per virtual user")
+    parser.add_argument('--ramp-up', type=float, default=0, help="seconds over which users are started")
+    parser.add_argument('--output', default='reports/load_test.json')
+    parser.add_argument('--feature', action='append',
+                        help="feature file to replay (repeatable, default: end_to_end and shopping_cart)")
+    parser.add_argument('--local-shop', action='store_true', help="start the local stand-in shop and target it")
+
+
+def run_browser(args, metrics):
+    from loadtest.browser_users import BrowserLoadRunner
+    runner = BrowserLoadRunner(args.feature or DEFAULT_FEATURES, metrics, users=args.users,
+                               duration=args.duration, iterations=args.iterations, ramp_up=args.ramp_up,
+                               headless=not args.headed, browser_name=args.browser)
+    runner.run()
+
+
+def run_http(args, metrics):
+    from config import config
+    from loadtest.http_engine import HttpLoadRunner
+    raise_open_file_limit()
+    runner = HttpLoadRunner(args.feature or DEFAULT_FEATURES, metrics, args.base_url or config.base_url,
+                            users=args.users, duration=args.duration, iterations=args.iterations,
+                            ramp_up=args.ramp_up, timeout=args.timeout, verify_tls=not args.insecure)
+    for scenario in runner.skipped:
+        print(f"Skipping scenario without HTTP step mappings: {scenario.name}")
+    runner.run()
+
+
+def raise_open_file_limit():
+    """Every protocol-level user holds its own sockets; lift the soft descriptor limit to the hard one"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else max(soft, 65536), hard))
+
+
+def start_local_shop():
+    """Start the local stand-in shop and point config.base_url at it"""
+    # Importing config loads .env, which would reset ENVIRONMENT, so override it afterwards
+    from config import config
+    from local_shop import LocalShopServer
+    os.environ['ENVIRONMENT'] = 'local'
+    server = LocalShopServer(port=config.local_shop_port).start()
+    os.environ['LOCAL_SHOP_PORT'] = str(server.httpd.server_address[1])
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description="Generate load from shopper journeys")
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    browser = modes.add_parser('browser', help="replay feature-file scenarios in headless browser sessions")
+    add_common_arguments(browser)
+    browser.add_argument('--browser', default=None, help="browser name (default: BROWSER setting)")
+    browser.add_argument('--headed', action='store_true', help="show the browser windows")
+    browser.set_defaults(run=run_browser)
+
+    http = modes.add_parser('http', help="replay feature-file scenarios as protocol-level virtual users")
+    add_common_arguments(http)
+    http.add_argument('--base-url', default=None, help="shop to load (default: BASE_URL setting)")
+    http.add_argument('--timeout', type=float, default=30, help="seconds per request")
+    http.add_argument('--insecure', action='store_true', help="do not verify TLS certificates")
+    http.set_defaults(run=run_http)
+
+    args = parser.parse_args(argv)
+    server = start_local_shop() if args.local_shop else None
+    if server and getattr(args, 'base_url', None) is None:
+        # Protocol-level users get the stand-in's address directly rather than through config
+        args.base_url = server.url
+    metrics = LoadMetrics()
+    try:
+        args.run(args, metrics)
+    finally:
+        if server:
+            server.stop()
+    metrics.print_summary()
+    metrics.write_json(args.output)
+    print(f"\nLoad test report written to {args.output}")
+    return 1 if metrics.summary()['failed_journeys'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
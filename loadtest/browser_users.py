@@ -0,0 +1,92 @@
+"""
+Browser virtual users that replay feature-file scenarios as shopper journeys
+"""
+import threading
+import time
+
+from config import config
+from utils.bdd_steps import StepRegistry, load_scenarios
+from utils.driver_manager import DriverPool
+
+
+class BrowserLoadRunner:
+    """Runs scenarios as concurrent virtual users on pooled headless sessions"""
+
+    def __init__(self, feature_files, metrics, users=1, duration=None, iterations=None, ramp_up=0,
+                 headless=True, browser_name=None):
+        if duration is None and iterations is None:
+            raise ValueError("Either a duration or an iteration count is required")
+        self.scenarios = load_scenarios(feature_files)
+        if not self.scenarios:
+            raise ValueError(f"No scenarios found in {', '.join(feature_files)}")
+        self.registry = StepRegistry()
+        # Fail before any browser starts if a journey has an unknown step
+        for scenario in self.scenarios:
+            for step in scenario.steps:
+                self.registry.find(step)
+        self.metrics = metrics
+        self.users = users
+        self.duration = duration
+        self.iterations = iterations
+        self.ramp_up = ramp_up
+        self.pool = DriverPool(users, browser_name=browser_name, headless=headless)
+        self._stop = threading.Event()
+        self._deadline = None
+
+    def run(self):
+        """Start the virtual users, wait for them to finish and close the pool"""
+        threads = [threading.Thread(target=self._user, args=(index,), name=f'vu-{index}', daemon=True)
+                   for index in range(self.users)]
+        self._deadline = time.monotonic() + self.ramp_up + self.duration if self.duration else None
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.metrics.stop()
+            self.pool.close()
+        return self.metrics
+
+    def _running(self, completed):
+        if self._stop.is_set():
+            return False
+        if self.iterations is not None and completed >= self.iterations:
+            return False
+        return self._deadline is None or time.monotonic() < self._deadline
+
+    def _user(self, index):
+        """Virtual user loop: start on the ramp-up schedule, then run journeys round robin"""
+        if self._stop.wait(self.ramp_up * index / self.users):
+            return
+        completed = 0
+        while self._running(completed):
+            scenario = self.scenarios[(index + completed) % len(self.scenarios)]
+            self._journey(scenario)
+            completed += 1
+
+    def _journey(self, scenario):
+        """Run one scenario on a pooled session and record its step and journey timings"""
+        driver = self.pool.acquire()
+        browser_context = {'driver': driver, 'base_url': config.base_url, 'fast_nav': config.fast_nav}
+        error = None
+        start = time.perf_counter()
+        for step in scenario.steps:
+            step_start = time.perf_counter()
+            try:
+                self.registry.run(step, browser_context)
+            except Exception as e:
+                error = f"{step.keyword} {step.name}: {type(e).__name__}: {e}"
+            self.metrics.record_step(f"{step.keyword} {step.name}",
+                                     (time.perf_counter() - step_start) * 1000, ok=error is None)
+            if error:
+                break
+        self.metrics.record_journey(scenario.name, (time.perf_counter() - start) * 1000,
+                                    ok=error is None, error=error)
+        # A session that failed mid-journey may be in any state; reset it or replace it
+        self.pool.release(driver)
@@ -0,0 +1,263 @@
+"""
+Protocol-level virtual users for high-concurrency load
+
+A minimal asyncio HTTP/1.1 client keeps one keep-alive connection per host and
+its own cookie jar for each virtual user, so thousands of shoppers fit in a
+single process. Journeys are the same feature-file scenarios the browser runs
+use; their steps are mapped to requests in ``loadtest.http_steps``.
+"""
+import asyncio
+import json
+import ssl
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from loadtest.http_steps import HttpStepRegistry
+from utils.bdd_steps import load_scenarios
+
+
+class HttpResponse:
+    """Response of the asyncio client"""
+
+    def __init__(self, url, status, headers, body, elapsed_ms):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class AsyncHttpClient:
+    """Keep-alive HTTP/1.1 client with a cookie jar, owned by one virtual user"""
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout=30, ssl_context=None):
+        self.timeout = timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.cookies = {}
+        self._connections = {}
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, data=None, **kwargs):
+        return await self.request('POST', url, data=data, **kwargs)
+
+    async def request(self, method, url, data=None, headers=None, follow_redirects=True):
+        """Send a request, following redirects the way a browser does"""
+        start = time.perf_counter()
+        body = urlencode(data, doseq=True).encode('utf-8') if isinstance(data, (dict, list)) else (data or b'')
+        for _ in range(self.MAX_REDIRECTS + 1):
+            status, response_headers, response_body = await asyncio.wait_for(
+                self._exchange(method, url, body, headers), self.timeout)
+            location = response_headers.get('location')
+            if not (follow_redirects and location and status in (301, 302, 303, 307, 308)):
+                break
+            url = urljoin(url, location)
+            if status in (301, 302, 303):
+                method, body = 'GET', b''
+        return HttpResponse(url, status, response_headers, response_body, (time.perf_counter() - start) * 1000)
+
+    async def _exchange(self, method, url, body, headers):
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        address = (parts.hostname, parts.port or (443 if secure else 80), secure)
+        target = parts.path or '/'
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive",
+                 "Accept: text/html,application/json,*/*", "User-Agent: selenium-bdd-webshop-loadtest"]
+        if self.cookies:
+            lines.append("Cookie: " + '; '.join(f"{name}={value}" for name, value in self.cookies.items()))
+        if method == 'POST':
+            lines.append("Content-Type: application/x-www-form-urlencoded; charset=UTF-8")
+        if body or method == 'POST':
+            lines.append(f"Content-Length: {len(body)}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            reused = address in self._connections
+            reader, writer = await self._connection(address)
+            try:
+                writer.write(payload)
+                await writer.drain()
+                status, response_headers, response_body, keep_alive = await self._read_response(reader, method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self._discard(address)
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                # A timeout (cancellation) or unparsable response leaves the stream mid-response
+                self._discard(address)
+                raise
+            if not keep_alive:
+                self._discard(address)
+            self._store_cookies(response_headers.get('set-cookie', []))
+            return status, response_headers, response_body
+
+    async def _connection(self, address):
+        connection = self._connections.get(address)
+        if connection is None:
+            host, port, secure = address
+            connection = self._connections[address] = await asyncio.open_connection(
+                host, port, ssl=self.ssl_context if secure else None)
+        return connection
+
+    def _discard(self, address):
+        connection = self._connections.pop(address, None)
+        if connection is not None:
+            connection[1].close()
+
+    @staticmethod
+    async def _read_response(reader, method):
+        head = await reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        version, status = status_line.split(' ', 2)[:2]
+        headers = {'set-cookie': []}
+        for line in header_lines:
+            if not line:
+                continue
+            name, _, value = line.partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                headers['set-cookie'].append(value)
+            else:
+                headers[name] = value
+
+        status = int(status)
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers
+                    while (await reader.readline()) not in (b'\r\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, headers, body, keep_alive
+
+    def _store_cookies(self, set_cookie_headers):
+        for header in set_cookie_headers:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except Exception:
+                continue
+            for name, morsel in cookie.items():
+                if morsel.value == '' or morsel['max-age'] == '0':
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+
+    def clear_cookies(self):
+        """Start over as a new shopper on the same connections"""
+        self.cookies.clear()
+
+    async def close(self):
+        for address in list(self._connections):
+            self._discard(address)
+
+
+class HttpLoadRunner:
+    """Runs scenarios as concurrent protocol-level virtual users"""
+
+    def __init__(self, feature_files, metrics, base_url, users=1, duration=None, iterations=None, ramp_up=0,
+                 timeout=30, verify_tls=True):
+        if duration is None and iterations is None:
+            raise ValueError("Either a duration or an iteration count is required")
+        self.registry = HttpStepRegistry()
+        self.scenarios = []
+        self.skipped = []
+        for scenario in load_scenarios(feature_files):
+            missing = [step for step in scenario.steps if not self.registry.matches(step)]
+            (self.skipped if missing else self.scenarios).append(scenario)
+        if not self.scenarios:
+            raise ValueError(f"No scenarios with HTTP step mappings found in {', '.join(feature_files)}")
+        self.metrics = metrics
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.users = users
+        self.duration = duration
+        self.iterations = iterations
+        self.ramp_up = ramp_up
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        if not verify_tls:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._deadline = None
+
+    def run(self):
+        """Run the virtual users to completion"""
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.metrics.stop()
+        return self.metrics
+
+    async def _run(self):
+        self._deadline = time.monotonic() + self.ramp_up + self.duration if self.duration else None
+        await asyncio.gather(*(self._user(index) for index in range(self.users)))
+
+    def _running(self, completed):
+        if self.iterations is not None and completed >= self.iterations:
+            return False
+        return self._deadline is None or time.monotonic() < self._deadline
+
+    async def _user(self, index):
+        """Virtual user loop: start on the ramp-up schedule, then run journeys round robin"""
+        await asyncio.sleep(self.ramp_up * index / self.users)
+        client = AsyncHttpClient(self.timeout, self.ssl_context)
+        completed = 0
+        try:
+            while self._running(completed):
+                scenario = self.scenarios[(index + completed) % len(self.scenarios)]
+                client.clear_cookies()
+                await self._journey(client, scenario)
+                completed += 1
+        finally:
+            await client.close()
+
+    async def _journey(self, client, scenario):
+        """Run one scenario and record its step and journey timings"""
+        context = {'client': client, 'base_url': self.base_url}
+        error = None
+        start = time.perf_counter()
+        for step in scenario.steps:
+            step_start = time.perf_counter()
+            try:
+                await self.registry.run(step, context)
+            except Exception as e:
+                error = f"{step.keyword} {step.name}: {type(e).__name__}: {e}"
+            self.metrics.record_step(f"{step.keyword} {step.name}",
+                                     (time.perf_counter() - step_start) * 1000, ok=error is None)
+            if error:
+                break
+        self.metrics.record_journey(scenario.name, (time.perf_counter() - start) * 1000,
+                                    ok=error is None, error=error)
@@ -0,0 +1,325 @@
+"""
+Protocol-level implementations of the shopping and login steps
+
+Each step has the text of its browser step definition and does what the page
+objects do with requests instead: pages are fetched, anti-forgery tokens and
+product ids are read from the markup and forms and AJAX calls are posted
+directly. The step context holds the client, the base URL, the last page and
+state shared between steps.
+"""
+import asyncio
+from urllib.parse import quote_plus, urljoin
+
+from pytest_bdd import parsers
+
+from config import config
+from utils import html_parsing
+from utils.catalog_index import CatalogIndex
+
+
+# (parser, coroutine function) pairs in registration order
+HTTP_STEPS = []
+
+# Catalog index per shop URL, shared by all virtual users
+_catalog_indexes = {}
+
+
+def http_step(pattern):
+    """Register a coroutine as the protocol-level implementation of a step"""
+    parser = parsers.get_parser(pattern)
+
+    def decorator(func):
+        HTTP_STEPS.append((parser, func))
+        return func
+    return decorator
+
+
+class HttpStepRegistry:
+    """Matches scenario steps to their protocol-level implementations"""
+
+    def __init__(self, steps=HTTP_STEPS):
+        self.steps = steps
+
+    def matches(self, step):
+        """Return every implementation matching a step"""
+        return [(parser, func) for parser, func in self.steps if parser.is_matching(step.name)]
+
+    async def run(self, step, context):
+        """Execute a step with a step context dict"""
+        parser, func = self.matches(step)[0]
+        return await func(context, **(parser.parse_arguments(step.name) or {}))
+
+
+async def open_page(context, path):
+    """GET a shop page and make it the current page"""
+    # Pages link relatively on the stand-in and absolutely on the real shop (e.g. the sort options)
+    response = await context['client'].get(urljoin(context['base_url'], path))
+    assert response.status == 200, f"GET {response.url} returned {response.status}"
+    context['page'] = response
+    return response.text
+
+
+async def catalog_products(context, category=None):
+    """Return indexed products, cheapest first; the index is loaded or crawled off the event loop"""
+    index = _catalog_indexes.setdefault(context['base_url'], CatalogIndex(context['base_url']))
+    return await asyncio.to_thread(index.in_price_range, category=category)
+
+
+async def open_product(context, product):
+    """Deep-link to a product page"""
+    html = await open_page(context, product['slug'])
+    context['product_id'] = html_parsing.product_id(html)
+    context['catalog_product'] = product
+    return html
+
+
+async def submit_cart_form(context, fields):
+    """Post the shopping cart form of the current page"""
+    html = context['page'].text
+    form = [('__RequestVerificationToken', html_parsing.verification_token(html) or '')]
+    form.extend(fields)
+    response = await context['client'].post(context['base_url'] + 'cart', form)
+    assert response.status == 200, f"POST /cart returned {response.status}"
+    context['page'] = response
+    return response.text
+
+
+# Navigation and login
+
+@http_step('I am on the demo webshop homepage')
+async def open_homepage(context):
+    await open_page(context, '/')
+
+
+@http_step('I click on the login link')
+async def open_login_page(context):
+    html = await open_page(context, 'login')
+    assert html_parsing.verification_token(html), "Login form has no anti-forgery token"
+
+
+@http_step('I enter valid login credentials')
+async def enter_valid_credentials(context):
+    context['email'] = config.test_email
+    context['password'] = config.test_password
+
+
+@http_step('I click the login button')
+async def submit_login(context):
+    form = {
+        '__RequestVerificationToken': html_parsing.verification_token(context['page'].text) or '',
+        'Email': context.get('email', ''),
+        'Password': context.get('password', ''),
+        'RememberMe': 'false',
+    }
+    response = await context['client'].post(context['base_url'] + 'login', form)
+    context['page'] = response
+
+
+@http_step('I should be logged in successfully')
+@http_step('I should see the logout link')
+async def verify_logged_in(context):
+    assert html_parsing.is_logged_in(context['page'].text), "Login was not successful"
+
+
+@http_step('I should be redirected to the homepage')
+async def verify_homepage(context):
+    assert context['page'].url.rstrip('/') == context['base_url'].rstrip('/'), \
+        f"Not redirected to the homepage: {context['page'].url}"
+
+
+# Search and product details
+
+@http_step(parsers.parse('I search for "{search_term}"'))
+async def search_for_product(context, search_term):
+    html = await open_page(context, f"search?q={quote_plus(search_term)}")
+    context['search_results'] = html_parsing.product_items(html)
+
+
+@http_step('I should see search results')
+async def verify_search_results(context):
+    assert context.get('search_results'), "No search results found"
+
+
+@http_step(parsers.parse('the search results should contain products related to "{search_term}"'))
+async def verify_search_results_relevance(context, search_term):
+    titles = [item['title'] for item in context['search_results']]
+    assert any(search_term.lower() in title.lower() for title in titles), \
+        f"No products found related to '{search_term}'"
+
+
+@http_step(parsers.parse('I sort the search results by "{option}"'))
+async def sort_search_results(context, option):
+    options = {text: value for text, value, _ in html_parsing.select_options(context['page'].text, 'products-orderby')}
+    assert option in options, f"Sort option '{option}' is not available"
+    html = await open_page(context, options[option])
+    context['search_results'] = html_parsing.product_items(html)
+
+
+@http_step(parsers.parse('all search results should be sorted by price from {direction}'))
+async def verify_all_results_sorted_by_price(context, direction):
+    html = context['page'].text
+    items = html_parsing.product_items(html)
+    for number in range(2, html_parsing.page_count(html) + 1):
+        response = await context['client'].get(html_parsing.page_url(context['page'].url, number))
+        items.extend(html_parsing.product_items(response.text))
+    prices = [html_parsing.parse_price(item['price']) for item in items]
+    assert prices, "No search results found"
+    assert prices == sorted(prices, reverse=direction == "high to low"), f"Prices are not sorted from {direction}: {prices}"
+
+
+@http_step('I click on the first product in the search results')
+async def open_first_product(context):
+    assert context.get('search_results'), "No search results to click"
+    html = await open_page(context, context['search_results'][0]['url'])
+    context['product_id'] = html_parsing.product_id(html)
+
+
+@http_step('I should be on the product details page')
+async def verify_product_details_page(context):
+    assert context.get('product_id'), f"Not on a product details page: {context['page'].url}"
+
+
+@http_step(parsers.parse('I change the quantity to "{quantity}"'))
+async def change_product_quantity(context, quantity):
+    context['quantity'] = quantity
+
+
+@http_step('I click add to cart')
+async def add_to_cart(context):
+    product_id = context['product_id']
+    response = await context['client'].post(
+        f"{context['base_url']}addproducttocart/details/{product_id}/1",
+        {f'addtocart_{product_id}.EnteredQuantity': context.get('quantity', '1')},
+        headers={'X-Requested-With': 'XMLHttpRequest'},
+    )
+    assert response.status == 200, f"Add to cart returned {response.status}"
+    context['add_to_cart'] = response.json()
+
+
+@http_step('I should see a success message')
+async def verify_success_message(context):
+    payload = context['add_to_cart']
+    assert payload.get('success'), f"Add to cart failed: {payload.get('message')}"
+
+
+@http_step('the product should be added to my cart')
+async def verify_product_in_cart(context):
+    quantity = html_parsing.top_cart_quantity(context['add_to_cart'])
+    assert quantity and quantity > 0, "Cart is empty after adding a product"
+
+
+@http_step(parsers.parse('the cart should show "{expected_quantity}" items'))
+async def verify_cart_quantity(context, expected_quantity):
+    quantity = html_parsing.top_cart_quantity(context['add_to_cart'])
+    assert quantity == int(expected_quantity), f"Expected {expected_quantity} items, but cart shows {quantity}"
+
+
+@http_step('I have added products to my cart')
+async def add_products_to_cart(context):
+    await open_product(context, (await catalog_products(context, 'books'))[0])
+    await add_to_cart(context)
+    await verify_success_message(context)
+
+
+@http_step(parsers.parse('I open the cheapest product in the "{category}" category'))
+async def open_cheapest_product_in_category(context, category):
+    products = await catalog_products(context, category)
+    assert products, f"No products in the '{category}' category"
+    await open_product(context, products[0])
+
+
+@http_step('the product details should match the catalog')
+async def verify_product_matches_catalog(context):
+    product = context['catalog_product']
+    html = context['page'].text
+    assert html_parsing.product_name(html) == product['name'], f"Expected product '{product['name']}'"
+    assert html_parsing.product_sku(html) == product['sku'], f"Expected SKU {product['sku']}"
+
+
+# Shopping cart
+
+@http_step('I have an empty cart')
+async def ensure_empty_cart(context):
+    client = context['client']
+    if 'NOPCOMMERCE.AUTH' not in client.cookies:
+        # A guest cart belongs to the guest cookie; dropping it starts a new, empty cart
+        client.cookies.pop('Nop.customer', None)
+        return
+    html = await open_page(context, 'cart')
+    item_ids = html_parsing.cart_item_ids(html)
+    if item_ids:
+        await submit_cart_form(context, [('removefromcart', item_id) for item_id in item_ids] + [('updatecart', '')])
+
+
+@http_step('I navigate to the shopping cart')
+async def open_cart(context):
+    html = await open_page(context, 'cart')
+    context['cart_items'] = html_parsing.cart_item_quantities(html)
+    context['cart_changes'] = []
+
+
+@http_step('I should see the products in my cart')
+@http_step('I should be able to proceed as a guest')
+async def verify_products_in_cart(context):
+    assert html_parsing.cart_item_ids(context['page'].text), "No products found in cart"
+
+
+@http_step('I should see the total price')
+@http_step('the total price should be updated')
+async def verify_total_price(context):
+    assert html_parsing.order_total(context['page'].text), "Total price not displayed"
+
+
+@http_step('I should see an empty cart message')
+async def verify_empty_cart(context):
+    assert 'Your Shopping Cart is empty!' in context['page'].text, "Cart is not empty"
+
+
+@http_step(parsers.parse('I update the quantity of the first item to "{new_quantity}"'))
+async def update_first_item_quantity(context, new_quantity):
+    item_id = context['cart_items'][0][0]
+    context['cart_changes'].append((f'itemquantity{item_id}', new_quantity))
+    context['updated_quantity'] = int(new_quantity)
+
+
+@http_step('I select the first item for removal')
+async def select_first_item_for_removal(context):
+    context['cart_changes'].append(('removefromcart', context['cart_items'][0][0]))
+
+
+@http_step('I click update cart')
+async def click_update_cart(context):
+    changes = dict(context['cart_changes'])
+    fields = [(f'itemquantity{item_id}', changes.get(f'itemquantity{item_id}', quantity))
+              for item_id, quantity in context['cart_items']]
+    fields.extend(change for change in context['cart_changes'] if change[0] == 'removefromcart')
+    fields.append(('updatecart', 'Update shopping cart'))
+    html = await submit_cart_form(context, fields)
+    context['cart_changes'] = []
+    context['previous_cart_items'], context['cart_items'] = context['cart_items'], html_parsing.cart_item_quantities(html)
+
+
+@http_step('the cart should reflect the updated quantity')
+async def verify_updated_quantity(context):
+    assert context['cart_items'], "No items in cart"
+    quantity = context['cart_items'][0][1]
+    assert quantity == context['updated_quantity'], f"Expected quantity {context['updated_quantity']}, got {quantity}"
+
+
+@http_step('the item should be removed from my cart')
+async def verify_item_removed(context):
+    assert len(context['cart_items']) < len(context['previous_cart_items']), "Item was not removed from the cart"
+
+
+@http_step('I click continue shopping')
+async def click_continue_shopping(context):
+    await submit_cart_form(context, [('continueshopping', 'Continue shopping')])
+
+
+# Performance budgets
+
+@http_step(parsers.parse('the "{page}" page {metric} should be under {budget:d} ms'))
+async def verify_page_response_budget(context, page, metric, budget):
+    # Without a browser there are no paint or DOM events; the page response time is the closest measure
+    elapsed = context['page'].elapsed_ms
+    assert elapsed < budget, f"{page} page response took {elapsed:.0f} ms, budget is {budget} ms"
@@ -0,0 +1,110 @@
+"""
+Thread-safe metrics shared by the load generators
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+from utils.stats import percentile
+
+
+class LoadMetrics:
+    """Collects step latencies and journey outcomes of a load run"""
+
+    PERCENTILES = (('p50', 0.50), ('p90', 0.90), ('p95', 0.95), ('p99', 0.99))
+
+    def __init__(self):
+        self.steps = {}
+        self.journeys = {}
+        self.errors = {}
+        self.started = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record_step(self, name, elapsed_ms, ok=True):
+        """Record one step execution"""
+        with self._lock:
+            samples, failures = self.steps.setdefault(name, ([], [0]))
+            samples.append(elapsed_ms)
+            if not ok:
+                failures[0] += 1
+
+    def record_journey(self, name, elapsed_ms, ok=True, error=None):
+        """Record one completed or failed journey"""
+        with self._lock:
+            samples, failures = self.journeys.setdefault(name, ([], [0]))
+            samples.append(elapsed_ms)
+            if not ok:
+                failures[0] += 1
+                message = (error or 'unknown error').splitlines()[0][:200]
+                self.errors[message] = self.errors.get(message, 0) + 1
+
+    def stop(self):
+        """Mark the end of the measured period"""
+        self.finished = time.time()
+
+    @property
+    def elapsed(self):
+        """Seconds covered by the run"""
+        return (self.finished or time.time()) - self.started
+
+    def _summarize(self, samples, failures):
+        summary = {
+            'count': len(samples),
+            'errors': failures,
+            'error_rate': round(failures / len(samples), 4) if samples else 0.0,
+        }
+        for label, fraction in self.PERCENTILES:
+            value = percentile(samples, fraction)
+            summary[f'{label}_ms'] = round(value, 1) if value is not None else None
+        return summary
+
+    def summary(self):
+        """Return the run summary as a dict"""
+        with self._lock:
+            journeys = {name: self._summarize(samples, failures[0])
+                        for name, (samples, failures) in self.journeys.items()}
+            steps = {name: self._summarize(samples, failures[0])
+                     for name, (samples, failures) in self.steps.items()}
+            errors = dict(sorted(self.errors.items(), key=lambda item: -item[1]))
+
+        total = sum(journey['count'] for journey in journeys.values())
+        failed = sum(journey['errors'] for journey in journeys.values())
+        minutes = self.elapsed / 60
+        return {
+            'duration_s': round(self.elapsed, 1),
+            'journeys': total,
+            'failed_journeys': failed,
+            'error_rate': round(failed / total, 4) if total else 0.0,
+            'journeys_per_minute': round((total - failed) / minutes, 2) if minutes else 0.0,
+            'journey_stats': journeys,
+            'step_stats': steps,
+            'errors': errors,
+        }
+
+    def write_json(self, output_path):
+        """Write the run summary to a JSON file"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print_summary(self):
+        """Print throughput, error rate and per-step latency percentiles"""
+        summary = self.summary()
+        print(f"\nDuration: {summary['duration_s']} s, journeys: {summary['journeys']}, "
+              f"failed: {summary['failed_journeys']} ({summary['error_rate']:.1%}), "
+              f"throughput: {summary['journeys_per_minute']} journeys/min")
+
+        for title, stats in (('journey', summary['journey_stats']), ('step', summary['step_stats'])):
+            print(f"\n{title:<60} {'count':>6} {'err %':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8}")
+            for name, row in stats.items():
+                label = name if len(name) <= 60 else name[:57] + '...'
+                print(f"{label:<60} {row['count']:>6} {row['error_rate'] * 100:>6.1f} "
+                      f"{row['p50_ms']:>8} {row['p90_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+        if summary['errors']:
+            print("\nErrors:")
+            for message, count in summary['errors'].items():
+                print(f"  {count:>5} x {message}")
@@ -0,0 +1,8 @@
+"""
+Local stand-in webshop package initialization
+"""
+from .server import LocalShopServer
+
+__all__ = [
+    'LocalShopServer'
+]
@@ -0,0 +1,25 @@
+"""
+Run the local stand-in webshop: python -m local_shop [--port 5080]
+"""
+import argparse
+from local_shop import LocalShopServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the local stand-in demo web shop")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5080)
+    args = parser.parse_args()
+    
+    server = LocalShopServer(args.host, args.port)
+    print(f"Local shop serving at {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
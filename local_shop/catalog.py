@@ -0,0 +1,100 @@
+"""
+Product catalog served by the local stand-in webshop
+"""
+
+# (slug, name, parent slug)
+CATEGORIES = [
+    ('books', 'Books', None),
+    ('computers', 'Computers', None),
+    ('desktops', 'Desktops', 'computers'),
+    ('notebooks', 'Notebooks', 'computers'),
+    ('accessories', 'Accessories', 'computers'),
+    ('electronics', 'Electronics', None),
+    ('camera-photo', 'Camera, photo', 'electronics'),
+    ('cell-phones', 'Cell phones', 'electronics'),
+    ('apparel-shoes', 'Apparel & Shoes', None),
+    ('digital-downloads', 'Digital downloads', None),
+    ('jewelry', 'Jewelry', None),
+    ('gift-cards', 'Gift Cards', None),
+]
+
+# (id, slug, name, sku, price, category slug, short description)
+_PRODUCTS = [
+    (13, 'computing-and-internet', 'Computing and Internet', 'CI_1', 10.00, 'books',
+     'More Than 100 tips about computing and internet.'),
+    (22, 'health', 'Health Book', 'HB_1', 10.00, 'books', 'Worried about your health? Get the book!'),
+    (45, 'fiction', 'Fiction', 'FIC_1', 24.00, 'books', 'Fiction book for the long evenings.'),
+    (46, 'science', 'Science', 'SCI_1', 51.00, 'books', 'Science book for curious minds.'),
+    (47, 'history-book', 'History Book', 'HIS_1', 18.00, 'books', 'A short history of almost everything.'),
+    (48, 'cookbook', 'Family Cookbook', 'COOK_1', 14.00, 'books', 'Recipes for every day of the week.'),
+    (72, 'build-your-cheap-own-computer', 'Build your own cheap computer', 'BYCC_1', 800.00, 'desktops',
+     'Build it yourself and save.'),
+    (16, 'build-your-own-computer', 'Build your own computer', 'BYOC_1', 1200.00, 'desktops',
+     'Build it the way you want.'),
+    (74, 'build-your-own-expensive-computer', 'Build your own expensive computer', 'BYEC_1', 1800.00,
+     'desktops', 'Build it with the best parts.'),
+    (75, 'simple-computer', 'Simple Computer', 'SC_1', 800.00, 'desktops', 'A simple computer for everyday use.'),
+    (3, 'desktop-pc-with-cdrw', 'Desktop PC with CDRW', 'DPC_1', 500.00, 'desktops',
+     'Desktop computer with CD-RW drive.'),
+    (31, '141-inch-laptop', '14.1-inch Laptop', 'LP_1', 1590.00, 'notebooks', 'Unique Asian-influenced imprint.'),
+    (76, 'gaming-laptop', 'Gaming Laptop', 'LP_2', 2100.00, 'notebooks', 'A laptop built for games.'),
+    (77, 'ultrabook-laptop', 'Ultrabook Laptop', 'LP_3', 1350.00, 'notebooks', 'Thin and light laptop.'),
+    (78, 'laptop-sleeve', 'Laptop Sleeve', 'ACC_1', 25.00, 'accessories', 'Protective sleeve for 14-inch laptops.'),
+    (79, 'computer-mouse', 'Wireless Computer Mouse', 'ACC_2', 19.00, 'accessories', 'Ergonomic wireless mouse.'),
+    (80, 'computer-keyboard', 'Computer Keyboard', 'ACC_3', 35.00, 'accessories', 'Full size keyboard.'),
+    (19, 'camcorder', 'Camcorder', 'CAM_1', 349.00, 'camera-photo', 'Record your life in full HD.'),
+    (81, 'digital-slr-camera', 'Digital SLR Camera', 'CAM_2', 670.00, 'camera-photo', 'Capture every moment.'),
+    (82, 'compact-camcorder', 'Compact Camcorder', 'CAM_3', 199.00, 'camera-photo', 'Pocket sized camcorder.'),
+    (43, 'smartphone', 'Smartphone', 'CP_1', 100.00, 'cell-phones', 'A smart phone for everyone.'),
+    (83, 'phone-cover', 'Phone Cover', 'CP_2', 10.00, 'cell-phones', 'Keeps your phone safe.'),
+    (5, '50s-rockabilly-polka-dot-top-jr-plus-size', '50\'s Rockabilly Polka Dot Top JR Plus Size', 'AS_1',
+     11.00, 'apparel-shoes', 'Polka dot top.'),
+    (28, 'blue-and-green-sneaker', 'Blue and green Sneaker', 'AS_2', 11.00, 'apparel-shoes',
+     'Comfortable sneakers.'),
+    (53, '3rd-album', '3rd Album', 'DD_1', 1.00, 'digital-downloads', 'Third album, digital download.'),
+    (40, 'music-2', 'Music 2', 'DD_2', 10.00, 'digital-downloads', 'Music, digital download.'),
+    (14, 'black-white-diamond-heart', 'Black & White Diamond Heart Jewelry', 'JW_1', 130.00, 'jewelry',
+     'Heart shaped diamond pendant.'),
+    (71, 'vintage-style-engagement-ring', 'Vintage Style Engagement Ring Jewelry', 'JW_2', 2100.00, 'jewelry',
+     'Three stone diamond engagement ring.'),
+    (84, 'jewelry-gift-box', 'Jewelry Gift Box', 'JW_3', 45.00, 'jewelry', 'A box for your jewelry.'),
+    (2, '25-virtual-gift-card', '$25 Virtual Gift Card', 'GC_1', 25.00, 'gift-cards', 'A $25 virtual gift card.'),
+    (4, '50-physical-gift-card', '$50 Physical Gift Card', 'GC_2', 50.00, 'gift-cards', 'A $50 gift card.'),
+]
+
+PRODUCTS = [
+    {
+        'id': product_id,
+        'slug': slug,
+        'name': name,
+        'sku': sku,
+        'price': price,
+        'category': category,
+        'short_description': short_description,
+        'full_description': f"{short_description} {name} is available in the demo web shop.",
+    }
+    for product_id, slug, name, sku, price, category, short_description in _PRODUCTS
+]
+
+PRODUCTS_BY_ID = {product['id']: product for product in PRODUCTS}
+PRODUCTS_BY_SLUG = {product['slug']: product for product in PRODUCTS}
+CATEGORIES_BY_SLUG = {slug: (name, parent) for slug, name, parent in CATEGORIES}
+
+
+def subcategories(category_slug):
+    """Return the slugs of the direct subcategories of a category"""
+    return [slug for slug, _, parent in CATEGORIES if parent == category_slug]
+
+
+def products_in_category(category_slug):
+    """Return the products listed directly in a category"""
+    return [product for product in PRODUCTS if product['category'] == category_slug]
+
+
+def search(term):
+    """Return the products whose name or short description contains the term"""
+    term = term.strip().lower()
+    if len(term) < 3:
+        return []
+    return [product for product in PRODUCTS
+            if term in product['name'].lower() or term in product['short_description'].lower()]
@@ -0,0 +1,586 @@
+"""
+Hermetic local stand-in for the demo web shop
+
+Serves the pages the page objects touch with the same DOM ids and classes
+as https://demowebshop.tricentis.com/, keeping carts and sessions in memory.
+"""
+import json
+import secrets
+import threading
+from html import escape
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from config import config
+from local_shop import catalog
+
+
+GUEST_COOKIE = 'Nop.customer'
+AUTH_COOKIE = 'NOPCOMMERCE.AUTH'
+PAGE_SIZES = (4, 8, 12)
+DEFAULT_PAGE_SIZE = 8
+SORT_OPTIONS = [
+    ('0', 'Position'),
+    ('5', 'Name: A to Z'),
+    ('6', 'Name: Z to A'),
+    ('10', 'Price: Low to High'),
+    ('11', 'Price: High to Low'),
+    ('15', 'Created on'),
+]
+
+# 1x1 transparent PNG served for every product picture
+PIXEL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+
+SCRIPT = """
+var AjaxCart = {
+    post: function (url, form) {
+        var body = form ? new URLSearchParams(new FormData(document.querySelector(form))) : null;
+        return fetch(url, {method: 'POST', body: body, credentials: 'same-origin',
+                           headers: {'X-Requested-With': 'XMLHttpRequest'}})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                if (data.redirect) { window.location.href = data.redirect; return; }
+                if (data.updatetopcartsectionhtml) {
+                    document.querySelector('.cart-qty').textContent = data.updatetopcartsectionhtml;
+                }
+                displayBarNotification(data.message, data.success ? 'success' : 'error', 1500);
+            });
+    },
+    addproducttocart_details: function (url, form) { return this.post(url, form); },
+    addproducttocart_catalog: function (url) { return this.post(url, null); }
+};
+function displayBarNotification(message, type, timeout) {
+    var bar = document.getElementById('bar-notification');
+    bar.className = 'bar-notification ' + type;
+    bar.querySelector('.content').innerHTML = message;
+    bar.style.display = 'block';
+    clearTimeout(bar.hideTimer);
+    if (timeout > 0) { bar.hideTimer = setTimeout(function () { bar.style.display = 'none'; }, timeout); }
+}
+function setLocation(url) { window.location.href = url; }
+"""
+
+
+class ShopState:
+    """In-memory customers, carts and login sessions"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.guest_carts = {}
+        self.account_carts = {}
+        self.sessions = {}
+        self.accounts = {}
+        self._next_item_id = 1
+
+    def account_for(self, auth_token):
+        """Return the email of the account logged in with the token"""
+        return self.sessions.get(auth_token)
+
+    def cart_for(self, guest_id, email):
+        """Return the cart of a logged-in account or of a guest"""
+        if email:
+            return self.account_carts.setdefault(email, [])
+        return self.guest_carts.setdefault(guest_id, [])
+
+    def add_to_cart(self, cart, product_id, quantity):
+        """Add a product to a cart, merging with an existing row"""
+        with self.lock:
+            for item in cart:
+                if item['product_id'] == product_id:
+                    item['quantity'] += quantity
+                    return item
+            item = {'id': self._next_item_id, 'product_id': product_id, 'quantity': quantity}
+            self._next_item_id += 1
+            cart.append(item)
+            return item
+
+    def check_credentials(self, email, password):
+        """Check login credentials against the configured test account and registered accounts"""
+        if email and email == config.test_email and password == config.test_password:
+            return True
+        return bool(email) and self.accounts.get(email) == password
+
+    def login(self, email, guest_id):
+        """Create a login session, move the guest cart into the account and return the token"""
+        token = secrets.token_hex(16)
+        guest_cart = self.guest_carts.pop(guest_id, [])
+        account_cart = self.cart_for(None, email)
+        for item in guest_cart:
+            self.add_to_cart(account_cart, item['product_id'], item['quantity'])
+        with self.lock:
+            self.sessions[token] = email
+        return token
+
+
+def cart_quantity(cart):
+    """Total number of items in a cart"""
+    return sum(item['quantity'] for item in cart)
+
+
+def format_price(price):
+    """Format a price the way the shop does"""
+    return f"{price:.2f}"
+
+
+class LocalShopHandler(BaseHTTPRequestHandler):
+    """Request handler for the stand-in shop"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+    server_version = 'LocalShop/1.0'
+
+    # Routing
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        self.form = {}
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode('utf-8') if length else ''
+            self.form = {key: values for key, values in parse_qs(body, keep_blank_values=True).items()}
+        self._load_session()
+
+        path = parsed.path.rstrip('/') or '/'
+        parts = path.strip('/').split('/')
+
+        if path == '/':
+            return self._page('Demo Web Shop', self._home_body())
+        if path == '/login':
+            return self._login_post() if method == 'POST' else self._page('Login', self._login_body())
+        if path == '/logout':
+            self.set_cookies[AUTH_COOKIE] = ''
+            return self._redirect('/')
+        if path == '/register':
+            return self._page('Register', self._register_body())
+        if path == '/search':
+            return self._page('Search', self._search_body())
+        if path == '/cart':
+            return self._cart_post() if method == 'POST' else self._page('Shopping Cart', self._cart_body())
+        if path == '/passwordrecovery':
+            return self._page('Password Recovery', '<div class="page password-recovery-page"></div>')
+        if path == '/customer/info':
+            return self._page('My account', '<div class="page account-page"></div>')
+        if path.startswith('/content/images/'):
+            return self._send(200, PIXEL_PNG, 'image/png')
+        if path == '/favicon.ico':
+            return self._send(204, b'', 'image/x-icon')
+        if method == 'POST' and parts[0] == 'addproducttocart' and len(parts) >= 4:
+            return self._add_to_cart(parts)
+        if parts[0] in catalog.CATEGORIES_BY_SLUG and len(parts) == 1:
+            return self._page(catalog.CATEGORIES_BY_SLUG[parts[0]][0], self._category_body(parts[0]))
+        if parts[0] in catalog.PRODUCTS_BY_SLUG and len(parts) == 1:
+            product = catalog.PRODUCTS_BY_SLUG[parts[0]]
+            return self._page(product['name'], self._product_body(product))
+        return self._page('Page not found', '<div class="page-title"><h1>Page not found</h1></div>', status=404)
+
+    # Session handling
+
+    def _load_session(self):
+        cookies = SimpleCookie(self.headers.get('Cookie', ''))
+        self.set_cookies = {}
+        guest = cookies.get(GUEST_COOKIE)
+        self.guest_id = guest.value if guest else None
+        if not self.guest_id:
+            self.guest_id = secrets.token_hex(16)
+            self.set_cookies[GUEST_COOKIE] = self.guest_id
+        auth = cookies.get(AUTH_COOKIE)
+        self.email = self.server.state.account_for(auth.value) if auth else None
+        self.cart = self.server.state.cart_for(self.guest_id, self.email)
+
+    # Responses
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache' if content_type.startswith('text/html') else 'max-age=3600')
+        for name, value in self.set_cookies.items():
+            expiry = '; Max-Age=0' if value == '' else ''
+            self.send_header('Set-Cookie', f"{name}={value}; Path=/; HttpOnly{expiry}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location):
+        self._send(302, b'', 'text/html; charset=utf-8', {'Location': location})
+
+    def _json(self, data):
+        self._send(200, json.dumps(data).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def _page(self, title, body, status=200):
+        self._send(status, self._layout(title, body).encode('utf-8'), 'text/html; charset=utf-8')
+
+    def log_message(self, format, *args):
+        """Keep test output clean"""
+
+    # Layout
+
+    def _layout(self, title, body):
+        if self.email:
+            account_links = (
+                f'<li><a href="/customer/info" class="account">{escape(self.email)}</a></li>'
+                '<li><a href="/logout" class="ico-logout">Log out</a></li>'
+            )
+        else:
+            account_links = (
+                '<li><a href="/register" class="ico-register">Register</a></li>'
+                '<li><a href="/login" class="ico-login">Log in</a></li>'
+            )
+        menu = ''.join(
+            f'<li><a href="/{slug}">{escape(name)}</a></li>'
+            for slug, name, parent in catalog.CATEGORIES if parent is None
+        )
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"/><title>Demo Web Shop. {escape(title)}</title>
+<script>{SCRIPT}</script></head>
+<body><div class="master-wrapper-page"><div class="master-wrapper-content">
+<div id="bar-notification" class="bar-notification" style="display:none">
+<span class="close" title="Close" onclick="this.parentNode.style.display='none'">&nbsp;</span><p class="content"></p></div>
+<div class="header">
+<div class="header-logo"><a href="/"><img title="" alt="Tricentis Demo Web Shop" src="/content/images/logo.png"/></a></div>
+<div class="header-links-wrapper"><div class="header-links"><ul>{account_links}
+<li id="topcartlink"><a href="/cart" class="ico-cart"><span class="cart-label">Shopping cart</span>
+<span class="cart-qty">({cart_quantity(self.cart)})</span></a></li></ul></div></div>
+<div class="search-box"><form action="/search" id="small-search-box-form" method="get">
+<input type="text" class="search-box-text" id="small-searchterms" autocomplete="off" value="Search store"
+ name="q" placeholder="Search store" onfocus="if(this.value=='Search store')this.value=''"/>
+<input type="submit" class="button-1 search-box-button" value="Search"/></form></div>
+</div>
+<div class="header-menu"><ul class="top-menu">{menu}</ul></div>
+<div class="master-wrapper-main"><div class="center-2">{body}</div></div>
+<div class="footer"><div class="footer-menu-wrapper"><div class="column my-account"><ul>
+<li><a href="/customer/info">My account</a></li><li><a href="/cart">Shopping cart</a></li></ul></div></div></div>
+</div></div></body></html>"""
+
+    @staticmethod
+    def _token_input():
+        return f'<input name="__RequestVerificationToken" type="hidden" value="{secrets.token_urlsafe(24)}"/>'
+
+    # Pages
+
+    def _home_body(self):
+        featured = catalog.PRODUCTS[:6]
+        return (
+            '<div class="page home-page"><div class="page-body">'
+            '<div class="topic-html-content"><div class="topic-html-content-title">'
+            '<h2 class="topic-html-content-header">Welcome to our store</h2></div></div>'
+            f'<div class="product-grid home-page-product-grid">{self._product_items(featured)}</div>'
+            '</div></div>'
+        )
+
+    def _login_body(self, errors=None, email=''):
+        error_html = ''
+        if errors:
+            items = ''.join(f'<li>{escape(error)}</li>' for error in errors)
+            error_html = (
+                '<div class="message-error"><div class="validation-summary-errors">'
+                '<span>Login was unsuccessful. Please correct the errors and try again.</span>'
+                f'<ul>{items}</ul></div></div>'
+            )
+        return f"""<div class="page login-page"><div class="page-title"><h1>Welcome, Please Sign In!</h1></div>
+<div class="page-body"><div class="customer-blocks">
+<div class="new-wrapper register-block"><div class="title"><strong>New Customer</strong></div>
+<div class="buttons"><input type="button" class="button-1 register-button" onclick="location.href='/register'"
+ value="Register"/></div></div>
+<div class="returning-wrapper"><div class="title"><strong>Returning Customer</strong></div>
+<form action="/login" method="post">{self._token_input()}{error_html}
+<div class="form-fields">
+<div class="inputs"><label for="Email">Email:</label>
+<input autofocus="autofocus" class="email" id="Email" name="Email" type="text" value="{escape(email)}"/></div>
+<div class="inputs"><label for="Password">Password:</label>
+<input class="password" id="Password" name="Password" type="password"/></div>
+<div class="inputs reversed"><input id="RememberMe" name="RememberMe" type="checkbox" value="true"/>
+<input name="RememberMe" type="hidden" value="false"/><label for="RememberMe">Remember me?</label>
+<span class="forgot-password"><a href="/passwordrecovery">Forgot password?</a></span></div>
+</div>
+<div class="buttons"><input class="button-1 login-button" type="submit" value="Log in"/></div>
+</form></div></div></div></div>"""
+
+    def _login_post(self):
+        email = self.form.get('Email', [''])[0].strip()
+        password = self.form.get('Password', [''])[0]
+        state = self.server.state
+        if state.check_credentials(email, password):
+            self.set_cookies[AUTH_COOKIE] = state.login(email, self.guest_id)
+            return self._redirect('/')
+
+        errors = ['No customer account found'] if email else ['Please enter your email']
+        return self._page('Login', self._login_body(errors, email))
+
+    def _register_body(self):
+        return f"""<div class="page registration-page"><div class="page-title"><h1>Register</h1></div>
+<div class="page-body"><form action="/register" method="post">{self._token_input()}
+<div class="inputs"><label for="Email">Email:</label><input id="Email" name="Email" type="text"/></div>
+<div class="inputs"><label for="Password">Password:</label><input id="Password" name="Password" type="password"/></div>
+<div class="buttons"><input type="submit" id="register-button" class="button-1 register-next-step-button"
+ value="Register" name="register-button"/></div></form></div></div>"""
+
+    def _product_items(self, products):
+        items = []
+        for product in products:
+            url = f"/{product['slug']}"
+            items.append(f"""<div class="item-box"><div class="product-item" data-productid="{product['id']}">
+<div class="picture"><a href="{url}" title="Show details for {escape(product['name'])}">
+<img alt="Picture of {escape(product['name'])}" src="/content/images/thumbs/{product['id']}.png"/></a></div>
+<div class="details"><h2 class="product-title"><a href="{url}">{escape(product['name'])}</a></h2>
+<div class="description">{escape(product['short_description'])}</div>
+<div class="add-info"><div class="prices"><span class="price actual-price">{format_price(product['price'])}</span></div>
+<div class="buttons"><input type="button" value="Add to cart" class="button-2 product-box-add-to-cart-button"
+ onclick="AjaxCart.addproducttocart_catalog('/addproducttocart/catalog/{product['id']}/1/1');return false;"/></div>
+</div></div></div></div>""")
+        return ''.join(items)
+
+    def _listing(self, base_path, base_query, products):
+        """Render sorting, page size, product grid and pager for a product list"""
+        order = self.query.get('orderby', '0')
+        products = sort_products(products, order)
+        page_size = int(self.query.get('pagesize') or DEFAULT_PAGE_SIZE)
+        page_size = page_size if page_size in PAGE_SIZES else DEFAULT_PAGE_SIZE
+        page_count = max(1, -(-len(products) // page_size))
+        page_number = min(max(1, int(self.query.get('pagenumber') or 1)), page_count)
+        page_products = products[(page_number - 1) * page_size:page_number * page_size]
+
+        def link(**overrides):
+            query = dict(base_query, orderby=order, pagesize=page_size, pagenumber=page_number)
+            query.update(overrides)
+            return escape(f"{base_path}?{urlencode(query)}")
+
+        sort_options = ''.join(
+            f'<option {"selected " if value == order else ""}value="{link(orderby=value, pagenumber=1)}">{label}</option>'
+            for value, label in SORT_OPTIONS
+        )
+        size_options = ''.join(
+            f'<option {"selected " if size == page_size else ""}value="{link(pagesize=size, pagenumber=1)}">{size}</option>'
+            for size in PAGE_SIZES
+        )
+        pager = ''
+        if page_count > 1:
+            pages = []
+            if page_number > 1:
+                pages.append(f'<li class="first-page"><a href="{link(pagenumber=1)}">First</a></li>')
+                pages.append(f'<li class="previous-page"><a href="{link(pagenumber=page_number - 1)}">Previous</a></li>')
+            for number in range(1, page_count + 1):
+                if number == page_number:
+                    pages.append(f'<li class="current-page"><span>{number}</span></li>')
+                else:
+                    pages.append(f'<li class="individual-page"><a href="{link(pagenumber=number)}">{number}</a></li>')
+            if page_number < page_count:
+                pages.append(f'<li class="next-page"><a href="{link(pagenumber=page_number + 1)}">Next</a></li>')
+                pages.append(f'<li class="last-page"><a href="{link(pagenumber=page_count)}">Last</a></li>')
+            pager = f'<div class="pager"><ul>{"".join(pages)}</ul></div>'
+
+        return f"""<div class="product-selectors">
+<div class="product-viewmode"><span>View as</span>
+<a class="viewmode-icon grid grid-view" href="{link(viewmode='grid')}">Grid</a>
+<a class="viewmode-icon list list-view" href="{link(viewmode='list')}">List</a></div>
+<div class="product-sorting"><span>Sort by</span>
+<select id="products-orderby" name="products-orderby" onchange="setLocation(this.value);">{sort_options}</select></div>
+<div class="product-page-size"><span>Display</span>
+<select id="products-pagesize" name="products-pagesize" onchange="setLocation(this.value);">{size_options}</select>
+<span>per page</span></div></div>
+<div class="product-grid">{self._product_items(page_products)}</div>{pager}"""
+
+    def _search_body(self):
+        term = self.query.get('q', '')
+        results = ''
+        if 'q' in self.query:
+            products = catalog.search(term)
+            if products:
+                results = self._listing('/search', {'q': term}, products)
+            elif len(term.strip()) < 3:
+                results = '<strong class="warning">Search term minimum length is 3 characters</strong>'
+            else:
+                results = '<strong class="result no-result">No products were found that matched your criteria.</strong>'
+        return f"""<div class="page search-page"><div class="page-title"><h1>Search</h1></div>
+<div class="page-body"><div class="search-input"><form action="/search" method="get">
+<input class="search-text" id="Q" name="q" type="text" value="{escape(term)}"/>
+<input type="submit" class="button-1 search-button" value="Search"/></form></div>
+<span class="search-term">{escape(term)}</span>
+<div class="search-results">{results}</div></div></div>"""
+
+    def _category_body(self, slug):
+        name, _ = catalog.CATEGORIES_BY_SLUG[slug]
+        sub_items = ''.join(
+            f'<div class="item-box"><div class="sub-category-item"><h2 class="title">'
+            f'<a href="/{sub}" title="Show products in category {escape(catalog.CATEGORIES_BY_SLUG[sub][0])}">'
+            f'{escape(catalog.CATEGORIES_BY_SLUG[sub][0])}</a></h2></div></div>'
+            for sub in catalog.subcategories(slug)
+        )
+        products = catalog.products_in_category(slug)
+        listing = self._listing(f'/{slug}', {}, products) if products else ''
+        sub_grid = f'<div class="sub-category-grid">{sub_items}</div>' if sub_items else ''
+        return f"""<div class="page category-page"><div class="page-title"><h1>{escape(name)}</h1></div>
+<div class="page-body">{sub_grid}{listing}</div></div>"""
+
+    def _product_body(self, product):
+        product_id = product['id']
+        return f"""<div class="page product-details-page"><div class="page-body">
+<form action="/{product['slug']}" id="product-details-form" method="post">
+<div class="product-essential">
+<div class="gallery"><div class="picture">
+<img alt="Picture of {escape(product['name'])}" src="/content/images/thumbs/{product_id}.png"
+ title="Picture of {escape(product['name'])}" id="main-product-img-{product_id}"/></div></div>
+<div class="overview">
+<div class="product-name"><h1 itemprop="name">{escape(product['name'])}</h1></div>
+<div class="short-description">{escape(product['short_description'])}</div>
+<div class="additional-details"><div class="sku"><span class="label">SKU:</span>
+<span class="value">{escape(product['sku'])}</span></div></div>
+<div class="product-price"><span itemprop="price" class="price-value-{product_id}">{format_price(product['price'])}</span></div>
+<div class="add-to-cart"><div class="add-to-cart-panel">
+<label class="qty-label" for="addtocart_{product_id}_EnteredQuantity">Qty:</label>
+<input class="qty-input" id="addtocart_{product_id}_EnteredQuantity" name="addtocart_{product_id}.EnteredQuantity"
+ type="text" value="1"/>
+<input type="button" id="add-to-cart-button-{product_id}" class="button-1 add-to-cart-button" value="Add to cart"
+ data-productid="{product_id}"
+ onclick="AjaxCart.addproducttocart_details('/addproducttocart/details/{product_id}/1', '#product-details-form');return false;"/>
+</div></div></div>
+<div class="full-description" itemprop="description">{escape(product['full_description'])}</div>
+</div>
+<div class="product-collateral"><div class="product-review-box">
+<a class="write-product-review-button" href="/productreviews/{product_id}">Add your review</a></div></div>
+</form></div></div>"""
+
+    def _add_to_cart(self, parts):
+        try:
+            product_id = int(parts[2])
+        except ValueError:
+            return self._json({'success': False, 'message': 'Invalid product'})
+        product = catalog.PRODUCTS_BY_ID.get(product_id)
+        if product is None:
+            return self._json({'success': False, 'message': 'No product found with the specified ID'})
+
+        if parts[1] == 'catalog':
+            quantity = int(parts[4]) if len(parts) > 4 and parts[4].isdigit() else 1
+        else:
+            entered = self.form.get(f'addtocart_{product_id}.EnteredQuantity', ['1'])[0].strip()
+            if not entered.isdigit() or int(entered) < 1:
+                return self._json({'success': False, 'message': ['Quantity should be positive']})
+            quantity = int(entered)
+
+        self.server.state.add_to_cart(self.cart, product_id, quantity)
+        return self._json({
+            'success': True,
+            'message': 'The product has been added to your <a href="/cart">shopping cart</a>',
+            'updatetopcartsectionhtml': f"({cart_quantity(self.cart)})",
+            'updateflyoutcartsectionhtml': '',
+        })
+
+    def _cart_body(self):
+        if not self.cart:
+            return ('<div class="page shopping-cart-page"><div class="page-title"><h1>Shopping cart</h1></div>'
+                    '<div class="page-body"><div class="order-summary-content">'
+                    'Your Shopping Cart is empty!</div></div></div>')
+
+        rows = []
+        total = 0.0
+        for item in self.cart:
+            product = catalog.PRODUCTS_BY_ID[item['product_id']]
+            subtotal = product['price'] * item['quantity']
+            total += subtotal
+            rows.append(f"""<tr class="cart-item-row">
+<td class="remove-from-cart"><input type="checkbox" name="removefromcart" value="{item['id']}"/></td>
+<td class="product-picture"><img alt="Picture of {escape(product['name'])}" src="/content/images/thumbs/{product['id']}.png"/></td>
+<td class="product"><a href="/{product['slug']}" class="product-name">{escape(product['name'])}</a></td>
+<td class="unit-price nobr"><span class="product-unit-price">{format_price(product['price'])}</span></td>
+<td class="qty nobr"><input name="itemquantity{item['id']}" type="text" value="{item['quantity']}" class="qty-input"/></td>
+<td class="subtotal nobr end"><span class="product-subtotal">{format_price(subtotal)}</span></td></tr>""")
+
+        return f"""<div class="page shopping-cart-page"><div class="page-title"><h1>Shopping cart</h1></div>
+<div class="page-body"><div class="order-summary-content">
+<form action="/cart" method="post">{self._token_input()}
+<table class="cart"><thead><tr><th>Remove</th><th>Image</th><th>Product(s)</th><th>Price</th><th>Qty.</th>
+<th>Total</th></tr></thead><tbody>{''.join(rows)}</tbody></table>
+<div class="common-buttons">
+<input type="submit" name="updatecart" value="Update shopping cart" class="button-2 update-cart-button"/>
+<input type="submit" name="continueshopping" value="Continue shopping" class="button-2 continue-shopping-button"/>
+</div>
+<div class="cart-footer"><div class="totals"><div class="total-info"><table class="cart-total"><tbody>
+<tr><td class="cart-total-left"><span class="nobr">Sub-Total:</span></td>
+<td class="cart-total-right"><span class="nobr"><span class="value-summary">{format_price(total)}</span></span></td></tr>
+<tr><td class="cart-total-left"><span class="nobr">Total:</span></td>
+<td class="cart-total-right"><span class="nobr"><span class="product-price order-total"><strong>{format_price(total)}</strong></span></span></td></tr>
+</tbody></table></div>
+<div class="terms-of-service"><input id="termsofservice" type="checkbox" name="termsofservice"/>
+<label for="termsofservice">I agree with the terms of service</label></div>
+<div class="checkout-buttons"><button type="submit" id="checkout" name="checkout" value="checkout"
+ class="button-1 checkout-button">Checkout</button></div></div></div>
+</form></div></div></div>"""
+
+    def _cart_post(self):
+        if 'continueshopping' in self.form:
+            return self._redirect('/')
+        if 'checkout' in self.form:
+            return self._redirect('/login' if not self.email else '/cart')
+
+        removed = {int(value) for value in self.form.get('removefromcart', []) if value.isdigit()}
+        with self.server.state.lock:
+            for item in list(self.cart):
+                quantity = self.form.get(f"itemquantity{item['id']}", [''])[0].strip()
+                if item['id'] in removed or quantity == '0':
+                    self.cart.remove(item)
+                elif quantity.isdigit():
+                    item['quantity'] = int(quantity)
+        return self._redirect('/cart')
+
+
+def sort_products(products, order):
+    """Sort products by one of the shop's sort options"""
+    if order == '5':
+        return sorted(products, key=lambda product: product['name'].lower())
+    if order == '6':
+        return sorted(products, key=lambda product: product['name'].lower(), reverse=True)
+    if order == '10':
+        return sorted(products, key=lambda product: product['price'])
+    if order == '11':
+        return sorted(products, key=lambda product: product['price'], reverse=True)
+    if order == '15':
+        return sorted(products, key=lambda product: product['id'], reverse=True)
+    return list(products)
+
+
+class LocalShopHTTPServer(ThreadingHTTPServer):
+    """Threading server with a listen backlog sized for load runs"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class LocalShopServer:
+    """Runs the stand-in shop on a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = LocalShopHTTPServer((host, port), LocalShopHandler)
+        self.httpd.state = ShopState()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the running server"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Start serving in a daemon thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='local-shop', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
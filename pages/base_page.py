@@ -4,9 +4,48 @@ Base page class for all page objects
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from utils.helpers import WaitHelper, ElementHelper, ScreenshotHelper
+from utils.page_performance import page_performance
+from utils.site_health import circuit_breaker
 from config import config
 
 
+# Resolves a Selenium (by, value) locator in the page
+FIND_ELEMENT_JS = """
+const find = ([by, value]) => {
+    switch (by) {
+        case 'id': return document.getElementById(value);
+        case 'name': return document.getElementsByName(value)[0] || null;
+        case 'xpath': return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        case 'link text': return Array.from(document.links).find(a => a.textContent.trim() === value) || null;
+        default: return document.querySelector(value);
+    }
+};
+"""
+
+# Sets values, toggles checkboxes and clicks in one call. Values go through the native
+# setter and fire input/change events so page scripts see them as if they were typed.
+FORM_ACTION_SCRIPT = FIND_ELEMENT_JS + """
+const [fields, checkboxes, submit] = arguments;
+const missing = [...fields, ...checkboxes].map(([locator]) => locator).concat(submit ? [submit] : [])
+    .filter(locator => !find(locator));
+if (missing.length) return missing;
+for (const [locator, value] of fields) {
+    const element = find(locator);
+    const prototype = element instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    element.focus();
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, value);
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+for (const [locator, checked] of checkboxes) {
+    const element = find(locator);
+    if (element.checked !== checked) element.click();
+}
+if (submit) find(submit).click();
+return [];
+"""
+
+
 class BasePage:
     """Base page class with common functionality"""
     
@@ -19,7 +58,9 @@ class BasePage:
     def navigate_to(self, url):
         """Navigate to a specific URL"""
         full_url = f"{self.base_url.rstrip('/')}/{url.lstrip('/')}" if not url.startswith('http') else url
+        circuit_breaker.check()
         self.driver.get(full_url)
+        self.capture_navigation_timing()
     
     def get_current_url(self):
         """Get current page URL"""
@@ -48,6 +89,11 @@ class BasePage:
     def wait_for_page_load(self):
         """Wait for page to load completely"""
         self.wait_helper.wait_for_element_present((By.TAG_NAME, "body"))
+        self.capture_navigation_timing()
+    
+    def capture_navigation_timing(self, force=False):
+        """Record Navigation Timing of the current page when monitoring is enabled"""
+        return page_performance.capture(self.driver, force)
     
     def select_dropdown_by_text(self, locator, text):
         """Select dropdown option by visible text"""
@@ -72,4 +118,22 @@ class BasePage:
             element = self.driver.find_element(*locator)
             return element.is_displayed()
         except:
-            return False
\ No newline at end of file
+            return False
+    
+    def fill_form(self, fields, checkboxes=None, submit=None):
+        """Set field values, toggle checkboxes and optionally click submit in a single round trip
+        
+        fields maps locators to values and checkboxes maps locators to the wanted
+        checked state. Returns the locators that were not found; nothing is
+        changed in that case.
+        """
+        origin = page_performance.document_origin(self.driver) if submit else None
+        missing = self.driver.execute_script(
+            FORM_ACTION_SCRIPT,
+            [[list(locator), value] for locator, value in fields.items()],
+            [[list(locator), checked] for locator, checked in (checkboxes or {}).items()],
+            list(submit) if submit else None,
+        )
+        if not missing and submit:
+            page_performance.capture_navigation(self.driver, origin)
+        return [tuple(locator) for locator in missing]
@@ -1,6 +1,7 @@
 """
 Home page object
 """
+from urllib.parse import urlencode
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
 
@@ -36,6 +37,10 @@ class HomePage(BasePage):
         self.element_helper.send_keys_safe(self.SEARCH_BOX, search_term)
         self.element_helper.click_element_safe(self.SEARCH_BUTTON)
     
+    def open_search_results(self, search_term):
+        """Open the search results for a term by URL, without using the search box"""
+        self.navigate_to(f"search?{urlencode({'q': search_term})}")
+    
     def click_login_link(self):
         """Click on login link"""
         self.element_helper.click_element_safe(self.LOGIN_LINK)
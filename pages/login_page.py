@@ -2,7 +2,11 @@
 Login page object
 """
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from pages.base_page import BasePage
+from config import config
 
 
 class LoginPage(BasePage):
@@ -19,9 +23,11 @@ class LoginPage(BasePage):
     # Error messages
     ERROR_MESSAGE = (By.CSS_SELECTOR, ".message-error")
     VALIDATION_SUMMARY = (By.CSS_SELECTOR, ".validation-summary-errors")
+    FIELD_VALIDATION_ERROR = (By.CSS_SELECTOR, ".field-validation-error")
     
     # Success indicators
     SUCCESS_MESSAGE = (By.CSS_SELECTOR, ".message-success")
+    LOGOUT_LINK = (By.LINK_TEXT, "Log out")
     
     def navigate_to_login(self):
         """Navigate to login page"""
@@ -52,15 +58,79 @@ class LoginPage(BasePage):
         """Click register link"""
         self.element_helper.click_element_safe(self.REGISTER_LINK)
     
-    def login(self, email, password, remember_me=False):
-        """Perform complete login process"""
+    def login(self, email, password, remember_me=False, typed=None):
+        """Perform complete login process
+        
+        Types into the fields and clicks like a user does. typed=False (or
+        BATCHED_FORM_FILL=true when typed is not given) fills and submits the
+        form in one round trip instead.
+        """
+        if typed is None:
+            typed = not config.batched_form_fill
+        if config.form_parity_check:
+            self.check_form_parity(email, password, remember_me)
+        
+        if typed or self.fill_credentials(email, password, remember_me, submit=True):
+            self.type_credentials(email, password, remember_me)
+            self.click_login_button()
+    
+    def type_credentials(self, email, password, remember_me=False):
+        """Type credentials into the login form"""
         self.enter_email(email)
         self.enter_password(password)
         
         if remember_me:
             self.click_remember_me()
+    
+    def fill_credentials(self, email, password, remember_me=False, submit=False):
+        """Fill (and optionally submit) the login form in one round trip; returns missing locators"""
+        return self.fill_form(
+            {self.EMAIL_INPUT: email, self.PASSWORD_INPUT: password},
+            checkboxes={self.REMEMBER_ME_CHECKBOX: remember_me},
+            submit=self.LOGIN_BUTTON if submit else None,
+        )
+    
+    def check_form_parity(self, email, password, remember_me=False):
+        """Submit the form by typing and in one round trip and compare the outcomes
+        
+        Each submission starts from a fresh login page and is followed by a logout
+        when it logged in, so the page is left as it was found.
+        """
+        login_url = self.get_current_url()
         
+        self.type_credentials(email, password, remember_me)
         self.click_login_button()
+        typed_outcome = self.get_submission_outcome()
+        self._return_to_login(login_url, typed_outcome)
+        
+        missing = self.fill_credentials(email, password, remember_me, submit=True)
+        assert not missing, f"Batched form fill could not find: {missing}"
+        batched_outcome = self.get_submission_outcome()
+        self._return_to_login(login_url, batched_outcome)
+        
+        assert typed_outcome == batched_outcome, \
+            f"Batched login differs from typing: typed {typed_outcome}, batched {batched_outcome}"
+    
+    def get_submission_outcome(self):
+        """Wait for the result of a submit and return whether it logged in and the messages shown"""
+        messages = [self.ERROR_MESSAGE, self.VALIDATION_SUMMARY, self.FIELD_VALIDATION_ERROR]
+        try:
+            WebDriverWait(self.driver, config.explicit_wait).until(EC.any_of(
+                *(EC.visibility_of_element_located(locator) for locator in [self.LOGOUT_LINK] + messages)))
+        except TimeoutException:
+            pass
+        return {
+            'logged_in': self.is_element_displayed(self.LOGOUT_LINK),
+            'messages': [element.text for locator in messages
+                         for element in self.driver.find_elements(*locator) if element.is_displayed()],
+        }
+    
+    def _return_to_login(self, login_url, outcome):
+        """Log out after a successful submit and open a fresh login page"""
+        if outcome['logged_in']:
+            self.navigate_to("logout")
+        # A new navigation rather than a reload, which could restore the entered values
+        self.navigate_to(login_url)
     
     def get_error_message(self):
         """Get error message text"""
@@ -3,6 +3,8 @@ Product details page object
 """
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
+from utils.cdp_events import capture_json_response
+from config import config
 
 
 class ProductDetailsPage(BasePage):
@@ -30,6 +32,10 @@ class ProductDetailsPage(BasePage):
     REVIEWS_SECTION = (By.CSS_SELECTOR, ".product-review-box")
     REVIEW_BUTTON = (By.CSS_SELECTOR, ".write-product-review-button")
     
+    def open_product(self, slug):
+        """Open a product page by its URL slug"""
+        self.navigate_to(slug)
+    
     def get_product_name(self):
         """Get product name"""
         return self.element_helper.get_text_safe(self.PRODUCT_NAME)
@@ -67,14 +73,18 @@ class ProductDetailsPage(BasePage):
         return 1
     
     def click_add_to_cart(self):
-        """Click add to cart button"""
-        self.element_helper.click_element_safe(self.ADD_TO_CART_BUTTON)
+        """Click add to cart and return the shop's JSON response, or None when network events are unavailable"""
+        return capture_json_response(
+            self.driver, "/addproducttocart/",
+            lambda: self.element_helper.click_element_safe(self.ADD_TO_CART_BUTTON),
+            timeout=config.explicit_wait,
+        )
     
     def add_to_cart_with_quantity(self, quantity=1):
         """Add product to cart with specified quantity"""
         if quantity > 1:
             self.set_quantity(quantity)
-        self.click_add_to_cart()
+        return self.click_add_to_cart()
     
     def get_success_message(self):
         """Get success message after adding to cart"""
@@ -1,8 +1,19 @@
 """
 Search results page object
 """
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urljoin
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select
 from pages.base_page import BasePage
+from utils import html_parsing
+from utils.browser_http import browser_session
+from utils.page_performance import page_performance
+from config import config
+
+
+ProductCard = namedtuple('ProductCard', ['product_id', 'title', 'url', 'price', 'page'])
 
 
 class SearchResultsPage(BasePage):
@@ -70,7 +81,9 @@ class SearchResultsPage(BasePage):
         try:
             product_titles = self.driver.find_elements(*self.PRODUCT_TITLES)
             if 0 <= index < len(product_titles):
+                origin = page_performance.document_origin(self.driver)
                 product_titles[index].click()
+                page_performance.capture_navigation(self.driver, origin)
                 return True
             return False
         except:
@@ -82,7 +95,9 @@ class SearchResultsPage(BasePage):
             product_titles = self.driver.find_elements(*self.PRODUCT_TITLES)
             for product in product_titles:
                 if title.lower() in product.text.lower():
+                    origin = page_performance.document_origin(self.driver)
                     product.click()
+                    page_performance.capture_navigation(self.driver, origin)
                     return True
             return False
         except:
@@ -200,4 +215,62 @@ class SearchResultsPage(BasePage):
                 }
             return None
         except:
-            return None
\ No newline at end of file
+            return None
+    
+    def maximize_page_size(self):
+        """Switch the listing to the largest page size it offers"""
+        dropdowns = self.driver.find_elements(*self.PAGE_SIZE_DROPDOWN)
+        if not dropdowns:
+            return False
+        sizes = [(int(option.text), option.get_attribute('value'), option.is_selected())
+                 for option in Select(dropdowns[0]).options if option.text.strip().isdigit()]
+        if not sizes:
+            return False
+        _, url, selected = max(sizes)
+        if not selected:
+            self.navigate_to(url)
+        return True
+    
+    def iter_all_results(self, search_term=None, workers=4):
+        """Yield a ProductCard for every result across all pages
+        
+        The first page is read from the browser after maximizing the page size;
+        the remaining pages are fetched concurrently over HTTP with the browser's
+        cookies and yielded in page order as they arrive.
+        """
+        if search_term is not None:
+            self.navigate_to(f"search?{urlencode({'q': search_term})}")
+        self.maximize_page_size()
+        
+        html = self.driver.page_source
+        current_url = self.driver.current_url
+        yield from self._cards(html, current_url, 1)
+        
+        pages = html_parsing.page_count(html)
+        if pages < 2:
+            return
+        
+        urls = [html_parsing.page_url(current_url, number) for number in range(2, pages + 1)]
+        
+        session = browser_session(self.driver)
+        
+        def fetch(url):
+            response = session.get(url, timeout=config.page_load_timeout)
+            response.raise_for_status()
+            return response.text
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(fetch, url) for url in urls]
+            for number, future in enumerate(futures, start=2):
+                yield from self._cards(future.result(), current_url, number)
+        finally:
+            # A consumer that stops early cancels the queued pages instead of waiting for them
+            executor.shutdown(wait=False, cancel_futures=True)
+            session.close()
+    
+    @staticmethod
+    def _cards(html, page_url, page_number):
+        for item in html_parsing.product_items(html):
+            url = urljoin(page_url, item['url']) if item['url'] else None
+            yield ProductCard(item['id'], item['title'], url, html_parsing.parse_price(item['price']), page_number)
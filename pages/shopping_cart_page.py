@@ -1,8 +1,12 @@
 """
 Shopping cart page object
 """
+from urllib.parse import urljoin, urlsplit
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
+from utils import html_parsing
+from utils.browser_http import browser_session
+from config import config
 
 
 class ShoppingCartPage(BasePage):
@@ -31,6 +35,10 @@ class ShoppingCartPage(BasePage):
     # Terms and conditions
     TERMS_CHECKBOX = (By.ID, "termsofservice")
     
+    # Cookies identifying the guest customer and the logged-in account
+    GUEST_COOKIE = "Nop.customer"
+    AUTH_COOKIE = "NOPCOMMERCE.AUTH"
+    
     def navigate_to_cart(self):
         """Navigate to shopping cart page"""
         self.navigate_to("cart")
@@ -90,6 +98,35 @@ class ShoppingCartPage(BasePage):
             return True
         return False
     
+    def reset_cart(self):
+        """Empty the cart without driving the cart page
+        
+        A guest cart is dropped with the guest cookie, so the shop starts a new
+        guest. A logged-in cart is stored with the account and is emptied with a
+        single form post to /cart marking every row removed. Returns False if the
+        cart could not be emptied this way.
+        """
+        if urlsplit(self.get_current_url()).netloc != urlsplit(self.base_url).netloc:
+            # Cookies can only be changed while on the shop's domain
+            self.navigate_to("")
+        
+        if self.driver.get_cookie(self.AUTH_COOKIE) is None:
+            self.driver.delete_cookie(self.GUEST_COOKIE)
+            return True
+        
+        cart_url = urljoin(self.base_url, "cart")
+        with browser_session(self.driver) as session:
+            html = session.get(cart_url, timeout=config.page_load_timeout).text
+            item_ids = html_parsing.cart_item_ids(html)
+            if not item_ids:
+                return True
+            form = [('__RequestVerificationToken', html_parsing.verification_token(html) or '')]
+            form += [(f'itemquantity{item_id}', quantity) for item_id, quantity in html_parsing.cart_item_quantities(html)]
+            form += [('removefromcart', item_id) for item_id in item_ids]
+            form.append(('updatecart', 'Update shopping cart'))
+            response = session.post(cart_url, data=form, timeout=config.page_load_timeout)
+            return response.ok and not html_parsing.cart_item_ids(response.text)
+    
     def get_cart_total(self):
         """Get cart total amount"""
         try:
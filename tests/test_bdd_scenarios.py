@@ -11,6 +11,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from features.steps.login_steps import *
 from features.steps.shopping_steps import *
+from features.steps.performance_steps import *
 
 # Load all scenarios from feature files
 scenarios('../features/login.feature')
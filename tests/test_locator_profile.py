@@ -0,0 +1,24 @@
+"""
+Locator cost profile of every page object (runs only with --locator-profile)
+"""
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.locator_profiler import LocatorProfiler, page_setups
+
+
+@pytest.mark.locator_profile
+@pytest.mark.parametrize('page_class, setup', page_setups(), ids=[page_class.__name__ for page_class, _ in page_setups()])
+def test_locator_cost(request, driver, page_class, setup):
+    """Profile a page object's locators and fail on any above the cost threshold"""
+    results = LocatorProfiler(request.config.getoption('locator_repetitions')).profile_page(driver, page_class, setup)
+    request.node.user_properties.extend(('locator_profile', result) for result in results)
+    
+    threshold = request.config.getoption('locator_cost_threshold')
+    if threshold is not None:
+        slow = LocatorProfiler.over_threshold(results, threshold)
+        assert not slow, "Locators over {:g} us: {}".format(threshold, ", ".join(
+            f"{result['name']} {result['cost_us']:.1f} us" for result in slow))
@@ -1,12 +1,13 @@
 """
 Utils package initialization
 """
-from .driver_manager import WebDriverFactory, WebDriverManager
+from .driver_manager import WebDriverFactory, WebDriverManager, DriverPool
 from .helpers import WaitHelper, ScreenshotHelper, TestDataHelper, ElementHelper
 
 __all__ = [
     'WebDriverFactory',
     'WebDriverManager', 
+    'DriverPool',
     'WaitHelper',
     'ScreenshotHelper',
     'TestDataHelper',
@@ -0,0 +1,206 @@
+"""
+Step definition registry for running scenarios outside the pytest runner
+
+Also validates feature files against the step definitions without a browser:
+
+    python -m utils.bdd_steps              # features bound in tests/test_bdd_scenarios.py
+    pytest tests/ --dry-run-steps          # the same check on the collected scenarios
+"""
+import ast
+import importlib
+import inspect
+import re
+import sys
+import time
+from pathlib import Path
+
+from pytest_bdd import parsers
+from pytest_bdd.parser import parse_feature
+
+
+FEATURES_DIR = Path(__file__).resolve().parent.parent / 'features'
+
+SCENARIO_RUNNER = Path(__file__).resolve().parent.parent / 'tests' / 'test_bdd_scenarios.py'
+
+# Typed parse fields such as {budget:d}
+TYPED_FIELD_PATTERN = re.compile(r'\{(\w+):([^{}]+)\}')
+
+STEP_MODULES = (
+    'features.steps.login_steps',
+    'features.steps.shopping_steps',
+    'features.steps.performance_steps',
+)
+
+
+class StepNotFoundError(Exception):
+    """Raised when no step definition matches a step"""
+
+
+def load_scenarios(feature_paths):
+    """Parse feature files and return their scenarios, with outlines expanded per example"""
+    scenarios = []
+    for feature_path in feature_paths:
+        path = Path(feature_path)
+        if not path.is_absolute() and not path.exists():
+            path = FEATURES_DIR / path
+        feature = parse_feature(str(path.parent), path.name)
+        for template in feature.scenarios.values():
+            if template.templated:
+                scenarios.extend(template.render(context) for context in template.examples.as_contexts())
+            else:
+                scenarios.append(template.render({}))
+    return scenarios
+
+
+def bound_feature_paths(runner=SCENARIO_RUNNER):
+    """Return the feature files a test module binds with scenarios(...), without importing it"""
+    runner = Path(runner)
+    paths = []
+    for node in ast.walk(ast.parse(runner.read_text(encoding='utf-8'))):
+        if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'scenarios':
+            paths.extend(str((runner.parent / arg.value).resolve()) for arg in node.args
+                         if isinstance(arg, ast.Constant) and isinstance(arg.value, str))
+    return paths
+
+
+class StepRegistry:
+    """Step definitions collected from the step modules, matched like pytest-bdd does"""
+
+    def __init__(self, modules=STEP_MODULES):
+        self.definitions = []
+        for module_name in modules:
+            module = importlib.import_module(module_name)
+            for attribute, value in vars(module).items():
+                context = getattr(value, '_pytest_bdd_step_context', None)
+                if context is not None:
+                    self.definitions.append((module_name, attribute, context))
+
+    def matches(self, step):
+        """Return every step definition matching a step"""
+        return [definition for definition in self.definitions
+                if definition[2].type in (None, step.type) and definition[2].parser.is_matching(step.name)]
+
+    def find(self, step):
+        """Return the step function context for a step"""
+        matches = self.matches(step)
+        if not matches:
+            raise StepNotFoundError(f"Step definition is not found: {step.keyword} \"{step.name}\"")
+        return matches[0][2]
+
+    @staticmethod
+    def arguments(context, step):
+        """Parse and convert the step arguments"""
+        parsed = context.parser.parse_arguments(step.name) or {}
+        return {name: context.converters.get(name, lambda value: value)(value) for name, value in parsed.items()}
+
+    def run(self, step, browser_context):
+        """Execute a step with a browser context dict"""
+        context = self.find(step)
+        kwargs = self.arguments(context, step)
+        if 'browser_context' in inspect.signature(context.step_func).parameters:
+            kwargs['browser_context'] = browser_context
+        return context.step_func(**kwargs)
+
+    @staticmethod
+    def describe(definition):
+        """Return module.function for a step definition"""
+        module_name, attribute, context = definition
+        return f"{module_name}.{context.step_func.__name__}"
+
+    def mistyped_arguments(self, step):
+        """Describe the typed parse fields a step would match with if its argument values converted
+
+        parsers.parse('... {budget:d} ms') does not match '... abc ms' at all; matching again with the
+        format specs removed tells a bad argument value apart from a step with no definition.
+        """
+        for definition in self.definitions:
+            context = definition[2]
+            if context.type not in (None, step.type) or not isinstance(context.parser, parsers.parse):
+                continue
+            typed = dict(TYPED_FIELD_PATTERN.findall(context.parser.name))
+            if not typed:
+                continue
+            loose = parsers.parse(TYPED_FIELD_PATTERN.sub(r'{\1}', context.parser.name))
+            if loose.is_matching(step.name):
+                values = loose.parse_arguments(step.name)
+                fields = ", ".join(f"{name}={values[name]!r} is not '{spec}'" for name, spec in typed.items())
+                return f"{fields} in {self.describe(definition)}"
+        return None
+
+    def validate(self, scenarios):
+        """Resolve every step of the scenarios and return the problems found
+
+        The result maps 'unmatched', 'ambiguous' and 'conversion_errors' to
+        (location, step, detail) tuples and 'unused' to definitions no step matched.
+        """
+        result = {'unmatched': [], 'ambiguous': [], 'conversion_errors': [], 'unused': []}
+        used = set()
+        seen = set()
+        for scenario in scenarios:
+            path = Path(scenario.feature.filename)
+            if path.is_relative_to(FEATURES_DIR.parent):
+                path = path.relative_to(FEATURES_DIR.parent)
+            for step in scenario.steps:
+                location = f"{path}:{step.line_number}"
+                key = (location, step.type, step.name)
+                if key in seen:
+                    continue
+                seen.add(key)
+                text = f"{step.keyword} {step.name}"
+                matches = self.matches(step)
+                used.update(id(definition[2]) for definition in matches)
+                if not matches:
+                    mistyped = self.mistyped_arguments(step)
+                    if mistyped:
+                        result['conversion_errors'].append((location, text, mistyped))
+                    else:
+                        result['unmatched'].append((location, text, None))
+                    continue
+                if len(matches) > 1:
+                    result['ambiguous'].append((location, text, ", ".join(map(self.describe, matches))))
+                try:
+                    self.arguments(matches[0][2], step)
+                except Exception as e:
+                    result['conversion_errors'].append((location, text, f"{type(e).__name__}: {e}"))
+        result['unused'] = [definition for definition in self.definitions if id(definition[2]) not in used]
+        result['steps'] = len(seen)
+        return result
+
+    @classmethod
+    def format_validation(cls, result):
+        """Return report lines for a validation result"""
+        lines = []
+        for title, key in (("Unmatched steps", 'unmatched'), ("Ambiguous steps", 'ambiguous'),
+                           ("Argument conversion errors", 'conversion_errors')):
+            if result[key]:
+                lines.append(f"{title}:")
+                lines.extend(f"  {location}: {text}" + (f"  ({detail})" if detail else "")
+                             for location, text, detail in result[key])
+        if result['unused']:
+            lines.append("Unused step definitions:")
+            lines.extend(f"  {cls.describe(definition)}: {definition[2].type} \"{definition[2].parser.name}\""
+                         for definition in result['unused'])
+        problems = sum(len(result[key]) for key in ('unmatched', 'ambiguous', 'conversion_errors'))
+        lines.append(f"{result['steps']} steps checked: {problems} problems, {len(result['unused'])} unused definitions")
+        return lines
+
+    @staticmethod
+    def has_errors(result):
+        """Check whether a validation result would fail a run"""
+        return bool(result['unmatched'] or result['ambiguous'] or result['conversion_errors'])
+
+
+def main(argv=None):
+    """Validate feature files against the step definitions; exits 1 on unmatched, ambiguous or bad arguments"""
+    start = time.perf_counter()
+    feature_paths = (argv if argv is not None else sys.argv[1:]) or bound_feature_paths()
+    registry = StepRegistry()
+    result = registry.validate(load_scenarios(feature_paths))
+    for line in registry.format_validation(result):
+        print(line)
+    print(f"Validated {len(feature_paths)} feature files in {time.perf_counter() - start:.2f} s")
+    return 1 if registry.has_errors(result) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
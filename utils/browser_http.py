@@ -0,0 +1,32 @@
+"""
+Plain HTTP access to the shop with the browser's identity
+"""
+import requests
+
+from config import config
+
+
+def shop_session():
+    """Return a requests session that reaches the shop the way the browser does
+
+    In record/replay mode the session goes through the cassette proxy.
+    """
+    session = requests.Session()
+    if config.http_cassette_mode != 'off':
+        proxy = f"http://127.0.0.1:{config.cassette_proxy_port}"
+        session.proxies = {'http': proxy, 'https': proxy}
+    return session
+
+
+def browser_session(driver):
+    """Return a shop session carrying the browser's cookies and user agent
+
+    Requests made with it are seen by the shop as coming from the same customer,
+    so pages can be fetched without driving the browser.
+    """
+    session = shop_session()
+    session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent;")
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                            path=cookie.get('path', '/'))
+    return session
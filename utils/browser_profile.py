@@ -0,0 +1,183 @@
+"""
+Pre-baked Chrome profile template with a warm HTTP cache
+
+A user-data-dir is built once per machine and shop: Chrome is started on it,
+the shop's main pages are loaded so their CSS, JS and images land in the disk
+cache, and first-run initialisation is done. Every session then starts on a
+throwaway clone of the template (in /dev/shm when available, copy-on-write
+where the filesystem supports it) and shares a per-worker --disk-cache-dir
+seeded from the template, so a cold browser starts with a warm cache.
+"""
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+
+# Pages loaded into the template so their static assets are cached
+WARMUP_PAGES = ('', 'login', 'search?q=computer', 'books', 'cart')
+
+# Files Chrome leaves in a user-data-dir that must not be shared between sessions
+SINGLETON_FILES = ('SingletonLock', 'SingletonCookie', 'SingletonSocket')
+
+
+def _clone_tree(source, target):
+    """Copy a directory, sharing blocks with the source where the filesystem supports reflinks"""
+    if shutil.which('cp') and os.name == 'posix':
+        result = subprocess.run(['cp', '-a', '--reflink=auto', str(source), str(target)], capture_output=True)
+        if result.returncode == 0:
+            return
+        shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(source, target, symlinks=True)
+
+
+class ProfileTemplate:
+    """Builds the warmed Chrome profile template and hands out per-session clones"""
+
+    def __init__(self, root=None):
+        self.root = root
+        self._clones = set()
+        self._shared_cache_in_use = False
+        self._lock = threading.Lock()
+        atexit.register(self._remove_clones)
+
+    @property
+    def enabled(self):
+        """Whether sessions should start from the template (not for the in-process local shop)"""
+        return config.chrome_profile_template and config.environment != 'local'
+
+    @property
+    def directory(self):
+        """Template and cache directory of the current shop"""
+        host = urlsplit(config.base_url).netloc.replace(':', '_') or 'shop'
+        return Path(self.root or config.chrome_profile_dir) / host
+
+    @property
+    def template_dir(self):
+        """The warmed user-data-dir"""
+        return self.directory / 'template'
+
+    def _fresh(self):
+        """Check whether the template exists and is younger than its TTL"""
+        try:
+            age = time.time() - (self.template_dir / 'First Run').stat().st_mtime
+        except OSError:
+            return False
+        return age < config.chrome_profile_ttl_hours * 3600
+
+    def ensure_template(self):
+        """Build the template unless a fresh one exists; one process builds while the others wait"""
+        if self._fresh():
+            return self.template_dir
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / 'template.lock', 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if not self._fresh():
+                self._build()
+        return self.template_dir
+
+    def _build(self):
+        """Warm a new user-data-dir on the shop's pages and swap it in as the template"""
+        from utils.driver_manager import WebDriverFactory
+
+        build_dir = Path(tempfile.mkdtemp(prefix='template-build-', dir=self.directory))
+        driver = WebDriverFactory._create_chrome_driver(True, user_data_dir=build_dir)
+        try:
+            driver.set_page_load_timeout(config.page_load_timeout)
+            for page in WARMUP_PAGES:
+                try:
+                    driver.get(urljoin(config.base_url, page))
+                except Exception:
+                    # A page that fails to load only leaves its assets uncached
+                    pass
+        finally:
+            # Quitting flushes the disk cache index
+            driver.quit()
+
+        for name in SINGLETON_FILES:
+            (build_dir / name).unlink(missing_ok=True)
+        (build_dir / 'First Run').touch()
+        old_dir = self.directory / f'template-old-{os.getpid()}'
+        if self.template_dir.exists():
+            os.replace(self.template_dir, old_dir)
+        os.replace(build_dir, self.template_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        # Worker caches were seeded from the previous template
+        for cache_dir in self.directory.glob('cache-*'):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def _clone_root(self):
+        """Directory for session clones: tmpfs when available"""
+        shm = Path('/dev/shm')
+        return shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+
+    def session_dirs(self):
+        """Return (user_data_dir, disk_cache_dir) for a new session
+
+        disk_cache_dir is the worker's shared cache, or None while another session of
+        this process holds it (Chrome cannot share a cache between running browsers);
+        such sessions use the warm cache inside their own clone.
+        """
+        template_dir = self.ensure_template()
+        clone_dir = Path(tempfile.mkdtemp(prefix='chrome-session-', dir=self._clone_root()))
+        clone_dir.rmdir()
+        _clone_tree(template_dir, clone_dir)
+        with self._lock:
+            self._clones.add(clone_dir)
+            shared = not self._shared_cache_in_use
+            if shared:
+                self._shared_cache_in_use = True
+        if not shared:
+            return clone_dir, None
+
+        worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+        cache_dir = self.directory / f'cache-{worker}'
+        # Chrome keeps the cache of --disk-cache-dir=X in X/<profile>/Cache
+        seed = template_dir / 'Default' / 'Cache'
+        if not cache_dir.exists() and seed.is_dir():
+            (cache_dir / 'Default').mkdir(parents=True)
+            _clone_tree(seed, cache_dir / 'Default' / 'Cache')
+        return clone_dir, cache_dir
+
+    def attach(self, driver, user_data_dir, disk_cache_dir):
+        """Remove the session's clone (and free the shared cache) when the driver quits"""
+        quit_driver = driver.quit
+
+        def quit():
+            try:
+                quit_driver()
+            finally:
+                self.release(user_data_dir, disk_cache_dir)
+
+        driver.quit = quit
+        return driver
+
+    def release(self, user_data_dir, disk_cache_dir):
+        """Delete a session clone"""
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        with self._lock:
+            self._clones.discard(user_data_dir)
+            if disk_cache_dir is not None:
+                self._shared_cache_in_use = False
+
+    def _remove_clones(self):
+        """Delete clones of sessions that were never quit"""
+        for clone_dir in list(self._clones):
+            shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+# Global profile template instance
+profile_template = ProfileTemplate()
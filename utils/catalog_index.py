@@ -0,0 +1,171 @@
+"""
+On-disk index of the shop's product catalog
+
+The Books, Computers and Electronics categories (and their subcategories) are
+crawled once over HTTP; name, SKU, price, URL slug and product id of every
+product are stored as JSON per shop host and reused until the index is older
+than its TTL. Steps use it to deep-link to products instead of searching and
+clicking the first result.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from config import config
+from utils import html_parsing
+from utils.browser_http import shop_session
+
+
+# Root categories linked from the home page (HomePage.BOOKS_CATEGORY, COMPUTERS_CATEGORY, ELECTRONICS_CATEGORY)
+ROOT_CATEGORIES = ('books', 'computers', 'electronics')
+
+
+class CatalogIndex:
+    """Product catalog crawled from the shop and cached on disk"""
+
+    def __init__(self, base_url=None, index_dir=None, ttl_hours=None, workers=8):
+        self.shop_url = base_url
+        self.index_dir = index_dir
+        self.ttl_hours = ttl_hours
+        self.workers = workers
+        self._products = None
+        self._base_url = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """Shop the index belongs to, config.base_url unless one was given"""
+        return self.shop_url or config.base_url
+
+    @property
+    def path(self):
+        """Index file of the current shop host and port"""
+        parts = urlsplit(self.base_url)
+        name = f"{parts.hostname}_{parts.port}" if parts.port else (parts.hostname or 'shop')
+        return Path(self.index_dir or config.catalog_index_dir) / f"{name}.json"
+
+    @property
+    def products(self):
+        """Indexed products, loaded or crawled on first use"""
+        with self._lock:
+            if self._products is None or self._base_url != self.base_url:
+                self._base_url = self.base_url
+                self._products = self._load()
+                if self._products is None:
+                    self._products = self.refresh()
+            return self._products
+
+    def _load(self):
+        """Return the stored products if the index exists, belongs to this shop and is fresh"""
+        ttl_hours = config.catalog_index_ttl_hours if self.ttl_hours is None else self.ttl_hours
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('base_url') != self.base_url:
+            # Another shop (e.g. a stand-in that got the same port earlier) wrote this file
+            return None
+        if time.time() - data.get('created', 0) > ttl_hours * 3600:
+            return None
+        return data['products']
+
+    def refresh(self):
+        """Crawl the catalog and store the index"""
+        products = self.crawl()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel workers may crawl at the same time; replace the file atomically
+        temp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'base_url': self.base_url, 'created': time.time(), 'products': products}, f, indent=2)
+        os.replace(temp_path, self.path)
+        self._products = products
+        return products
+
+    def crawl(self):
+        """Return every product listed under the root categories"""
+        session = shop_session()
+        found = {}
+
+        def get(url):
+            response = session.get(url, timeout=config.page_load_timeout)
+            response.raise_for_status()
+            return response.text
+
+        with session, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = [(urljoin(self.base_url, slug), [slug]) for slug in ROOT_CATEGORIES]
+            while pending:
+                pages = list(executor.map(lambda item: self._category_pages(get, item[0]), pending))
+                next_pending = []
+                for (url, path), category_pages in zip(pending, pages):
+                    for href in html_parsing.subcategory_links(category_pages[0]):
+                        slug = urlsplit(href).path.strip('/')
+                        next_pending.append((urljoin(self.base_url, slug), path + [slug]))
+                    for html in category_pages:
+                        for item in html_parsing.product_items(html):
+                            found.setdefault(item['id'], dict(item, categories=path))
+                pending = next_pending
+
+            products = list(found.values())
+            details = executor.map(lambda item: get(urljoin(self.base_url, item['url'])), products)
+            return [
+                {
+                    'id': item['id'],
+                    'name': html_parsing.product_name(html) or item['title'],
+                    'sku': html_parsing.product_sku(html),
+                    'price': html_parsing.parse_price(item['price']),
+                    'slug': urlsplit(item['url']).path.strip('/'),
+                    'category': item['categories'][-1],
+                    'categories': item['categories'],
+                }
+                for item, html in zip(products, details)
+            ]
+
+    @staticmethod
+    def _category_pages(get, url):
+        """Fetch every listing page of a category at its largest page size"""
+        html = get(url)
+        sizes = [(int(text), value) for text, value, _ in html_parsing.select_options(html, 'products-pagesize')
+                 if text.isdigit()]
+        if sizes:
+            url = urljoin(url, max(sizes)[1])
+            html = get(url)
+        return [html] + [get(html_parsing.page_url(url, number))
+                         for number in range(2, html_parsing.page_count(html) + 1)]
+
+    def find(self, name):
+        """Return the product with a name, falling back to the first whose name contains it"""
+        name = name.lower()
+        for product in self.products:
+            if product['name'].lower() == name:
+                return product
+        for product in self.products:
+            if name in product['name'].lower():
+                return product
+        return None
+
+    def by_category(self, category):
+        """Return the products in a category or any of its subcategories"""
+        category = category.lower()
+        return [product for product in self.products if category in product['categories']]
+
+    def in_price_range(self, low=None, high=None, category=None):
+        """Return the products priced within [low, high], cheapest first"""
+        products = self.by_category(category) if category else self.products
+        return sorted(
+            (product for product in products if product['price'] is not None
+             and (low is None or product['price'] >= low) and (high is None or product['price'] <= high)),
+            key=lambda product: product['price'],
+        )
+
+    def product_url(self, product):
+        """Return the product details URL of an indexed product"""
+        return urljoin(self.base_url, product['slug'])
+
+
+# Global catalog index instance
+catalog_index = CatalogIndex()
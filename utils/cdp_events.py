@@ -0,0 +1,140 @@
+"""
+Chrome DevTools Protocol events read from the browser's performance log
+
+Chromium drivers started with performance logging record every DevTools
+Network and Page event of the session. One CdpEventBus per driver reads the
+log and dispatches events to subscribers, so page objects can wait for a
+specific request to finish instead of polling the DOM for its side effects.
+"""
+import base64
+import json
+import threading
+import time
+import weakref
+
+from selenium.common.exceptions import WebDriverException
+
+from config import config
+
+
+# Logging preference capability per Chromium browser
+LOGGING_PREFS_CAPABILITY = {'chrome': 'goog:loggingPrefs', 'MicrosoftEdge': 'ms:loggingPrefs'}
+
+_buses = weakref.WeakKeyDictionary()
+
+
+def performance_logging_enabled():
+    """Whether sessions record DevTools events (network steps, failure screencasts, bundle network logs)"""
+    return (config.cdp_network_events or config.screencast_on_failure
+            or (config.failure_bundle and config.failure_bundle_network))
+
+
+def enable_performance_logging(options, browser_name):
+    """Ask the driver to record DevTools events in the performance log (and console messages for failure bundles)"""
+    prefs = {}
+    if performance_logging_enabled():
+        prefs['performance'] = 'ALL'
+    if config.failure_bundle:
+        prefs['browser'] = 'ALL'
+    if prefs:
+        options.set_capability(LOGGING_PREFS_CAPABILITY[browser_name], prefs)
+
+
+class CdpEventBus:
+    """Dispatches the DevTools events of one browser session to subscribers"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.supported = hasattr(driver, 'execute_cdp_cmd')
+        self._subscribers = {}
+        # The screencast recorder polls from its own thread
+        self._lock = threading.Lock()
+
+    def subscribe(self, method, callback):
+        """Call callback(params) for every event of a DevTools method"""
+        self._subscribers.setdefault(method, []).append(callback)
+
+    def unsubscribe(self, method, callback):
+        """Stop calling a subscribed callback"""
+        callbacks = self._subscribers.get(method, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def poll(self, read_log=None):
+        """Read the events logged since the last poll and dispatch them; returns the number read
+
+        read_log replaces driver.get_log('performance'), e.g. to read over another connection.
+        """
+        with self._lock:
+            try:
+                entries = read_log() if read_log else self.driver.get_log('performance')
+            except (WebDriverException, ValueError):
+                # Not a Chromium session or performance logging is off
+                self.supported = False
+                return 0
+            for entry in entries:
+                message = json.loads(entry['message'])['message']
+                for callback in list(self._subscribers.get(message.get('method'), ())):
+                    callback(message.get('params', {}))
+            return len(entries)
+
+
+def event_bus(driver):
+    """Return the event bus of a driver, or None when DevTools events are not available"""
+    if not performance_logging_enabled():
+        return None
+    bus = _buses.get(driver)
+    if bus is None:
+        bus = _buses[driver] = CdpEventBus(driver)
+    return bus if bus.supported else None
+
+
+def capture_json_response(driver, url_part, action, timeout=10):
+    """Run an action and return the parsed JSON body of the first response whose URL contains url_part
+
+    Returns None when DevTools events are not available, the request failed or
+    did not finish within the timeout; the action has run in every case.
+    """
+    bus = event_bus(driver) if config.cdp_network_events else None
+    if bus is None:
+        action()
+        return None
+
+    request = {}
+
+    def on_response(params):
+        if 'id' not in request and url_part in params['response']['url']:
+            request['id'] = params['requestId']
+
+    def on_done(params):
+        if params['requestId'] == request.get('id'):
+            request['finished'] = 'errorText' not in params
+
+    # Events from earlier actions must not match this one
+    bus.poll()
+    if not bus.supported:
+        action()
+        return None
+
+    subscriptions = [('Network.responseReceived', on_response), ('Network.loadingFinished', on_done),
+                     ('Network.loadingFailed', on_done)]
+    for method, callback in subscriptions:
+        bus.subscribe(method, callback)
+    try:
+        action()
+        deadline = time.monotonic() + timeout
+        while 'finished' not in request and time.monotonic() < deadline:
+            if not bus.poll():
+                time.sleep(0.05)
+    finally:
+        for method, callback in subscriptions:
+            bus.unsubscribe(method, callback)
+
+    if not request.get('finished'):
+        return None
+    try:
+        body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request['id']})
+        text = base64.b64decode(body['body']).decode('utf-8') if body.get('base64Encoded') else body['body']
+        return json.loads(text)
+    except (WebDriverException, ValueError):
+        return None
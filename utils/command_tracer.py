@@ -0,0 +1,157 @@
+"""
+Low-overhead WebDriver command tracer at the RemoteConnection layer
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from selenium.webdriver.remote import utils as remote_utils
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+
+class CommandTracer:
+    """Records every WebDriver command sent through RemoteConnection.execute
+
+    Modes:
+        off      - RemoteConnection is left untouched
+        counters - total and per-command counts and latency
+        trace    - counters plus one ring buffer event per command with
+                   payload and response sizes, exportable as a Chrome trace
+    """
+
+    MODES = ('off', 'counters', 'trace')
+
+    def __init__(self, capacity=100000):
+        self.mode = 'off'
+        self.commands = 0
+        self.total_time = 0.0
+        self.per_command = {}
+        self.capacity = capacity
+        self._buffer = [None] * capacity
+        self._position = 0
+        self._open_span = None
+        self._original_execute = None
+
+    def install(self, mode='counters', capacity=None):
+        """Patch RemoteConnection.execute for the given mode"""
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported command trace mode: {mode}")
+        self.uninstall()
+        if capacity and capacity != self.capacity:
+            self.capacity = capacity
+            self._buffer = [None] * capacity
+            self._position = 0
+        self.mode = mode
+        if mode == 'off':
+            return
+
+        tracer = self
+        original_execute = RemoteConnection.execute
+        tracing = mode == 'trace'
+
+        def execute(connection, command, params):
+            request_bytes = len(remote_utils.dump_json(params)) if tracing else 0
+            start = time.perf_counter()
+            response = None
+            try:
+                response = original_execute(connection, command, params)
+                return response
+            finally:
+                duration = time.perf_counter() - start
+                tracer.commands += 1
+                tracer.total_time += duration
+                stats = tracer.per_command.get(command)
+                if stats is None:
+                    tracer.per_command[command] = [1, duration]
+                else:
+                    stats[0] += 1
+                    stats[1] += duration
+                if tracing:
+                    tracer._append(('command', command, start, duration, request_bytes,
+                                    tracer._response_size(response), threading.get_ident()))
+
+        self._original_execute = original_execute
+        RemoteConnection.execute = execute
+
+    def uninstall(self):
+        """Restore RemoteConnection.execute"""
+        if self._original_execute is not None:
+            RemoteConnection.execute = self._original_execute
+            self._original_execute = None
+        self.mode = 'off'
+
+    @property
+    def tracing(self):
+        """Whether ring buffer events are being recorded"""
+        return self.mode == 'trace'
+
+    def _append(self, event):
+        """Write an event into the ring buffer, overwriting the oldest one"""
+        self._buffer[self._position % self.capacity] = event
+        self._position += 1
+
+    @staticmethod
+    def _response_size(response):
+        """Estimate the response payload size in bytes"""
+        if not isinstance(response, dict):
+            return 0
+        value = response.get('value')
+        if value is None:
+            return 0
+        if isinstance(value, str):
+            return len(value)
+        return len(remote_utils.dump_json(value))
+
+    def start_span(self, name):
+        """Open a named span (e.g. a BDD step) shown alongside the commands"""
+        if self.tracing:
+            self._open_span = (name, time.perf_counter())
+
+    def finish_span(self):
+        """Close the open span"""
+        if self.tracing and self._open_span:
+            name, start = self._open_span
+            self._open_span = None
+            self._append(('span', name, start, time.perf_counter() - start, 0, 0, threading.get_ident()))
+
+    def mark(self):
+        """Return a position marker for events_since"""
+        return self._position
+
+    def events_since(self, mark):
+        """Return the events recorded since the marker that are still in the buffer"""
+        start = max(mark, self._position - self.capacity)
+        return [self._buffer[i % self.capacity] for i in range(start, self._position)]
+
+    @staticmethod
+    def export_chrome_trace(events, output_dir, name):
+        """Write events as a Chrome trace / Perfetto JSON timeline"""
+        pid = os.getpid()
+        trace_events = []
+        for kind, label, start, duration, request_bytes, response_bytes, tid in events:
+            event = {
+                'name': label,
+                'cat': 'webdriver' if kind == 'command' else 'bdd',
+                'ph': 'X',
+                'ts': round(start * 1e6, 1),
+                'dur': round(duration * 1e6, 1),
+                'pid': pid,
+                'tid': tid if kind == 'command' else 0,
+            }
+            if kind == 'command':
+                event['args'] = {'request_bytes': request_bytes, 'response_bytes': response_bytes}
+            trace_events.append(event)
+
+        path = Path(output_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        trace_file = path / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.json"
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        return str(trace_file)
+
+
+# Global command tracer instance
+command_tracer = CommandTracer()
@@ -2,6 +2,8 @@
 WebDriver factory and manager
 """
 import os
+import queue
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.firefox.service import Service as FirefoxService
@@ -12,6 +14,10 @@ from selenium.webdriver.edge.options import Options as EdgeOptions
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.firefox import GeckoDriverManager
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from utils.cdp_events import enable_performance_logging
+from utils.site_health import circuit_breaker
+from utils.browser_profile import profile_template
+from utils.remote_webdriver import create_remote_driver
 from config import config
 
 
@@ -24,12 +30,15 @@ class WebDriverFactory:
         Create and return a WebDriver instance
         
         Args:
-            browser_name (str): Browser name (chrome, firefox, edge)
+            browser_name (str): Browser name (chrome, firefox, edge, remote)
             headless (bool): Whether to run in headless mode
             
         Returns:
             WebDriver: Configured WebDriver instance
         """
+        # Starting a browser against a site that is known to be down only burns time
+        circuit_breaker.check()
+        
         browser = browser_name or config.browser
         is_headless = headless if headless is not None else config.headless
         
@@ -39,12 +48,14 @@ class WebDriverFactory:
             return WebDriverFactory._create_firefox_driver(is_headless)
         elif browser.lower() == 'edge':
             return WebDriverFactory._create_edge_driver(is_headless)
+        elif browser.lower() == 'remote':
+            return WebDriverFactory._create_remote_driver(is_headless)
         else:
             raise ValueError(f"Unsupported browser: {browser}")
     
     @staticmethod
-    def _create_chrome_driver(headless):
-        """Create Chrome WebDriver"""
+    def _chrome_options(headless):
+        """Chrome options shared by local and remote sessions"""
         options = ChromeOptions()
         
         if headless:
@@ -61,6 +72,25 @@ class WebDriverFactory:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
+        WebDriverFactory._add_cassette_proxy_arguments(options)
+        enable_performance_logging(options, 'chrome')
+        return options
+    
+    @staticmethod
+    def _create_chrome_driver(headless, user_data_dir=None):
+        """Create Chrome WebDriver, on a clone of the warmed profile template when it is enabled"""
+        options = WebDriverFactory._chrome_options(headless)
+        disk_cache_dir = None
+        session_profile = user_data_dir is None and profile_template.enabled
+        if session_profile:
+            user_data_dir, disk_cache_dir = profile_template.session_dirs()
+        if user_data_dir is not None:
+            options.add_argument(f'--user-data-dir={user_data_dir}')
+            options.add_argument('--no-first-run')
+            options.add_argument('--no-default-browser-check')
+        if disk_cache_dir is not None:
+            options.add_argument(f'--disk-cache-dir={disk_cache_dir}')
+        
         # Let webdriver-manager handle ChromeDriver installation and path resolution
         chrome_driver_path = ChromeDriverManager().install()
         
@@ -69,14 +99,56 @@ class WebDriverFactory:
             chrome_driver_path = chrome_driver_path.replace('THIRD_PARTY_NOTICES.chromedriver', 'chromedriver')
         
         service = ChromeService(chrome_driver_path)
-        driver = webdriver.Chrome(service=service, options=options)
+        try:
+            driver = webdriver.Chrome(service=service, options=options)
+        except Exception:
+            if session_profile:
+                profile_template.release(user_data_dir, disk_cache_dir)
+            raise
+        if session_profile:
+            profile_template.attach(driver, user_data_dir, disk_cache_dir)
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
         return driver
     
     @staticmethod
-    def _create_firefox_driver(headless):
-        """Create Firefox WebDriver"""
+    def _create_remote_driver(headless):
+        """Create a session on the remote WebDriver endpoint (REMOTE_URL) for REMOTE_BROWSER"""
+        browser = config.remote_browser.lower()
+        if browser == 'chrome':
+            options = WebDriverFactory._chrome_options(headless)
+        elif browser == 'firefox':
+            options = WebDriverFactory._firefox_options(headless)
+        elif browser == 'edge':
+            options = WebDriverFactory._edge_options(headless)
+        else:
+            raise ValueError(f"Unsupported remote browser: {browser}")
+        
+        driver = create_remote_driver(config.remote_url, browser, options)
+        if browser == 'chrome':
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+    
+    @staticmethod
+    def configure_driver(driver):
+        """Configure WebDriver with timeouts"""
+        # Adaptive timeouts only shorten explicit waits if element lookups do not block on their own
+        driver.implicitly_wait(0 if config.adaptive_timeouts else config.implicit_wait)
+        driver.set_page_load_timeout(config.page_load_timeout)
+        driver.maximize_window()
+    
+    @staticmethod
+    def _add_cassette_proxy_arguments(options):
+        """Route Chromium traffic through the record/replay proxy when it is enabled"""
+        if config.http_cassette_mode == 'off':
+            return
+        options.add_argument(f'--proxy-server=http://127.0.0.1:{config.cassette_proxy_port}')
+        # Keep the shop on plain http instead of trying an https upgrade first
+        options.add_argument('--disable-features=HttpsUpgrades')
+    
+    @staticmethod
+    def _firefox_options(headless):
+        """Firefox options shared by local and remote sessions"""
         options = FirefoxOptions()
         
         if headless:
@@ -85,12 +157,23 @@ class WebDriverFactory:
         options.add_argument('--width=1920')
         options.add_argument('--height=1080')
         
+        if config.http_cassette_mode != 'off':
+            options.set_preference('network.proxy.type', 1)
+            options.set_preference('network.proxy.http', '127.0.0.1')
+            options.set_preference('network.proxy.http_port', config.cassette_proxy_port)
+            options.set_preference('dom.security.https_first', False)
+        return options
+    
+    @staticmethod
+    def _create_firefox_driver(headless):
+        """Create Firefox WebDriver"""
+        options = WebDriverFactory._firefox_options(headless)
         service = FirefoxService(GeckoDriverManager().install())
         return webdriver.Firefox(service=service, options=options)
     
     @staticmethod
-    def _create_edge_driver(headless):
-        """Create Edge WebDriver"""
+    def _edge_options(headless):
+        """Edge options shared by local and remote sessions"""
         options = EdgeOptions()
         
         if headless:
@@ -100,10 +183,99 @@ class WebDriverFactory:
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--window-size=1920,1080')
         
+        WebDriverFactory._add_cassette_proxy_arguments(options)
+        enable_performance_logging(options, 'MicrosoftEdge')
+        return options
+    
+    @staticmethod
+    def _create_edge_driver(headless):
+        """Create Edge WebDriver"""
+        options = WebDriverFactory._edge_options(headless)
         service = EdgeService(EdgeChromiumDriverManager().install())
         return webdriver.Edge(service=service, options=options)
 
 
+class DriverPool:
+    """Pool of configured WebDriver sessions that are reset between uses
+    
+    Reset contract: extra windows are closed, cookies and web storage of the
+    current site are cleared and the remaining window is left on about:blank.
+    """
+    
+    def __init__(self, size, browser_name=None, headless=None):
+        self.size = size
+        self.browser_name = browser_name
+        self.headless = headless
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self, timeout=None):
+        """Take an idle session, creating one while the pool is below its size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                driver = WebDriverFactory.create_driver(self.browser_name, self.headless)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            WebDriverFactory.configure_driver(driver)
+            return driver
+        return self._idle.get(timeout=timeout)
+    
+    def release(self, driver, discard=False):
+        """Return a session to the pool, or quit it if it is discarded or cannot be reset"""
+        if not discard:
+            try:
+                self.reset_driver(driver)
+                self._idle.put(driver)
+                return
+            except Exception:
+                pass
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    @staticmethod
+    def reset_driver(driver):
+        """Bring a session back to a clean state according to the reset contract"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if driver.current_url.startswith('http'):
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        driver.get('about:blank')
+    
+    def close(self):
+        """Quit every idle session"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+
+
 class WebDriverManager:
     """Singleton WebDriver manager"""
     
@@ -122,15 +294,28 @@ class WebDriverManager:
             self._configure_driver()
         return self._driver
     
-    def quit_driver(self):
-        """Quit the WebDriver instance"""
-        if self._driver:
+    def quit_driver(self, force=False):
+        """Quit the WebDriver instance; a reusable remote session is only reset unless forced"""
+        if not self._driver:
+            return
+        if not force and self._reuse_session:
+            try:
+                DriverPool.reset_driver(self._driver)
+                return
+            except Exception:
+                # A session that cannot be reset (or expired on the endpoint) is replaced
+                pass
+        try:
             self._driver.quit()
+        finally:
             self._driver = None
     
+    @property
+    def _reuse_session(self):
+        """Whether sessions outlive a scenario: remote sessions are expensive to open"""
+        return config.browser.lower() == 'remote' and config.remote_session_reuse
+    
     def _configure_driver(self):
         """Configure WebDriver with timeouts"""
         if self._driver:
-            self._driver.implicitly_wait(config.implicit_wait)
-            self._driver.set_page_load_timeout(config.page_load_timeout)
-            self._driver.maximize_window()
\ No newline at end of file
+            WebDriverFactory.configure_driver(self._driver)
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Compact failure bundle: DOM, console, network, URL, cookies and screenshot in one archive
+
+When a test fails, the parts are captured in parallel, each over its own
+connection to the session (SessionChannel), and written into a tar.gz as soon
+as they arrive, so no more than one part is held in memory at a time. Parts
+still running when FAILURE_BUNDLE_BUDGET_MS runs out are listed as timed out
+in the bundle's manifest instead of holding up teardown.
+"""
+import base64
+import collections
+import io
+import json
+import re
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from config import config
+from utils.cdp_events import event_bus
+from utils.screencast import SessionChannel
+
+
+class NetworkLog:
+    """The most recent requests of a session, built from DevTools Network events"""
+
+    EVENTS = ('Network.requestWillBeSent', 'Network.responseReceived',
+              'Network.loadingFinished', 'Network.loadingFailed')
+
+    def __init__(self, driver, capacity=None):
+        self.driver = driver
+        self.capacity = capacity or config.failure_bundle_network_entries
+        self.requests = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bus = None
+
+    def start(self):
+        """Subscribe to the session's Network events; returns False when they are not available"""
+        self._bus = event_bus(self.driver)
+        if self._bus is None:
+            return False
+        for method in self.EVENTS:
+            self._bus.subscribe(method, self._on_event)
+        return True
+
+    def stop(self):
+        """Unsubscribe from the session's events"""
+        if self._bus is not None:
+            for method in self.EVENTS:
+                self._bus.unsubscribe(method, self._on_event)
+            self._bus = None
+
+    def _on_event(self, params):
+        """Fold an event into its request record"""
+        with self._lock:
+            request_id = params['requestId']
+            entry = self.requests.get(request_id)
+            if entry is None:
+                if 'request' not in params:
+                    return
+                entry = self.requests[request_id] = {
+                    'method': params['request']['method'],
+                    'url': params['request']['url'],
+                    'type': params.get('type'),
+                    'started': params.get('wallTime'),
+                }
+                while len(self.requests) > self.capacity:
+                    self.requests.popitem(last=False)
+            if 'response' in params:
+                entry['status'] = params['response']['status']
+                entry['mime_type'] = params['response'].get('mimeType')
+            if 'encodedDataLength' in params:
+                entry['bytes'] = params['encodedDataLength']
+            if 'errorText' in params:
+                entry['error'] = params['errorText']
+
+    def entries(self, read_log=None):
+        """Read pending events, then return the recorded requests (oldest first)"""
+        if self._bus is not None:
+            self._bus.poll(read_log)
+        with self._lock:
+            return list(self.requests.values())
+
+
+def redact_cookies(cookies):
+    """Keep cookie names and attributes, replace the values"""
+    return [dict(cookie, value=f"<redacted {len(str(cookie.get('value', '')))} chars>") for cookie in cookies]
+
+
+class FailureBundle:
+    """Captures a failure bundle within a time budget"""
+
+    def __init__(self, output_dir=None, budget_ms=None):
+        self.output_dir = output_dir
+        self.budget_ms = budget_ms
+
+    def _parts(self, driver, screenshot_path, network_log):
+        """Archive member name -> function(channel) returning its bytes"""
+        def dom(channel):
+            return channel.execute('w3cExecuteScript', {
+                'script': 'return document.documentElement.outerHTML', 'args': []}).encode('utf-8')
+
+        def console(channel):
+            return _json(channel.execute('getLog', {'type': 'browser'}))
+
+        def url(channel):
+            return channel.execute('getCurrentUrl', {}).encode('utf-8')
+
+        def cookies(channel):
+            return _json(redact_cookies(channel.execute('getCookies', {})))
+
+        def screenshot(channel):
+            if screenshot_path and Path(screenshot_path).exists():
+                return Path(screenshot_path).read_bytes()
+            return base64.b64decode(channel.execute('screenshot', {}))
+
+        parts = {'dom.html': dom, 'console.json': console, 'url.txt': url,
+                 'cookies.json': cookies, 'screenshot.png': screenshot}
+        if network_log is not None:
+            parts['network.json'] = lambda channel: _json(network_log.entries(channel.get_log))
+        return parts
+
+    def capture(self, driver, name, screenshot_path=None, network_log=None):
+        """Write the failure bundle of a session and return its path"""
+        budget = (config.failure_bundle_budget_ms if self.budget_ms is None else self.budget_ms) / 1000
+        deadline = time.perf_counter() + budget
+        output_dir = Path(self.output_dir or config.failure_bundle_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+        path = output_dir / f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tar.gz"
+
+        parts = self._parts(driver, screenshot_path, network_log)
+        manifest = {'test': name, 'budget_ms': round(budget * 1000), 'parts': {}}
+
+        def run(collect):
+            start = time.perf_counter()
+            channel = SessionChannel(driver)
+            try:
+                return collect(channel), round((time.perf_counter() - start) * 1000)
+            finally:
+                channel.close()
+
+        executor = ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix='failure-bundle')
+        futures = {executor.submit(run, collect): member for member, collect in parts.items()}
+        with tarfile.open(path, 'w:gz') as archive:
+            try:
+                for future in as_completed(futures, timeout=max(deadline - time.perf_counter(), 0)):
+                    member = futures.pop(future)
+                    try:
+                        data, duration_ms = future.result()
+                    except Exception as e:
+                        manifest['parts'][member] = {'error': f"{type(e).__name__}: {e}"}
+                        continue
+                    _add_member(archive, member, data)
+                    manifest['parts'][member] = {'bytes': len(data), 'ms': duration_ms}
+            except TimeoutError:
+                for member in futures.values():
+                    manifest['parts'][member] = {'error': 'timed out'}
+            _add_member(archive, 'manifest.json', _json(manifest))
+        # Parts that ran out of budget finish (and are dropped) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+        return str(path)
+
+
+def _json(value):
+    """Serialise a part as indented JSON"""
+    return json.dumps(value, indent=2, default=str).encode('utf-8')
+
+
+def _add_member(archive, name, data):
+    """Append one file to the archive"""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
+
+# Global failure bundle instance
+failure_bundle = FailureBundle()
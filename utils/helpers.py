@@ -9,6 +9,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from utils.page_performance import page_performance
+from utils.locator_timeouts import locator_timeouts
 from config import config
 
 
@@ -20,33 +22,37 @@ class WaitHelper:
         self.timeout = timeout or config.explicit_wait
         self.wait = WebDriverWait(driver, self.timeout)
     
-    def wait_for_element_visible(self, locator):
-        """Wait for element to be visible"""
+    def _until(self, condition, locator, state, message):
+        """Wait for a condition on a locator within its learned timeout and record how long it took"""
+        timeout = locator_timeouts.timeout_for(locator, state, self.timeout)
+        wait = self.wait if timeout == self.timeout else WebDriverWait(self.driver, timeout)
+        start = time.perf_counter()
         try:
-            return self.wait.until(EC.visibility_of_element_located(locator))
+            result = wait.until(condition)
         except TimeoutException:
-            raise TimeoutException(f"Element {locator} not visible after {self.timeout} seconds")
+            raise TimeoutException(f"{message} after {timeout:g} seconds")
+        locator_timeouts.record(locator, state, time.perf_counter() - start)
+        return result
+    
+    def wait_for_element_visible(self, locator):
+        """Wait for element to be visible"""
+        return self._until(EC.visibility_of_element_located(locator), locator, 'visible',
+                           f"Element {locator} not visible")
     
     def wait_for_element_clickable(self, locator):
         """Wait for element to be clickable"""
-        try:
-            return self.wait.until(EC.element_to_be_clickable(locator))
-        except TimeoutException:
-            raise TimeoutException(f"Element {locator} not clickable after {self.timeout} seconds")
+        return self._until(EC.element_to_be_clickable(locator), locator, 'clickable',
+                           f"Element {locator} not clickable")
     
     def wait_for_element_present(self, locator):
         """Wait for element to be present in DOM"""
-        try:
-            return self.wait.until(EC.presence_of_element_located(locator))
-        except TimeoutException:
-            raise TimeoutException(f"Element {locator} not present after {self.timeout} seconds")
+        return self._until(EC.presence_of_element_located(locator), locator, 'present',
+                           f"Element {locator} not present")
     
     def wait_for_text_in_element(self, locator, text):
         """Wait for specific text in element"""
-        try:
-            return self.wait.until(EC.text_to_be_present_in_element(locator, text))
-        except TimeoutException:
-            raise TimeoutException(f"Text '{text}' not found in element {locator} after {self.timeout} seconds")
+        return self._until(EC.text_to_be_present_in_element(locator, text), locator, 'text',
+                           f"Text '{text}' not found in element {locator}")
     
     def wait_for_url_contains(self, url_part):
         """Wait for URL to contain specific text"""
@@ -118,7 +124,10 @@ class ElementHelper:
     def click_element_safe(self, locator):
         """Click element safely with explicit wait"""
         element = self.wait_helper.wait_for_element_clickable(locator)
+        origin = page_performance.document_origin(self.driver)
         element.click()
+        # Clicks may trigger a navigation; its timings are recorded once the new page has loaded
+        page_performance.capture_navigation(self.driver, origin)
         return element
     
     def send_keys_safe(self, locator, text):
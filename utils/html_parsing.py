@@ -0,0 +1,142 @@
+"""
+Lightweight extraction of shop data from HTML and JSON responses
+
+Used where pages are fetched over plain HTTP instead of through the browser, so
+the markup is matched with the same ids and classes the page objects locate.
+"""
+import re
+from html import unescape
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+TOKEN_PATTERN = re.compile(r'name="__RequestVerificationToken"[^>]*?value="([^"]*)"')
+PRODUCT_ITEM_PATTERN = re.compile(r'<div class="product-item" data-productid="(\d+)"')
+PRODUCT_TITLE_PATTERN = re.compile(r'<h2 class="product-title">\s*<a href="([^"]*)"[^>]*>(.*?)</a>', re.S)
+PRODUCT_PRICE_PATTERN = re.compile(r'<span class="price actual-price">([^<]*)</span>')
+ADD_TO_CART_PATTERN = re.compile(r'id="add-to-cart-button-(\d+)"')
+CART_QUANTITY_PATTERN = re.compile(r'<span class="cart-qty">\((\d+)\)</span>')
+CART_ITEM_PATTERN = re.compile(r'name="removefromcart" value="(\d+)"')
+CART_ITEM_QUANTITY_PATTERN = re.compile(r'name="itemquantity(\d+)"[^>]*?value="(\d*)"')
+SUBCATEGORY_PATTERN = re.compile(r'<div class="sub-category-item">\s*<h2 class="title">\s*<a href="([^"]*)"')
+PRODUCT_NAME_PATTERN = re.compile(r'<h1 itemprop="name">\s*(.*?)\s*</h1>', re.S)
+SKU_PATTERN = re.compile(r'<div class="sku">.*?<span class="value">\s*([^<]*?)\s*</span>', re.S)
+ORDER_TOTAL_PATTERN = re.compile(r'class="product-price order-total">\s*<strong>([^<]*)</strong>')
+TOP_CART_PATTERN = re.compile(r'\((\d+)\)')
+SELECT_PATTERN = '<select id="{}"[^>]*>(.*?)</select>'
+OPTION_PATTERN = re.compile(r'<option ([^>]*)>([^<]*)</option>')
+PAGER_PATTERN = re.compile(r'<div class="pager">(.*?)</div>', re.S)
+PAGER_NUMBER_PATTERN = re.compile(r'pagenumber=(\d+)|<span>(\d+)</span>')
+
+
+def verification_token(html):
+    """Return the anti-forgery token of the first form on a page"""
+    match = TOKEN_PATTERN.search(html)
+    return unescape(match.group(1)) if match else None
+
+
+def product_items(html):
+    """Return id, url, title and price of each product tile on a listing page"""
+    starts = [match.start() for match in PRODUCT_ITEM_PATTERN.finditer(html)]
+    items = []
+    for index, start in enumerate(starts):
+        block = html[start:starts[index + 1] if index + 1 < len(starts) else len(html)]
+        product_id = PRODUCT_ITEM_PATTERN.match(block).group(1)
+        title = PRODUCT_TITLE_PATTERN.search(block)
+        price = PRODUCT_PRICE_PATTERN.search(block)
+        items.append({
+            'id': int(product_id),
+            'url': unescape(title.group(1)) if title else None,
+            'title': unescape(re.sub(r'<[^>]+>', '', title.group(2))).strip() if title else '',
+            'price': unescape(price.group(1)).strip() if price else '',
+        })
+    return items
+
+
+def page_count(html):
+    """Return the number of result pages a listing's pager links to"""
+    pager = PAGER_PATTERN.search(html)
+    if not pager:
+        return 1
+    numbers = [int(linked or current) for linked, current in PAGER_NUMBER_PATTERN.findall(pager.group(1))]
+    return max(numbers, default=1)
+
+
+def page_url(listing_url, page_number):
+    """Return the URL of another page of the same listing, keeping sort order and page size"""
+    parts = urlsplit(listing_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != 'pagenumber']
+    return parts._replace(query=urlencode(query + [('pagenumber', page_number)])).geturl()
+
+
+def select_options(html, select_id):
+    """Return (text, value, selected) for each option of a select element"""
+    select = re.search(SELECT_PATTERN.format(re.escape(select_id)), html, re.S)
+    if not select:
+        return []
+    options = []
+    for attributes, text in OPTION_PATTERN.findall(select.group(1)):
+        value = re.search(r'value="([^"]*)"', attributes)
+        options.append((unescape(text).strip(), unescape(value.group(1)) if value else '', 'selected' in attributes))
+    return options
+
+
+def parse_price(text):
+    """Convert a displayed price such as '1,590.00' to a float"""
+    digits = re.sub(r'[^\d.]', '', text or '')
+    return float(digits) if digits else None
+
+
+def product_id(html):
+    """Return the id of the product on a product details page"""
+    match = ADD_TO_CART_PATTERN.search(html)
+    return int(match.group(1)) if match else None
+
+
+def product_name(html):
+    """Return the product name on a product details page"""
+    match = PRODUCT_NAME_PATTERN.search(html)
+    return unescape(match.group(1)) if match else None
+
+
+def product_sku(html):
+    """Return the SKU on a product details page"""
+    match = SKU_PATTERN.search(html)
+    return unescape(match.group(1)) if match else None
+
+
+def subcategory_links(html):
+    """Return the links to the subcategories listed on a category page"""
+    return [unescape(href) for href in SUBCATEGORY_PATTERN.findall(html)]
+
+
+def cart_quantity(html):
+    """Return the item count shown in the header cart link"""
+    match = CART_QUANTITY_PATTERN.search(html)
+    return int(match.group(1)) if match else None
+
+
+def cart_item_ids(html):
+    """Return the shopping cart item ids used by the remove checkboxes"""
+    return [int(item_id) for item_id in CART_ITEM_PATTERN.findall(html)]
+
+
+def cart_item_quantities(html):
+    """Return (item id, quantity) for each row of the shopping cart"""
+    return [(int(item_id), int(quantity or 0)) for item_id, quantity in CART_ITEM_QUANTITY_PATTERN.findall(html)]
+
+
+def order_total(html):
+    """Return the order total shown on the shopping cart page"""
+    match = ORDER_TOTAL_PATTERN.search(html)
+    return unescape(match.group(1)).strip() if match else None
+
+
+def is_logged_in(html):
+    """Whether a page is rendered for a logged-in customer"""
+    return 'class="ico-logout"' in html
+
+
+def top_cart_quantity(payload):
+    """Return the cart count from an add-to-cart JSON response"""
+    match = TOP_CART_PATTERN.search(payload.get('updatetopcartsectionhtml') or '')
+    return int(match.group(1)) if match else None
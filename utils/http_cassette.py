@@ -0,0 +1,354 @@
+"""
+HTTP record/replay proxy for deterministic, low-latency runs
+
+The browser is pointed at a local forward proxy and loads the shop over plain
+http. In record mode the proxy fetches every request from the real shop over
+https and stores the response in a per-feature cassette; in replay mode the
+stored responses are served locally without touching the network.
+
+A cassette is two files: ``<feature>.json`` holds the index (request key ->
+status, headers and body location) and ``<feature>.bin`` holds the
+zlib-compressed bodies, deduplicated by content. The index is loaded on first
+use and the body file is memory-mapped, so large cassette sets stay cheap.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+
+# Form fields that change on every page load and must not be part of a request key
+VOLATILE_FIELDS = {'__RequestVerificationToken'}
+
+# Headers that describe the connection rather than the resource
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+    'transfer-encoding', 'upgrade', 'content-encoding', 'content-length', 'strict-transport-security',
+}
+
+
+def normalize_body(body, content_type):
+    """Return a stable representation of a request body"""
+    if not body:
+        return ''
+    if 'application/x-www-form-urlencoded' in (content_type or ''):
+        fields = [(key, value) for key, value in parse_qsl(body.decode('utf-8', 'replace'), keep_blank_values=True)
+                  if key not in VOLATILE_FIELDS]
+        return urlencode(sorted(fields))
+    if 'json' in (content_type or ''):
+        try:
+            return json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            pass
+    return hashlib.sha1(body).hexdigest()
+
+
+def request_key(method, url, body, content_type):
+    """Key a request by method, URL and normalized body"""
+    body_hash = hashlib.sha1(normalize_body(body, content_type).encode('utf-8')).hexdigest()[:16]
+    return f"{method} {url} {body_hash}"
+
+
+class CassetteMissError(Exception):
+    """Raised when a recorded response's body is not in the cassette's body file"""
+
+
+class Cassette:
+    """One feature file's recorded responses"""
+
+    def __init__(self, path_stem):
+        self.index_path = Path(f"{path_stem}.json")
+        self.body_path = Path(f"{path_stem}.bin")
+        self.entries = None
+        self._by_request = None
+        self._bodies = {}
+        self._body_file = None
+        self._mapped = None
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def _load(self):
+        """Load the index on first use and memory-map the body file"""
+        if self.entries is not None:
+            return
+        self.entries = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data['entries']
+            self._bodies = data.get('bodies', {})
+        if self.body_path.exists() and self.body_path.stat().st_size:
+            self._body_file = open(self.body_path, 'rb')
+            self._mapped = mmap.mmap(self._body_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Fallback lookup by request only, for requests a scenario did not record itself
+        self._by_request = {}
+        for key, responses in self.entries.items():
+            self._by_request[key.split('\n', 1)[1]] = responses[-1]
+
+    def lookup(self, scenario_id, key, occurrence):
+        """Return the response recorded for the nth occurrence of a request in a scenario"""
+        with self._lock:
+            self._load()
+            responses = self.entries.get(f"{scenario_id}\n{key}")
+            if responses:
+                return responses[min(occurrence, len(responses) - 1)]
+            return self._by_request.get(key)
+
+    def read_body(self, response):
+        """Decompress the body of a recorded response"""
+        offset, length = response['body']
+        if not length:
+            return b''
+        if self._mapped is None or offset + length > len(self._mapped):
+            raise CassetteMissError(f"Body of a recorded response is missing from {self.body_path}")
+        return zlib.decompress(self._mapped[offset:offset + length])
+
+    def reset_scenario(self, scenario_id):
+        """Drop a scenario's previous recording before it is recorded again"""
+        with self._lock:
+            self._load()
+            prefix = f"{scenario_id}\n"
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+                self.dirty = True
+
+    def record(self, scenario_id, key, status, headers, body):
+        """Append a response, storing identical bodies only once"""
+        with self._lock:
+            self._load()
+            digest = hashlib.sha1(body).hexdigest()
+            location = self._bodies.get(digest)
+            if location is None:
+                compressed = zlib.compress(body, 6) if body else b''
+                self.body_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.body_path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                location = self._bodies[digest] = [offset, len(compressed)]
+            self.entries.setdefault(f"{scenario_id}\n{key}", []).append(
+                {'status': status, 'headers': headers, 'body': location}
+            )
+            self.dirty = True
+
+    def save(self, compact=False):
+        """Write the index if it changed; compact also drops bodies no entry references any more"""
+        with self._lock:
+            if not self.dirty:
+                return
+            if compact:
+                self._compact()
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': self.entries, 'bodies': self._bodies}, f, separators=(',', ':'))
+            self.dirty = False
+
+    def _compact(self):
+        """Rewrite the body file with only the bodies live entries reference
+
+        Re-recorded scenarios leave their old bodies behind, and pages with a fresh
+        anti-forgery token are new bodies on every recording.
+        """
+        live = {tuple(response['body']) for responses in self.entries.values() for response in responses}
+        if not self.body_path.exists() or sum(length for _, length in live) == self.body_path.stat().st_size:
+            return
+        self.close()
+        moved = {}
+        bodies = {}
+        temp_path = self.body_path.with_suffix('.bin.tmp')
+        with open(self.body_path, 'rb') as source, open(temp_path, 'wb') as target:
+            for digest, (offset, length) in self._bodies.items():
+                if (offset, length) not in live:
+                    continue
+                source.seek(offset)
+                moved[(offset, length)] = bodies[digest] = [target.tell() if length else 0, length]
+                target.write(source.read(length))
+        os.replace(temp_path, self.body_path)
+        self._bodies = bodies
+        for responses in self.entries.values():
+            for response in responses:
+                response['body'] = moved[tuple(response['body'])]
+
+    def close(self):
+        """Release the memory map"""
+        if self._mapped is not None:
+            self._mapped.close()
+            self._body_file.close()
+            self._mapped = self._body_file = None
+
+
+class CassetteProxyHandler(BaseHTTPRequestHandler):
+    """Forward proxy handler that records or replays shop traffic"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_CONNECT(self):
+        # https tunnels cannot be recorded; third-party https traffic is blocked to keep runs hermetic
+        self.send_error(403, 'HTTPS tunnelling is not supported by the cassette proxy')
+
+    def _handle(self):
+        proxy = self.server.proxy
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = self.path if self.path.startswith('http') else f"http://{self.headers.get('Host')}{self.path}"
+        key = request_key(self.command, url, body, self.headers.get('Content-Type'))
+
+        if proxy.mode == 'replay':
+            response = proxy.replay(key)
+            if response is None:
+                self.send_error(504, f'Not in cassette: {self.command} {url}')
+                return
+            cassette, recorded = response
+            try:
+                body = cassette.read_body(recorded)
+            except CassetteMissError as e:
+                self.send_error(504, str(e))
+                return
+            self._respond(recorded['status'], recorded['headers'], body)
+        else:
+            status, headers, response_body = proxy.fetch(self.command, url, self.headers, body)
+            proxy.record(key, status, headers, response_body)
+            self._respond(status, headers, response_body)
+
+    def _respond(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep test output clean"""
+
+
+class CassetteProxy:
+    """Local record/replay forward proxy for the shop host"""
+
+    def __init__(self, mode, cassette_dir, upstream_url, port=0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.mode = mode
+        self.cassette_dir = Path(cassette_dir)
+        self.upstream_scheme = urlsplit(upstream_url).scheme
+        self.upstream_host = urlsplit(upstream_url).netloc
+        self.cassettes = {}
+        self._cassette = None
+        self._scenario_id = None
+        self._occurrences = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), CassetteProxyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.proxy = self
+        self._thread = None
+
+    @property
+    def port(self):
+        """Port the proxy listens on"""
+        return self.httpd.server_address[1]
+
+    def start(self):
+        """Start serving in a daemon thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='cassette-proxy', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving, save recordings and release memory maps"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for cassette in self.cassettes.values():
+            cassette.save(compact=self.mode == 'record')
+            cassette.close()
+
+    def begin_scenario(self, feature_file, scenario_id):
+        """Select the cassette of a feature file and reset request occurrence counters"""
+        stem = Path(feature_file).stem
+        with self._lock:
+            if stem not in self.cassettes:
+                self.cassettes[stem] = Cassette(self.cassette_dir / stem)
+            self._cassette = self.cassettes[stem]
+            self._scenario_id = scenario_id
+            self._occurrences = {}
+        if self.mode == 'record':
+            self._cassette.reset_scenario(scenario_id)
+
+    def end_scenario(self):
+        """Persist what the scenario recorded"""
+        if self._cassette is not None and self.mode == 'record':
+            self._cassette.save()
+
+    def _next_occurrence(self, key):
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+            return occurrence
+
+    def replay(self, key):
+        """Return (cassette, response) for a request, or None if it was never recorded"""
+        cassette = self._cassette
+        if cassette is None:
+            return None
+        recorded = cassette.lookup(self._scenario_id, key, self._next_occurrence(key))
+        return (cassette, recorded) if recorded else None
+
+    def record(self, key, status, headers, body):
+        """Store a fetched response in the current cassette"""
+        if self._cassette is not None:
+            self._cassette.record(self._scenario_id, key, status, headers, body)
+            self._next_occurrence(key)
+
+    def fetch(self, method, url, request_headers, body):
+        """Fetch a request from the real shop over https and rewrite it for plain http"""
+        parts = urlsplit(url)
+        if parts.netloc == self.upstream_host:
+            url = parts._replace(scheme=self.upstream_scheme).geturl()
+        headers = {name: value for name, value in request_headers.items()
+                   if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'proxy-connection'}
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        # The browser owns the cookies; never let the proxy's session replay its own
+        session.cookies.clear()
+        response = session.request(method, url, headers=headers, data=body or None,
+                                   allow_redirects=False, timeout=60)
+
+        response_headers = []
+        for name, value in response.raw.headers.items():
+            lowered = name.lower()
+            if lowered in HOP_BY_HOP_HEADERS:
+                continue
+            if lowered == 'location':
+                value = self._downgrade(value)
+            elif lowered == 'set-cookie':
+                value = re.sub(r';\s*secure', '', value, flags=re.IGNORECASE)
+                value = re.sub(r';\s*samesite=none', '', value, flags=re.IGNORECASE)
+            response_headers.append([name, value])
+
+        content = response.content
+        content_type = response.headers.get('Content-Type', '')
+        if content_type.startswith(('text/', 'application/json', 'application/javascript')):
+            content = content.replace(f"https://{self.upstream_host}".encode(), f"http://{self.upstream_host}".encode())
+        return response.status_code, response_headers, content
+
+    def _downgrade(self, url):
+        return url.replace(f"https://{self.upstream_host}", f"http://{self.upstream_host}")
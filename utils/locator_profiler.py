@@ -0,0 +1,274 @@
+"""
+Locator cost profiler for the page objects
+
+Loads the page of every page object and evaluates each class-level locator
+tuple in the browser many times, the way the driver resolves it. Reports the
+mean query cost, the match count and whether the locator is unique, and
+suggests cheaper id/attribute-based alternatives for slow or ambiguous ones.
+
+    python -m utils.locator_profiler --local-shop
+    pytest tests/test_locator_profile.py --locator-profile --locator-cost-threshold 100
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+
+from config import config
+
+
+# Evaluates locators the way chromedriver resolves them, repeatedly, and proposes alternatives
+PROFILE_SCRIPT = """
+const [locators, scope, repetitions] = arguments;
+const cssEscape = value => CSS.escape(value);
+const query = ([by, value]) => {
+    switch (by) {
+        case 'xpath': {
+            const snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+            return nodes;
+        }
+        case 'link text':
+            return Array.from(document.querySelectorAll('a')).filter(a => a.innerText.trim() === value);
+        case 'partial link text':
+            return Array.from(document.querySelectorAll('a')).filter(a => a.innerText.includes(value));
+        case 'id': return Array.from(document.querySelectorAll(`[id="${value}"]`));
+        case 'name': return Array.from(document.querySelectorAll(`[name="${value}"]`));
+        case 'class name': return Array.from(document.querySelectorAll('.' + cssEscape(value)));
+        case 'tag name': return Array.from(document.getElementsByTagName(value));
+        default: return Array.from(document.querySelectorAll(value));
+    }
+};
+const cost = locator => {
+    query(locator);
+    const start = performance.now();
+    for (let i = 0; i < repetitions; i++) query(locator);
+    return (performance.now() - start) * 1000 / repetitions;
+};
+const unique = selector => {
+    try { return document.querySelectorAll(selector).length === 1; } catch (e) { return false; }
+};
+const suggest = element => {
+    const tag = element.tagName.toLowerCase();
+    if (element.id && unique(`[id="${element.id}"]`)) return ['id', element.id];
+    const name = element.getAttribute('name');
+    if (name && unique(`[name="${name}"]`)) return ['name', name];
+    const attributes = Array.from(element.attributes)
+        .filter(a => a.name.startsWith('data-') || ['for', 'href', 'title', 'alt', 'value', 'type'].includes(a.name))
+        .filter(a => a.value && a.value.length < 80);
+    for (const a of attributes) {
+        const selector = `${tag}[${a.name}="${a.value}"]`;
+        if (unique(selector)) return ['css selector', selector];
+    }
+    for (const className of element.classList) {
+        const selector = `${tag}.${cssEscape(className)}`;
+        if (unique(selector)) return ['css selector', selector];
+    }
+    for (let ancestor = element.parentElement, depth = 0; ancestor && depth < 4; ancestor = ancestor.parentElement, depth++) {
+        if (!ancestor.id) continue;
+        for (const className of element.classList) {
+            const selector = `#${cssEscape(ancestor.id)} ${tag}.${cssEscape(className)}`;
+            if (unique(selector)) return ['css selector', selector];
+        }
+        const selector = `#${cssEscape(ancestor.id)} ${tag}`;
+        if (unique(selector)) return ['css selector', selector];
+    }
+    return null;
+};
+const scopeElements = scope ? query(scope) : [];
+return locators.map(([name, locator, many, scoped]) => {
+    const matches = query(locator);
+    const result = {name: name, matches: matches.length, cost_us: cost(locator), outside_scope: null, suggestion: null};
+    if (scoped && scopeElements.length) {
+        result.outside_scope = matches.filter(element => !scopeElements.some(item => item.contains(element))).length;
+        if (result.outside_scope && locator[0] === 'css selector' && scope[0] === 'css selector') {
+            result.suggestion = ['css selector', `${scope[1]} ${locator[1]}`];
+        }
+    } else if (!many && matches.length) {
+        result.suggestion = suggest(matches[0]);
+    }
+    if (result.suggestion) result.suggestion_cost_us = cost(result.suggestion);
+    return result;
+});
+"""
+
+# Strategies that walk the whole document or force layout instead of using a selector index
+SLOW_STRATEGIES = (By.XPATH, By.LINK_TEXT, By.PARTIAL_LINK_TEXT)
+
+
+def page_locators(page_class):
+    """Return the (name, locator) class attributes of a page object, in definition order"""
+    strategies = {value for name, value in vars(By).items() if name.isupper()}
+    locators = {}
+    for cls in reversed(page_class.__mro__):
+        for name, value in vars(cls).items():
+            if (name.isupper() and isinstance(value, tuple) and len(value) == 2
+                    and value[0] in strategies and isinstance(value[1], str)):
+                locators[name] = value
+    return list(locators.items())
+
+
+def _open_product(driver):
+    """Open the cheapest indexed book"""
+    from pages import ProductDetailsPage
+    from utils.catalog_index import catalog_index
+    product = catalog_index.in_price_range(category='books')[0]
+    page = ProductDetailsPage(driver)
+    page.open_product(product['slug'])
+    page.wait_for_page_load()
+    return page
+
+
+def _open_cart(driver):
+    """Add a product to the cart and open the cart"""
+    from pages import ShoppingCartPage
+    _open_product(driver).click_add_to_cart()
+    page = ShoppingCartPage(driver)
+    page.navigate_to_cart()
+    return page
+
+
+def _open(page_class, path):
+    """Return a setup that opens a page object's page by URL"""
+    def setup(driver):
+        page = page_class(driver)
+        page.navigate_to(path)
+        page.wait_for_page_load()
+        return page
+    return setup
+
+
+def page_setups():
+    """Return (page class, setup) pairs; each setup puts the browser on a populated page of that class"""
+    from pages import HomePage, LoginPage, SearchResultsPage, ProductDetailsPage, ShoppingCartPage
+    return [
+        (HomePage, _open(HomePage, '')),
+        (LoginPage, _open(LoginPage, 'login')),
+        (SearchResultsPage, _open(SearchResultsPage, 'search?q=computer')),
+        (ProductDetailsPage, _open_product),
+        (ShoppingCartPage, _open_cart),
+    ]
+
+
+class LocatorProfiler:
+    """Measures the in-browser cost, match count and uniqueness of page object locators"""
+
+    def __init__(self, repetitions=200):
+        self.repetitions = repetitions
+
+    def profile_page(self, driver, page_class, setup):
+        """Open a page object's page and profile all of its locators"""
+        setup(driver)
+        locators = page_locators(page_class)
+        # Plural names (PRODUCT_PRICES) may match many elements; those sharing the prefix of the
+        # page's *_ITEMS locator (PRODUCT_ITEMS) should only match inside its items
+        scope_name, scope = next(((name, locator) for name, locator in locators if name.endswith('_ITEMS')),
+                                 (None, None))
+        prefix = scope_name and scope_name[:-len('ITEMS')]
+        results = driver.execute_script(
+            PROFILE_SCRIPT,
+            [[name, list(locator), name.endswith('S'), bool(prefix) and name != scope_name and
+              name.endswith('S') and name.startswith(prefix)] for name, locator in locators],
+            scope and list(scope),
+            self.repetitions,
+        )
+        for (name, locator), result in zip(locators, results):
+            result.update(self._assess(name, locator, result, scope_name))
+            result.update({'page': page_class.__name__, 'by': locator[0], 'value': locator[1]})
+        return results
+
+    @staticmethod
+    def _assess(name, locator, result, scope_name):
+        """Classify a result: missing, ambiguous or unique, and whether its suggestion is worth showing"""
+        many = name.endswith('S')
+        if result['matches'] == 0:
+            status = 'missing'
+        elif result['outside_scope']:
+            status = f"ambiguous ({result['outside_scope']} outside {scope_name})"
+        elif not many and result['matches'] > 1:
+            status = 'ambiguous'
+        else:
+            status = 'ok'
+        suggestion = result['suggestion']
+        worth = suggestion and list(locator) != suggestion and (
+            status != 'ok' or locator[0] in SLOW_STRATEGIES
+            or result.get('suggestion_cost_us', result['cost_us']) < result['cost_us'] * 0.5
+        )
+        return {'unique': result['matches'] == 1, 'status': status, 'suggestion': suggestion if worth else None}
+
+    def profile(self, driver, setups=None):
+        """Profile every page object and return the results, most expensive first"""
+        results = []
+        for page_class, setup in setups or page_setups():
+            results.extend(self.profile_page(driver, page_class, setup))
+        return sorted(results, key=lambda result: result['cost_us'], reverse=True)
+
+    @staticmethod
+    def over_threshold(results, threshold_us):
+        """Return the results whose mean query cost exceeds a threshold in microseconds"""
+        return [result for result in results if result['cost_us'] > threshold_us]
+
+    @staticmethod
+    def format_report(results):
+        """Return report lines for profile results"""
+        lines = [f"{'cost us':>8} {'matches':>7}  {'status':<36} locator"]
+        for result in results:
+            lines.append(f"{result['cost_us']:>8.1f} {result['matches']:>7}  {result['status']:<36} "
+                         f"{result['page']}.{result['name']} ({result['by']}, {result['value']!r})")
+            if result['suggestion']:
+                by, value = result['suggestion']
+                lines.append(f"{'':>8} {'':>7}  {'':<36}   try ({by}, {value!r}): "
+                             f"{result['suggestion_cost_us']:.1f} us")
+        return lines
+
+    @staticmethod
+    def write_json(results, output_path):
+        """Write profile results to a JSON file"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the in-browser cost of every page object locator")
+    parser.add_argument('--repetitions', type=int, default=200, help="queries per locator")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="exit with status 1 if a locator costs more than this many microseconds")
+    parser.add_argument('--output', default='reports/locator_profile.json')
+    parser.add_argument('--local-shop', action='store_true', help="profile against the bundled stand-in shop")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.local_shop:
+        os.environ['ENVIRONMENT'] = 'local'
+        from local_shop import LocalShopServer
+        server = LocalShopServer(port=config.local_shop_port).start()
+        os.environ['LOCAL_SHOP_PORT'] = str(server.httpd.server_address[1])
+    from utils import WebDriverManager
+
+    driver_manager = WebDriverManager()
+    try:
+        results = LocatorProfiler(args.repetitions).profile(driver_manager.get_driver(headless=True))
+    finally:
+        driver_manager.quit_driver()
+        if server:
+            server.stop()
+
+    for line in LocatorProfiler.format_report(results):
+        print(line)
+    LocatorProfiler.write_json(results, args.output)
+    print(f"Locator profile written to {args.output}")
+    if args.threshold is not None:
+        slow = LocatorProfiler.over_threshold(results, args.threshold)
+        for result in slow:
+            print(f"SLOW {result['page']}.{result['name']}: {result['cost_us']:.1f} us > {args.threshold:g} us")
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Adaptive per-locator wait timeouts learned from a SQLite history
+
+WaitHelper records how long every locator took to satisfy its wait condition.
+Samples are written to the history at session end, and later runs wait at most
+p99 x safety factor for locators with enough history (clamped between a floor
+and the configured maximum), so a broken known-fast locator fails in about a
+second instead of after EXPLICIT_WAIT.
+
+    python -m utils.locator_timeouts            # current timeouts per locator
+    python -m utils.locator_timeouts --trending # locators whose latency is rising
+"""
+import argparse
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+from config import config
+from utils.stats import percentile
+
+
+def locator_key(locator):
+    """Return the string a locator tuple is stored under"""
+    by, value = locator
+    return f"{by}={value}"
+
+
+class LocatorTimeouts:
+    """Records locator wait durations and derives timeouts from their history"""
+
+    def __init__(self):
+        self.enabled = config.adaptive_timeouts
+        self.samples = []
+        self.current_nodeid = None
+        self._timeouts = None
+        self._lock = threading.Lock()
+
+    def timeout_for(self, locator, condition, maximum):
+        """Return the learned timeout of a locator and condition, or maximum without enough history"""
+        if not self.enabled:
+            return maximum
+        with self._lock:
+            if self._timeouts is None:
+                self._timeouts = self.learned_timeouts()
+        learned = self._timeouts.get((locator_key(locator), condition))
+        return maximum if learned is None else min(learned, maximum)
+
+    def record(self, locator, condition, seconds):
+        """Record how long a satisfied wait took"""
+        if self.enabled:
+            self.samples.append({'nodeid': self.current_nodeid, 'locator': locator_key(locator),
+                                 'condition': condition, 'seconds': round(seconds, 4)})
+
+    def pop_samples(self, nodeid):
+        """Remove and return the wait samples recorded during a test"""
+        samples = [sample for sample in self.samples if sample['nodeid'] == nodeid]
+        self.samples = [sample for sample in self.samples if sample['nodeid'] != nodeid]
+        return samples
+
+    def _connect(self):
+        """Open the history database, creating the schema if needed"""
+        path = Path(config.locator_history_db)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(path), timeout=30)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS locator_waits ("
+            "recorded_at REAL, environment TEXT, locator TEXT, condition TEXT, seconds REAL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_locator_waits ON locator_waits (locator, condition, recorded_at)"
+        )
+        return connection
+
+    def write_history(self, samples):
+        """Write wait samples to the history database in one transaction"""
+        if not samples:
+            return
+        recorded_at = time.time()
+        rows = [(recorded_at, config.environment, sample['locator'], sample['condition'], sample['seconds'])
+                for sample in samples]
+        connection = self._connect()
+        with connection:
+            connection.executemany("INSERT INTO locator_waits VALUES (?, ?, ?, ?, ?)", rows)
+        connection.close()
+
+    def history(self, window=None):
+        """Return the recorded durations per (locator, condition), oldest first, at most window per key"""
+        if not Path(config.locator_history_db).exists():
+            return {}
+        window = window or config.locator_timeout_window
+        connection = self._connect()
+        rows = connection.execute(
+            "SELECT locator, condition, seconds FROM locator_waits WHERE environment = ? "
+            "ORDER BY recorded_at DESC, rowid DESC", (config.environment,)
+        ).fetchall()
+        connection.close()
+        history = {}
+        for locator, condition, seconds in rows:
+            durations = history.setdefault((locator, condition), [])
+            if len(durations) < window:
+                durations.append(seconds)
+        return {key: durations[::-1] for key, durations in history.items()}
+
+    def learned_timeouts(self):
+        """Return p99 x safety factor per (locator, condition) with enough samples, clamped to the floor"""
+        return {
+            key: max(config.locator_timeout_min, percentile(durations, 0.99) * config.locator_timeout_factor)
+            for key, durations in self.history().items()
+            if len(durations) >= config.locator_timeout_min_samples
+        }
+
+    def trending(self, window=20, tolerance=1.5):
+        """Return locators whose recent median wait is above the median of the window before it
+
+        Each result is (locator, condition, recent median, previous median), largest increase first.
+        """
+        results = []
+        for (locator, condition), durations in self.history(window * 2).items():
+            if len(durations) < window * 2:
+                continue
+            previous = statistics.median(durations[:window])
+            recent = statistics.median(durations[window:])
+            if recent > previous * tolerance and recent - previous >= 0.05:
+                results.append((locator, condition, recent, previous))
+        return sorted(results, key=lambda result: result[2] / max(result[3], 0.001), reverse=True)
+
+
+# Global locator timeouts instance
+locator_timeouts = LocatorTimeouts()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show learned per-locator timeouts and rising locator latency")
+    parser.add_argument('--trending', action='store_true', help="list locators whose wait time is trending up")
+    parser.add_argument('--window', type=int, default=20, help="samples per comparison window for --trending")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="recent/previous median ratio reported by --trending")
+    args = parser.parse_args(argv)
+
+    if args.trending:
+        results = locator_timeouts.trending(args.window, args.tolerance)
+        print(f"{'recent s':>9} {'before s':>9} {'ratio':>6}  locator")
+        for locator, condition, recent, previous in results:
+            print(f"{recent:>9.3f} {previous:>9.3f} {recent / max(previous, 0.001):>6.1f}  {locator} ({condition})")
+        if not results:
+            print("No locator latency is trending up")
+        return 0
+
+    learned = locator_timeouts.learned_timeouts()
+    print(f"{'samples':>7} {'p99 s':>7} {'timeout s':>9}  locator")
+    for (locator, condition), durations in sorted(locator_timeouts.history().items()):
+        timeout = min(learned[(locator, condition)], config.explicit_wait) if (locator, condition) in learned else None
+        print(f"{len(durations):>7} {percentile(durations, 0.99):>7.3f} "
+              f"{'-' if timeout is None else f'{timeout:.2f}':>9}  {locator} ({condition})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Navigation Timing capture, SQLite history and per-page performance budgets
+"""
+import fnmatch
+import re
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from config import config
+
+
+NAVIGATION_TIMING_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+if (!nav || nav.loadEventEnd === 0) { return null; }
+const paints = {};
+performance.getEntriesByType('paint').forEach(entry => { paints[entry.name] = entry.startTime; });
+return {
+    url: location.href,
+    timeOrigin: performance.timeOrigin,
+    ttfb: nav.responseStart,
+    domContentLoaded: nav.domContentLoadedEventEnd,
+    load: nav.loadEventEnd,
+    firstPaint: paints['first-paint'] === undefined ? null : paints['first-paint'],
+    firstContentfulPaint: paints['first-contentful-paint'] === undefined ? null : paints['first-contentful-paint'],
+    resourceCount: performance.getEntriesByType('resource').length,
+    transferSize: nav.transferSize
+};
+"""
+
+# Timing metrics that budgets can be declared for (all in milliseconds)
+METRICS = ('ttfb', 'domContentLoaded', 'load', 'firstPaint', 'firstContentfulPaint')
+
+# Friendly page names usable in budgets instead of URL patterns
+PAGE_ALIASES = {
+    'home': '/',
+    'login': '/login',
+    'register': '/register',
+    'search results': '/search',
+    'cart': '/cart',
+}
+
+# Reports the current document's time origin and whether it has finished loading
+DOCUMENT_STATE_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+return [performance.timeOrigin, !!nav && nav.loadEventEnd > 0];
+"""
+
+# Seconds a click is given to start a navigation before it is taken as an in-page action
+CLICK_NAVIGATION_GRACE = 1.0
+
+BUDGET_PATTERN = re.compile(r'^\s*(?P<target>[^:]+?)\s*:\s*(?P<metric>\w+)\s*<\s*(?P<limit>\d+(?:\.\d+)?)\s*(?:ms)?\s*$')
+
+
+def url_pattern(url):
+    """Reduce a URL to the pattern its history is stored under"""
+    path = urlparse(url).path.rstrip('/') or '/'
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path.lower())
+
+
+def metric_name(name):
+    """Resolve a metric name case-insensitively (e.g. DOMContentLoaded)"""
+    for metric in METRICS:
+        if metric.lower() == name.replace(' ', '').lower():
+            return metric
+    raise ValueError(f"Unknown navigation timing metric: {name}")
+
+
+def target_matches(target, pattern):
+    """Check whether a budget target (page alias or URL glob) matches a URL pattern"""
+    return fnmatch.fnmatch(pattern, PAGE_ALIASES.get(target.lower(), target))
+
+
+def parse_budgets(spec):
+    """Parse 'target:metric<ms;...' budget declarations"""
+    budgets = []
+    for declaration in filter(None, (part.strip() for part in spec.split(';'))):
+        match = BUDGET_PATTERN.match(declaration)
+        if not match:
+            raise ValueError(f"Invalid performance budget: {declaration}")
+        budgets.append((match['target'], metric_name(match['metric']), float(match['limit'])))
+    return budgets
+
+
+class PagePerformanceMonitor:
+    """Collects browser navigation timings and checks them against budgets"""
+
+    def __init__(self):
+        self.enabled = config.page_performance
+        self.budgets = parse_budgets(config.perf_budgets)
+        self.current_nodeid = None
+        self.captures = []
+        self.violations = []
+        self._seen = set()
+
+    def capture(self, driver, force=False):
+        """Capture timings of the current document once it has finished loading"""
+        if not (self.enabled or force):
+            return None
+        try:
+            timing = driver.execute_script(NAVIGATION_TIMING_SCRIPT)
+        except Exception:
+            return None
+        if not timing:
+            return None
+
+        key = (driver.session_id, timing['timeOrigin'])
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+
+        timing['pattern'] = url_pattern(timing['url'])
+        timing['nodeid'] = nodeid = self.current_nodeid
+        self.captures.append(timing)
+        self.violations.extend(
+            (nodeid, target, metric, timing[metric], limit, timing['url'])
+            for target, metric, limit in self.budgets
+            if target_matches(target, timing['pattern']) and timing[metric] is not None and timing[metric] >= limit
+        )
+        return timing
+
+    def document_origin(self, driver):
+        """Time origin of the current document, read before an action that may navigate (None when off)"""
+        if not self.enabled:
+            return None
+        try:
+            return driver.execute_script(DOCUMENT_STATE_SCRIPT)[0]
+        except Exception:
+            return None
+
+    def capture_navigation(self, driver, previous_origin, grace=CLICK_NAVIGATION_GRACE):
+        """Wait for the navigation an action started to load, then capture it; None when it did not navigate"""
+        if previous_origin is None:
+            return None
+        deadline = time.monotonic() + grace
+        navigated = False
+        while time.monotonic() < deadline:
+            try:
+                origin, loaded = driver.execute_script(DOCUMENT_STATE_SCRIPT)
+            except Exception:
+                # The old document is being unloaded
+                origin, loaded = previous_origin, False
+            if origin != previous_origin and not navigated:
+                navigated = True
+                deadline = time.monotonic() + config.page_load_timeout
+            if navigated and loaded:
+                return self.capture(driver)
+            time.sleep(0.05)
+        return None
+
+    def captures_for(self, nodeid):
+        """Return the timings captured during a test"""
+        return [timing for timing in self.captures if timing['nodeid'] == nodeid]
+
+    def latest(self, target, nodeid=None):
+        """Return the latest capture matching a page alias or URL glob"""
+        for timing in reversed(self.captures):
+            if (nodeid is None or timing['nodeid'] == nodeid) and target_matches(target, timing['pattern']):
+                return timing
+        return None
+
+    def violations_for(self, nodeid):
+        """Return the budget violations recorded for a test"""
+        return [violation for violation in self.violations if violation[0] == nodeid]
+
+    def _connect(self):
+        """Open the history database, creating the schema if needed"""
+        path = Path(config.perf_history_db)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(path), timeout=30)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS navigation_timings ("
+            "recorded_at REAL, environment TEXT, url_pattern TEXT, url TEXT, "
+            "ttfb REAL, dom_content_loaded REAL, load REAL, first_paint REAL, "
+            "first_contentful_paint REAL, resource_count INTEGER, transfer_size INTEGER)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_navigation_pattern ON navigation_timings (url_pattern, recorded_at)"
+        )
+        return connection
+
+    def write_history(self, timings):
+        """Write timings to the history database in one transaction"""
+        if not timings:
+            return
+        recorded_at = time.time()
+        rows = [
+            (recorded_at, config.environment, timing['pattern'], timing['url'],
+             *(timing[metric] for metric in METRICS), timing['resourceCount'], timing['transferSize'])
+            for timing in timings
+        ]
+        connection = self._connect()
+        with connection:
+            connection.executemany("INSERT INTO navigation_timings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.close()
+
+    def regressions(self, timings, metric='load', window=20, tolerance=1.25):
+        """Compare a run's median per URL pattern to the recent history median
+
+        Must be called before write_history() so the run is not part of its own baseline.
+        """
+        current = {}
+        for timing in timings:
+            if timing[metric] is not None:
+                current.setdefault(timing['pattern'], []).append(timing[metric])
+        if not current or not Path(config.perf_history_db).exists():
+            return []
+
+        column = re.sub(r'(?<!^)(?=[A-Z])', '_', metric).lower()
+        connection = self._connect()
+        results = []
+        for pattern, values in sorted(current.items()):
+            rows = connection.execute(
+                f"SELECT {column} FROM navigation_timings WHERE url_pattern = ? AND environment = ? "
+                f"AND {column} IS NOT NULL ORDER BY recorded_at DESC LIMIT ?",
+                (pattern, config.environment, window)
+            ).fetchall()
+            if len(rows) < 3:
+                continue
+            baseline = statistics.median(row[0] for row in rows)
+            now = statistics.median(values)
+            if baseline and now > baseline * tolerance:
+                results.append((pattern, metric, now, baseline))
+        connection.close()
+        return results
+
+
+# Global page performance monitor instance
+page_performance = PagePerformanceMonitor()
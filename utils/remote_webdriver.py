@@ -0,0 +1,162 @@
+"""
+Remote WebDriver endpoint with pooled keep-alive connections and overhead accounting
+
+BROWSER=remote drives a browser behind REMOTE_URL (a Selenium standalone or
+grid, or chromedriver started in server mode) so the browsers can live on a
+separate host. Every session talks to the endpoint over one urllib3 pool with
+keep-alive. Each command's round trip is timed and compared against the
+endpoint's baseline round trip (the median of a few GET /status requests
+when the connection is opened): the smaller of the two is counted as the
+command's network overhead, the rest as time spent in the browser.
+"""
+import statistics
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+
+# GET /status requests used to measure the endpoint's baseline round trip
+CALIBRATION_PINGS = 5
+
+# Vendor prefix and browserName of the Chromium browsers reachable through DevTools
+CHROMIUM_VENDORS = {'chrome': ('goog', 'chrome'), 'edge': ('ms', 'MicrosoftEdge')}
+
+
+class RemoteCommandStats:
+    """Per-command counts, round trip and estimated network overhead of remote commands"""
+
+    def __init__(self):
+        self.per_command = {}
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def record(self, command, duration, baseline):
+        """Count one command round trip"""
+        with self._lock:
+            stats = self.per_command.setdefault(command, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] += min(duration, baseline)
+
+    def snapshot(self):
+        """Copy of the counters, to diff against later"""
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'commands': {command: list(stats) for command, stats in self.per_command.items()},
+            }
+
+    def since(self, snapshot):
+        """Counters accumulated after a snapshot"""
+        current = self.snapshot()
+        commands = {}
+        for command, (count, round_trip, overhead) in current['commands'].items():
+            before = snapshot['commands'].get(command, (0, 0.0, 0.0))
+            if count > before[0]:
+                commands[command] = [count - before[0], round_trip - before[1], overhead - before[2]]
+        return {'connections': current['connections'] - snapshot['connections'], 'commands': commands}
+
+    @staticmethod
+    def merge(deltas):
+        """Add up deltas (e.g. one per test, collected from all workers)"""
+        merged = {'connections': 0, 'commands': {}}
+        for delta in deltas:
+            merged['connections'] += delta['connections']
+            for command, values in delta['commands'].items():
+                stats = merged['commands'].setdefault(command, [0, 0.0, 0.0])
+                for i, value in enumerate(values):
+                    stats[i] += value
+        return merged
+
+    @staticmethod
+    def format_report(merged, top_n=10):
+        """Summary lines: totals, then the commands with the most network overhead"""
+        commands = merged['commands']
+        count = sum(stats[0] for stats in commands.values())
+        if not count:
+            return []
+        round_trip = sum(stats[1] for stats in commands.values())
+        overhead = sum(stats[2] for stats in commands.values())
+        lines = [
+            f"{count} commands over {merged['connections']} connection(s): "
+            f"round trip {round_trip * 1000:.0f} ms, network overhead {overhead * 1000:.0f} ms "
+            f"({overhead / round_trip * 100 if round_trip else 0:.0f}%)",
+            f"{'count':>7} {'rtt ms':>9} {'net ms':>9} {'net/cmd':>8}  command",
+        ]
+        ranked = sorted(commands.items(), key=lambda item: item[1][2], reverse=True)
+        for command, (calls, command_round_trip, command_overhead) in ranked[:top_n]:
+            lines.append(
+                f"{calls:>7} {command_round_trip * 1000:>9.0f} {command_overhead * 1000:>9.0f} "
+                f"{command_overhead / calls * 1000:>8.1f}  {command}"
+            )
+        return lines
+
+
+class _TimedConnectionMixin:
+    """Times every command sent over a keep-alive connection"""
+
+    baseline = 0.0
+
+    def calibrate(self, pings=CALIBRATION_PINGS):
+        """Measure the endpoint's baseline round trip with GET /status"""
+        samples = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            self._request('GET', f"{self._url}/status")
+            samples.append(time.perf_counter() - start)
+        self.baseline = statistics.median(samples)
+        return self.baseline
+
+    def _request(self, method, url, body=None):
+        """Send an HTTP request, counting new connections opened to the endpoint"""
+        pool = self._conn.connection_from_url(url) if self.keep_alive else None
+        opened = pool.num_connections if pool else 0
+        try:
+            return super()._request(method, url, body)
+        finally:
+            with remote_command_stats._lock:
+                remote_command_stats.connections += (pool.num_connections - opened) if pool else 1
+
+    def execute(self, command, params):
+        """Send a command and record its round trip"""
+        start = time.perf_counter()
+        try:
+            return super().execute(command, params)
+        finally:
+            remote_command_stats.record(command, time.perf_counter() - start, self.baseline)
+
+
+class TimedRemoteConnection(_TimedConnectionMixin, RemoteConnection):
+    """W3C endpoint connection for non-Chromium browsers"""
+
+
+class TimedChromiumRemoteConnection(_TimedConnectionMixin, ChromiumRemoteConnection):
+    """Connection that also knows the Chromium vendor commands (DevTools, logs)"""
+
+
+class RemoteChromiumDriver(webdriver.Remote):
+    """Remote session of a Chromium browser with DevTools commands over the endpoint"""
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        """Run a DevTools command through the endpoint's /goog/cdp/execute (or /ms/) route"""
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': cmd_args})['value']
+
+
+def create_remote_driver(url, browser, options):
+    """Open a session on the endpoint over a calibrated keep-alive connection"""
+    if browser in CHROMIUM_VENDORS:
+        vendor_prefix, browser_name = CHROMIUM_VENDORS[browser]
+        connection = TimedChromiumRemoteConnection(url, vendor_prefix, browser_name, keep_alive=True)
+        driver_class = RemoteChromiumDriver
+    else:
+        connection = TimedRemoteConnection(url, keep_alive=True)
+        driver_class = webdriver.Remote
+    connection.calibrate()
+    return driver_class(command_executor=connection, options=options)
+
+
+# Global remote command statistics instance
+remote_command_stats = RemoteCommandStats()
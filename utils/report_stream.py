@@ -0,0 +1,179 @@
+"""
+Streaming test report: JSONL results, content-addressed artifacts and a light HTML index
+
+With REPORT_STREAM=true one JSON line per test is appended to
+<REPORT_STREAM_DIR>/results.jsonl as soon as the test finishes, so a run that
+is killed still leaves its results. Screenshots, failure bundles, screencasts
+and tracebacks are stored once under artifacts/<sha256 prefix>/<sha256>.<ext>
+(identical files are written once) and referenced from the lines. At the end
+of the run index.html is rendered by streaming over the JSONL; it links the
+artifacts and shows screenshots as lazily loaded thumbnails, so its size and
+render time grow with the number of tests, not with the size of the artifacts.
+"""
+import hashlib
+import html
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+from config import config
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: the index then scales the full screenshots down
+    Image = None
+
+
+# Artifact extensions shown as images in the index
+IMAGE_EXTENSIONS = ('png', 'jpg', 'webp', 'gif')
+
+# Width of the screenshot thumbnails in pixels
+THUMBNAIL_WIDTH = 320
+
+
+class ReportStream:
+    """Writes test results incrementally and renders the index at the end"""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._results = None
+        self._pending = {}
+
+    @property
+    def path(self):
+        """Report directory"""
+        return Path(self.directory or config.report_stream_dir)
+
+    @property
+    def enabled(self):
+        """Whether the streaming report is on"""
+        return config.report_stream
+
+    def store_artifact(self, source, extension):
+        """Store bytes or a file under its content hash; returns its path relative to the report"""
+        data = source if isinstance(source, bytes) else Path(source).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        relative = Path('artifacts') / digest[:2] / f"{digest}.{extension}"
+        target = self.path / relative
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Workers may store the same file at once; each writes its own temp file and the rename wins
+            temp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, target)
+            if extension in IMAGE_EXTENSIONS and Image is not None:
+                self._write_thumbnail(data, target.with_name(f"{digest}.thumb.jpg"))
+        return relative.as_posix()
+
+    @staticmethod
+    def _write_thumbnail(data, target):
+        """Save a small JPEG version of an image"""
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 4))
+            image.convert('RGB').save(target, format='JPEG', quality=70)
+        except OSError:
+            # Not a readable image; the index falls back to the artifact itself
+            pass
+
+    def attach(self, report, name, source, extension):
+        """Store an artifact and reference it from the test's report (travels from xdist workers)"""
+        if not self.enabled or source is None:
+            return
+        path = self.store_artifact(source, extension)
+        report.user_properties.append(('report_artifact', {'name': name, 'path': path}))
+
+    def open(self):
+        """Start a new results file"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._results = open(self.path / 'results.jsonl', 'w', encoding='utf-8')
+        self._pending = {}
+
+    def add_report(self, report):
+        """Fold a phase report into its test and write the test's line after teardown"""
+        if self._results is None:
+            return
+        record = self._pending.setdefault(report.nodeid, {
+            'nodeid': report.nodeid, 'outcome': 'passed', 'duration': 0.0, 'message': None, 'artifacts': [],
+        })
+        record['duration'] += report.duration
+        record['artifacts'].extend(value for name, value in report.user_properties if name == 'report_artifact')
+        if report.failed:
+            record['outcome'] = 'failed' if report.when == 'call' else 'error'
+            crash = getattr(report.longrepr, 'reprcrash', None)
+            record['message'] = crash.message if crash is not None else (str(report.longrepr).splitlines() or [''])[-1]
+            record['artifacts'].append({'name': f'{report.when} traceback',
+                                        'path': self.store_artifact(report.longreprtext.encode('utf-8'), 'txt')})
+        elif report.skipped and record['outcome'] == 'passed':
+            record['outcome'] = 'skipped'
+            record['message'] = report.longrepr[2] if isinstance(report.longrepr, tuple) else None
+
+        if report.when == 'teardown':
+            del self._pending[report.nodeid]
+            record['duration'] = round(record['duration'], 3)
+            record['finished'] = time.time()
+            self._results.write(json.dumps(record) + '\n')
+            # Flush per test so an interrupted run keeps everything reported so far
+            self._results.flush()
+
+    def close(self):
+        """Finish the results file and render the index"""
+        if self._results is None:
+            return None
+        self._results.close()
+        self._results = None
+        return self.render_index()
+
+    def _records(self):
+        """Read the results file one line at a time"""
+        with open(self.path / 'results.jsonl', encoding='utf-8') as results:
+            for line in results:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _artifact_html(self, artifact):
+        """Link to an artifact; images show a lazily loaded thumbnail"""
+        path = artifact['path']
+        name = html.escape(artifact['name'])
+        if path.rsplit('.', 1)[-1] in IMAGE_EXTENSIONS:
+            thumbnail = path.rsplit('.', 1)[0] + '.thumb.jpg'
+            source = thumbnail if (self.path / thumbnail).exists() else path
+            return (f"<a href='{path}'><img loading='lazy' width='{THUMBNAIL_WIDTH}' "
+                    f"src='{source}' alt='{name}' title='{name}'></a>")
+        return f"<a href='{path}'>{name}</a>"
+
+    def render_index(self):
+        """Write index.html from the results file and return its path"""
+        counts = {}
+        for record in self._records():
+            counts[record['outcome']] = counts.get(record['outcome'], 0) + 1
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+
+        index_path = self.path / 'index.html'
+        temp_path = index_path.with_suffix('.html.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as index:
+            index.write(
+                "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Test report</title><style>"
+                "body{font-family:sans-serif;margin:1em}table{border-collapse:collapse;width:100%}"
+                "td,th{border-bottom:1px solid #ddd;padding:4px;text-align:left;vertical-align:top}"
+                ".passed{color:#2a7}.failed,.error{color:#c33}.skipped{color:#999}"
+                "</style></head><body>"
+                f"<h1>Test report</h1><p>{html.escape(summary)} &middot; <a href='results.jsonl'>results.jsonl</a></p>"
+                "<table><tr><th>Outcome</th><th>Test</th><th>s</th><th>Message</th><th>Artifacts</th></tr>"
+            )
+            for record in self._records():
+                artifacts = ' '.join(self._artifact_html(artifact) for artifact in record['artifacts'])
+                index.write(
+                    f"<tr><td class='{record['outcome']}'>{record['outcome']}</td>"
+                    f"<td>{html.escape(record['nodeid'])}</td><td>{record['duration']:.1f}</td>"
+                    f"<td>{html.escape(record['message'] or '')}</td><td>{artifacts}</td></tr>\n"
+                )
+            index.write("</table></body></html>\n")
+        os.replace(temp_path, index_path)
+        return str(index_path)
+
+
+# Global report stream instance
+report_stream = ReportStream()
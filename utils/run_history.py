@@ -0,0 +1,375 @@
+"""
+Run history database with slowdown and flaky step detection
+
+With RUN_HISTORY=true the RunHistoryPlugin records every run in a SQLite
+database: one row per run (commit, environment, browser, exit status), per
+scenario (outcome, duration, retries) and per BDD step (status, duration). The
+run row is inserted when the session starts and completed when it finishes, so
+the rows of a killed run still belong to a run (one without finished_at, left
+out of the reports). Step timings are taken on the process that runs the test
+and travel to the controller in user_properties; the controller buffers the
+rows and writes them with executemany in batches of RUN_HISTORY_BATCH_SIZE, so
+a run costs a handful of transactions.
+
+    python -m utils.run_history                        # recent runs
+    python -m utils.run_history --slowdowns            # last 10 runs against the 10 before
+    python -m utils.run_history --slowdowns --baseline abc123 --candidate def456 --steps
+    python -m utils.run_history --flaky                # steps that both passed and failed
+
+Slowdowns are scenarios (or steps) whose passing durations in the candidate
+window are larger than in the baseline according to a one-sided Mann-Whitney U
+test (normal approximation with tie correction) at --alpha, and whose median
+grew by at least --min-ratio.
+"""
+import argparse
+import math
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from config import config
+
+
+def current_commit():
+    """Commit under test: the CI's SHA, else the checkout's HEAD"""
+    commit = os.getenv('GITHUB_SHA')
+    if commit:
+        return commit
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                                cwd=Path(__file__).resolve().parent.parent)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def current_browser():
+    """Browser label of the run"""
+    if config.browser.lower() == 'remote':
+        return f"remote:{config.remote_browser}"
+    return config.browser
+
+
+def mann_whitney_u(candidate, baseline):
+    """One-sided Mann-Whitney U test that candidate values are larger than baseline values
+
+    Returns (U of candidate, p-value) from the normal approximation with tie and
+    continuity correction; p is 1.0 when there is no variation to test.
+    """
+    n1, n2 = len(candidate), len(baseline)
+    combined = sorted([(value, 0) for value in candidate] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # Tied values share the average of their ranks
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class RunHistory:
+    """Reads and writes the run history database"""
+
+    def __init__(self, path=None):
+        self.db_path = path
+
+    @property
+    def path(self):
+        """Database file"""
+        return Path(self.db_path or config.run_history_db)
+
+    def _connect(self):
+        """Open the history database, creating the schema if needed"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, started_at REAL, finished_at REAL, git_commit TEXT, "
+            "environment TEXT, browser TEXT, exit_status INTEGER);"
+            "CREATE TABLE IF NOT EXISTS scenarios ("
+            "run_id TEXT, nodeid TEXT, outcome TEXT, duration REAL, retries INTEGER);"
+            "CREATE TABLE IF NOT EXISTS steps ("
+            "run_id TEXT, nodeid TEXT, step TEXT, status TEXT, duration REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_scenarios_run ON scenarios (run_id);"
+            "CREATE INDEX IF NOT EXISTS idx_steps_run ON steps (run_id);"
+        )
+        return connection
+
+    def start_run(self, run):
+        """Insert the row of a run that has not finished yet (finished_at and exit_status NULL)"""
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)", run)
+        connection.close()
+
+    def write(self, scenarios=(), steps=(), finished=None):
+        """Insert scenario and step rows (and complete the run with (finished_at, exit_status, run_id)) in one transaction"""
+        connection = self._connect()
+        with connection:
+            if scenarios:
+                connection.executemany("INSERT INTO scenarios VALUES (?, ?, ?, ?, ?)", scenarios)
+            if steps:
+                connection.executemany("INSERT INTO steps VALUES (?, ?, ?, ?, ?)", steps)
+            if finished:
+                connection.execute("UPDATE runs SET finished_at = ?, exit_status = ? WHERE run_id = ?", finished)
+        connection.close()
+
+    def runs(self, limit=None, environment=None, commit=None):
+        """Finished runs, newest first: (run_id, started_at, finished_at, commit, environment, browser, exit_status)"""
+        if not self.path.exists():
+            return []
+        query = "SELECT * FROM runs WHERE environment = ? AND finished_at IS NOT NULL"
+        params = [environment or config.environment]
+        if commit:
+            query += " AND git_commit LIKE ?"
+            params.append(f"{commit}%")
+        query += " ORDER BY started_at DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        connection = self._connect()
+        rows = connection.execute(query, params).fetchall()
+        connection.close()
+        return rows
+
+    def _rows(self, table, run_ids, columns):
+        """Rows of a table belonging to the given runs"""
+        if not run_ids:
+            return []
+        placeholders = ', '.join('?' * len(run_ids))
+        connection = self._connect()
+        rows = connection.execute(
+            f"SELECT run_id, {columns} FROM {table} WHERE run_id IN ({placeholders})", list(run_ids)
+        ).fetchall()
+        connection.close()
+        return rows
+
+    def outcome_counts(self, run_ids):
+        """Scenario outcome counts per run"""
+        counts = {}
+        for run_id, outcome in self._rows('scenarios', run_ids, 'outcome'):
+            run_counts = counts.setdefault(run_id, {})
+            run_counts[outcome] = run_counts.get(outcome, 0) + 1
+        return counts
+
+    def durations(self, run_ids, steps=False):
+        """Durations of passing scenarios (or steps, by step text) of the given runs"""
+        if steps:
+            rows = self._rows('steps', run_ids, "step, duration, status")
+        else:
+            rows = self._rows('scenarios', run_ids, "nodeid, duration, outcome")
+        durations = {}
+        for _, key, duration, status in rows:
+            if status == 'passed':
+                durations.setdefault(key, []).append(duration)
+        return durations
+
+    def slowdowns(self, baseline_runs, candidate_runs, steps=False, alpha=0.01, min_ratio=1.1, min_samples=5):
+        """Compare two sets of runs; returns (key, baseline median, candidate median, p-value), slowest first"""
+        baseline = self.durations(baseline_runs, steps)
+        candidate = self.durations(candidate_runs, steps)
+        results = []
+        for key, candidate_durations in candidate.items():
+            baseline_durations = baseline.get(key, [])
+            if len(baseline_durations) < min_samples or len(candidate_durations) < min_samples:
+                continue
+            before = statistics.median(baseline_durations)
+            after = statistics.median(candidate_durations)
+            if after < before * min_ratio:
+                continue
+            _, p_value = mann_whitney_u(candidate_durations, baseline_durations)
+            if p_value < alpha:
+                results.append((key, before, after, p_value))
+        return sorted(results, key=lambda result: result[2] / max(result[1], 0.001), reverse=True)
+
+    def flaky_steps(self, run_ids):
+        """Steps that both passed and failed in the given runs
+
+        Each result is (nodeid, step, runs, failures, status flips between consecutive
+        runs, whether both outcomes occurred on one commit), most flips first.
+        """
+        commits = {run[0]: run[3] for run in self.runs() if run[0] in set(run_ids)}
+        order = {run_id: position for position, run_id in enumerate(run_ids)}
+        history = {}
+        for run_id, nodeid, step, status in self._rows('steps', run_ids, "nodeid, step, status"):
+            history.setdefault((nodeid, step), []).append((order[run_id], run_id, status))
+
+        results = []
+        for (nodeid, step), outcomes in history.items():
+            statuses = {status for _, _, status in outcomes}
+            if statuses != {'passed', 'failed'}:
+                continue
+            outcomes.sort(reverse=True)  # oldest first
+            flips = sum(1 for earlier, later in zip(outcomes, outcomes[1:]) if earlier[2] != later[2])
+            by_commit = {}
+            for _, run_id, status in outcomes:
+                by_commit.setdefault(commits.get(run_id), set()).add(status)
+            same_commit = any(len(values) > 1 for commit, values in by_commit.items() if commit)
+            failures = sum(1 for _, _, status in outcomes if status == 'failed')
+            results.append((nodeid, step, len(outcomes), failures, flips, same_commit))
+        return sorted(results, key=lambda result: (result[4], result[3]), reverse=True)
+
+
+class RunHistoryPlugin:
+    """Pytest plugin that times BDD steps and writes the run to the history database"""
+
+    def __init__(self, controller, history=None, batch_size=None):
+        self.controller = controller
+        self.history = history or RunHistory()
+        self.batch_size = batch_size or config.run_history_batch_size
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._scenarios = []
+        self._steps = []
+        self._retries = {}
+        self._step_started = {}
+        self.started = False
+
+    def pytest_bdd_before_step(self, request, feature, scenario, step, step_func):
+        self._step_started[request.node.nodeid] = time.perf_counter()
+
+    def pytest_bdd_after_step(self, request, feature, scenario, step, step_func, step_func_args):
+        self._finish_step(request, step, 'passed')
+
+    def pytest_bdd_step_error(self, request, feature, scenario, step, step_func, step_func_args, exception):
+        self._finish_step(request, step, 'failed')
+
+    def _finish_step(self, request, step, status):
+        """Attach the step's duration to the test's report"""
+        started = self._step_started.pop(request.node.nodeid, None)
+        if started is not None:
+            request.node.user_properties.append(('run_history_step', (
+                f"{step.keyword} {step.name}", status, round(time.perf_counter() - started, 4))))
+
+    def pytest_runtest_logreport(self, report):
+        if not self.controller:
+            return
+        if report.outcome == 'rerun':
+            # pytest-rerunfailures reports each retried attempt as a rerun
+            self._retries[report.nodeid] = self._retries.get(report.nodeid, 0) + 1
+            return
+        if report.when == 'call':
+            for name, value in report.user_properties:
+                if name == 'run_history_step':
+                    step, status, duration = value
+                    self._steps.append((self.run_id, report.nodeid, step, status, duration))
+        if report.when == 'call' or (report.when == 'setup' and not report.passed):
+            outcome = report.outcome if report.when == 'call' else ('skipped' if report.skipped else 'error')
+            self._scenarios.append((self.run_id, report.nodeid, outcome, round(report.duration, 4),
+                                    self._retries.pop(report.nodeid, 0)))
+        if len(self._scenarios) + len(self._steps) >= self.batch_size:
+            self.flush()
+
+    def flush(self, finished=None):
+        """Write the buffered rows in one transaction"""
+        if not self.started:
+            return
+        if self._scenarios or self._steps or finished:
+            self.history.write(self._scenarios, self._steps, finished)
+        self._scenarios = []
+        self._steps = []
+
+    def pytest_sessionstart(self, session):
+        # Collect-only and step dry runs run no scenarios and are not recorded
+        if not self.controller or session.config.option.collectonly or session.config.getoption('dry_run_steps'):
+            return
+        self.history.start_run((self.run_id, self.started_at, None, current_commit(),
+                                config.environment, current_browser(), None))
+        self.started = True
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.flush((time.time(), int(exitstatus), self.run_id))
+
+
+def register_plugin(pytest_config):
+    """Register the plugin with pytest when RUN_HISTORY is on"""
+    if config.run_history:
+        controller = not hasattr(pytest_config, 'workerinput')
+        pytest_config.pluginmanager.register(RunHistoryPlugin(controller), 'run_history')
+
+
+# Global run history instance
+run_history = RunHistory()
+
+
+def _format_time(timestamp):
+    """Local date and time of a timestamp"""
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show recorded runs, statistically significant slowdowns and flaky steps")
+    parser.add_argument('--slowdowns', action='store_true', help="compare scenario durations between runs")
+    parser.add_argument('--steps', action='store_true', help="compare step durations instead of scenarios")
+    parser.add_argument('--window', type=int, default=10,
+                        help="runs per window: the latest runs are compared with the runs before them")
+    parser.add_argument('--baseline', help="compare the runs of this commit (prefix) ...")
+    parser.add_argument('--candidate', help="... with the runs of this commit (prefix)")
+    parser.add_argument('--alpha', type=float, default=0.01, help="significance level of the one-sided test")
+    parser.add_argument('--min-ratio', type=float, default=1.1, help="minimum candidate/baseline median ratio")
+    parser.add_argument('--flaky', action='store_true', help="list steps that both passed and failed")
+    parser.add_argument('--runs', type=int, default=30, help="recent runs searched by --flaky and listed by default")
+    args = parser.parse_args(argv)
+
+    if args.slowdowns:
+        if bool(args.baseline) != bool(args.candidate):
+            parser.error("--baseline and --candidate go together")
+        if args.baseline:
+            baseline_runs = [run[0] for run in run_history.runs(commit=args.baseline)]
+            candidate_runs = [run[0] for run in run_history.runs(commit=args.candidate)]
+        else:
+            recent = [run[0] for run in run_history.runs(limit=args.window * 2)]
+            candidate_runs, baseline_runs = recent[:args.window], recent[args.window:]
+        print(f"Comparing {len(candidate_runs)} candidate run(s) with {len(baseline_runs)} baseline run(s)")
+        results = run_history.slowdowns(baseline_runs, candidate_runs, args.steps, args.alpha, args.min_ratio)
+        print(f"{'before s':>9} {'after s':>9} {'ratio':>6} {'p':>8}  {'step' if args.steps else 'scenario'}")
+        for key, before, after, p_value in results:
+            print(f"{before:>9.3f} {after:>9.3f} {after / max(before, 0.001):>6.2f} {p_value:>8.1e}  {key}")
+        if not results:
+            print("No significant slowdowns")
+        return 1 if results else 0
+
+    if args.flaky:
+        run_ids = [run[0] for run in run_history.runs(limit=args.runs)]
+        results = run_history.flaky_steps(run_ids)
+        print(f"{'runs':>5} {'fails':>5} {'flips':>5} {'commit':>6}  step")
+        for nodeid, step, runs, failures, flips, same_commit in results:
+            print(f"{runs:>5} {failures:>5} {flips:>5} {'same' if same_commit else '':>6}  {step} ({nodeid})")
+        if not results:
+            print(f"No flaky steps in the last {len(run_ids)} run(s)")
+        return 0
+
+    runs = run_history.runs(limit=args.runs)
+    counts = run_history.outcome_counts([run[0] for run in runs])
+    print(f"{'started':<16} {'min':>6} {'commit':<10} {'browser':<14} {'exit':>4}  outcomes")
+    for run_id, started_at, finished_at, commit, _, browser, exit_status in runs:
+        outcomes = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.get(run_id, {}).items()))
+        print(f"{_format_time(started_at):<16} {(finished_at - started_at) / 60:>6.1f} {(commit or '-')[:10]:<10} "
+              f"{browser:<14} {exit_status:>4}  {outcomes}")
+    if not runs:
+        print(f"No runs recorded for environment {config.environment}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
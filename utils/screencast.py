@@ -0,0 +1,188 @@
+"""
+Failure-only screencast kept in a bounded in-memory ring buffer
+
+With SCREENCAST_ON_FAILURE=true every Chromium session runs the DevTools
+screencast (Page.startScreencast) at low resolution. Frames arrive as
+Page.screencastFrame events in the performance log and are read through the
+session's CdpEventBus by a background thread, which also paces the frame rate:
+Chrome sends the next frame only after the previous one is acknowledged. The
+ring buffer keeps the JPEG frames of the last SCREENCAST_SECONDS, capped at
+SCREENCAST_MAX_KB per session. A failed test gets the buffer encoded as an
+animated WebP (with Pillow) or as a self-contained HTML slideshow; otherwise
+the frames are dropped.
+"""
+import base64
+import collections
+import io
+import json
+import string
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote import utils as remote_utils
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from config import config
+from utils.cdp_events import event_bus
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: failures then get an HTML slideshow
+    Image = None
+
+
+class SessionChannel:
+    """Second keep-alive connection to a session's endpoint for the recorder thread
+
+    Commands sent here bypass RemoteConnection.execute, so the command tracer and
+    step profiler only count the test's own commands, and they do not contend for
+    the single pooled connection the test's commands use.
+    """
+
+    def __init__(self, driver):
+        executor = driver.command_executor
+        self.session_id = driver.session_id
+        self.error_handler = driver.error_handler
+        self._commands = executor._commands
+        self._connection = RemoteConnection(executor._url, keep_alive=True)
+
+    def execute(self, command, params):
+        """Send a session command and return its value"""
+        method, path = self._commands[command]
+        path = string.Template(path).substitute(sessionId=self.session_id)
+        response = self._connection._request(method, f"{self._connection._url}{path}",
+                                             body=remote_utils.dump_json(params))
+        self.error_handler.check_response(response)
+        return response.get('value')
+
+    def get_log(self):
+        """Read the performance log"""
+        return self.execute('getLog', {'type': 'performance'})
+
+    def execute_cdp_cmd(self, cmd, params):
+        """Run a DevTools command"""
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': params})
+
+    def close(self):
+        """Close the pooled connection"""
+        self._connection.close()
+
+
+class ScreencastRecorder:
+    """Ring buffer of the most recent screencast frames of one session"""
+
+    def __init__(self, driver, seconds=None, max_bytes=None, fps=None, max_width=None):
+        self.driver = driver
+        self.seconds = config.screencast_seconds if seconds is None else seconds
+        self.max_bytes = config.screencast_max_kb * 1024 if max_bytes is None else max_bytes
+        self.interval = 1 / (fps or config.screencast_fps)
+        self.max_width = max_width or config.screencast_max_width
+        self.frames = collections.deque()
+        self.size = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._channel = None
+        self._bus = None
+
+    def start(self):
+        """Start the screencast; returns False when the session has no DevTools events"""
+        self._bus = event_bus(self.driver)
+        if self._bus is None or not hasattr(self.driver, 'execute_cdp_cmd'):
+            return False
+        self._channel = SessionChannel(self.driver)
+        try:
+            self._channel.execute_cdp_cmd('Page.startScreencast', {
+                'format': 'jpeg', 'quality': 40, 'maxWidth': self.max_width,
+                'maxHeight': self.max_width * 9 // 16, 'everyNthFrame': 1,
+            })
+        except WebDriverException:
+            # e.g. a remote endpoint without a DevTools route
+            self._channel.close()
+            return False
+        self._bus.subscribe('Page.screencastFrame', self._on_frame)
+        self._thread = threading.Thread(target=self._run, name='screencast', daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        """Poll for frames until stopped"""
+        while not self._stop.wait(self.interval):
+            try:
+                self._bus.poll(self._channel.get_log)
+            except Exception:
+                # The session went away under the recorder; the test reports that itself
+                return
+            if not self._bus.supported:
+                return
+
+    def _on_frame(self, params):
+        """Keep a frame and acknowledge it so Chrome sends the next one"""
+        frame = base64.b64decode(params['data'])
+        timestamp = params.get('metadata', {}).get('timestamp') or time.time()
+        with self._lock:
+            self.frames.append((timestamp, frame))
+            self.size += len(frame)
+            self._evict(timestamp)
+        self._channel.execute_cdp_cmd('Page.screencastFrameAck', {'sessionId': params['sessionId']})
+
+    def _evict(self, now):
+        """Drop frames older than the window or beyond the memory cap (oldest first)"""
+        while self.frames and (self.size > self.max_bytes or now - self.frames[0][0] > self.seconds):
+            self.size -= len(self.frames.popleft()[1])
+
+    def clear(self):
+        """Discard the buffered frames"""
+        with self._lock:
+            self.frames.clear()
+            self.size = 0
+
+    def snapshot(self):
+        """Copy of the buffered (timestamp, jpeg) frames"""
+        with self._lock:
+            return list(self.frames)
+
+    def stop(self):
+        """Stop the screencast and drop the buffer"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._bus.unsubscribe('Page.screencastFrame', self._on_frame)
+        try:
+            self._channel.execute_cdp_cmd('Page.stopScreencast', {})
+        except Exception:
+            # The session may already be gone after a browser crash
+            pass
+        self._channel.close()
+        self._thread = None
+        self.clear()
+
+    @staticmethod
+    def encode(frames):
+        """Encode frames as (body, mime type, extension): animated WebP with Pillow, else an HTML slideshow"""
+        if not frames:
+            return None
+        durations = [max(int((later[0] - earlier[0]) * 1000), 1) for earlier, later in zip(frames, frames[1:])]
+        durations.append(durations[-1] if durations else 500)
+        if Image is not None:
+            images = [Image.open(io.BytesIO(frame)) for _, frame in frames]
+            # Frames shrink or grow with the viewport; an animation needs one canvas size
+            size = images[0].size
+            images = [image if image.size == size else image.resize(size) for image in images]
+            output = io.BytesIO()
+            images[0].save(output, format='WEBP', save_all=True, append_images=images[1:],
+                           duration=durations, loop=0, quality=50)
+            return output.getvalue(), 'image/webp', 'webp'
+
+        sources = [f"data:image/jpeg;base64,{base64.b64encode(frame).decode('ascii')}" for _, frame in frames]
+        html = (
+            "<!DOCTYPE html><html><body style='margin:0;background:#222'>"
+            "<img id='frame' style='max-width:100%'><script>"
+            f"const frames = {json.dumps(sources)}; const durations = {json.dumps(durations)};"
+            "let i = 0; const img = document.getElementById('frame');"
+            "(function show() { img.src = frames[i]; setTimeout(show, durations[i]); i = (i + 1) % frames.length; })();"
+            "</script></body></html>"
+        )
+        return html.encode('utf-8'), 'text/html', 'html'
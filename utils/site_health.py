@@ -0,0 +1,155 @@
+"""
+Site pre-flight check and a suite-wide circuit breaker
+
+The pre-flight probes the shop's key pages over HTTP before any browser starts.
+The circuit breaker counts consecutive navigation and timeout failures in a
+state file in the run's pytest temp directory, shared by all xdist workers of
+that run (and by no other run); once it trips (or the pre-flight
+fails) remaining scenarios end immediately instead of each waiting out the
+page load and explicit wait timeouts against a dead site.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urljoin
+
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process runs only
+    fcntl = None
+
+
+# Pages every scenario depends on
+PREFLIGHT_PAGES = ('', 'login', 'search?q=computer', 'cart')
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker has tripped and no new browser work should start"""
+
+
+def preflight(base_url=None, pages=PREFLIGHT_PAGES, max_latency_ms=None):
+    """Probe the shop's key pages and return a list of problems (empty when the site is healthy)"""
+    base_url = base_url or config.shop_url
+    max_latency_ms = config.preflight_max_latency_ms if max_latency_ms is None else max_latency_ms
+
+    def probe(page):
+        path = f"/{page}"
+        start = time.perf_counter()
+        try:
+            response = requests.get(urljoin(base_url, page), timeout=config.page_load_timeout)
+        except requests.RequestException as e:
+            return f"{path} {type(e).__name__}"
+        latency_ms = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            return f"{path} HTTP {response.status_code}"
+        if latency_ms > max_latency_ms:
+            return f"{path} {latency_ms:.0f} ms > {max_latency_ms:.0f} ms"
+        return None
+
+    with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+        return [problem for problem in executor.map(probe, pages) if problem]
+
+
+def is_site_failure(exception):
+    """Check whether a test failure means the site did not respond (navigation error or timeout)"""
+    if isinstance(exception, TimeoutException):
+        return True
+    # Chromium reports unreachable pages as "unknown error: net::ERR_CONNECTION_REFUSED" and the like
+    return isinstance(exception, WebDriverException) and 'net::ERR_' in str(exception.msg)
+
+
+class CircuitBreaker:
+    """Consecutive site failure counter shared across processes through a locked state file"""
+
+    def __init__(self, path=None, threshold=None):
+        self.state_file = path
+        self.failure_threshold = threshold
+        self.armed = False
+
+    @property
+    def path(self):
+        """State file shared by the workers of a run, set when the breaker is armed"""
+        return Path(self.state_file) if self.state_file else None
+
+    @property
+    def threshold(self):
+        """Consecutive failures that trip the circuit (0 disables it)"""
+        return config.circuit_breaker_threshold if self.failure_threshold is None else self.failure_threshold
+
+    @contextmanager
+    def _state(self):
+        """Lock the state file and yield its state; changes are written back on exit"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix('.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                state = {'failures': 0, 'reason': None}
+            before = dict(state)
+            yield state
+            if state != before:
+                temp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+                temp_path.write_text(json.dumps(state), encoding='utf-8')
+                os.replace(temp_path, self.path)
+
+    def arm(self, path, reset=False):
+        """Start honouring the run's state file in this process; the first process of a run resets it"""
+        self.state_file = path
+        self.armed = True
+        if reset:
+            with self._state() as state:
+                state.update(failures=0, reason=None)
+
+    def trip(self, reason):
+        """Open the circuit"""
+        if not self.armed:
+            return
+        with self._state() as state:
+            state['reason'] = state['reason'] or reason
+
+    def record_failure(self, description):
+        """Count a site failure; trips the circuit at the threshold"""
+        if not self.armed or self.threshold <= 0:
+            return
+        with self._state() as state:
+            state['failures'] += 1
+            if state['failures'] >= self.threshold and not state['reason']:
+                state['reason'] = f"{state['failures']} consecutive site failures, last: {description}"
+
+    def record_success(self):
+        """Reset the consecutive failure count"""
+        if not self.armed:
+            return
+        with self._state() as state:
+            if not state['reason']:
+                state['failures'] = 0
+
+    @property
+    def open_reason(self):
+        """Why the circuit is open, or None while it is closed"""
+        if not self.armed:
+            return None
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8')).get('reason')
+        except (OSError, ValueError):
+            return None
+
+    def check(self):
+        """Raise CircuitOpenError if the circuit is open"""
+        reason = self.open_reason
+        if reason:
+            raise CircuitOpenError(f"Circuit breaker open: {reason}")
+
+
+# Global circuit breaker instance
+circuit_breaker = CircuitBreaker()
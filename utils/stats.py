@@ -0,0 +1,12 @@
+"""
+Summary statistics shared by the benchmarks, the load generators and the adaptive timeouts
+"""
+import math
+
+
+def percentile(samples, fraction):
+    """Return the nearest-rank percentile of a list of samples (None when there are none)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
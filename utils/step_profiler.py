@@ -0,0 +1,141 @@
+"""
+Per-step timing and WebDriver command accounting for BDD scenarios
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from allure_commons import plugin_manager
+from selenium.webdriver.support.wait import WebDriverWait
+from utils.command_tracer import command_tracer
+
+
+class StepProfiler:
+    """Collects wall time, WebDriver commands, wait and sleep time per BDD step
+
+    Command figures come from the command tracer counters; wait and sleep
+    counters are global accumulators fed by patched selenium/time functions.
+    A step's figures are the counter deltas between its before and after
+    hooks. Command time spent while polling inside a wait is included in
+    both the command and the wait figures.
+    """
+
+    def __init__(self):
+        self.installed = False
+        self.wait_time = 0.0
+        self.sleep_time = 0.0
+        self._wait_depth = 0
+        self._thread_id = None
+        self._current = None
+        self._originals = {}
+
+    def install(self):
+        """Patch WebDriverWait and time.sleep to feed the counters"""
+        if self.installed:
+            return
+        if command_tracer.mode == 'off':
+            command_tracer.install('counters')
+        self._thread_id = threading.get_ident()
+        self._originals = {
+            'until': WebDriverWait.until,
+            'until_not': WebDriverWait.until_not,
+            'sleep': time.sleep,
+        }
+        profiler = self
+        original_sleep = self._originals['sleep']
+
+        def sleep(seconds):
+            start = time.perf_counter()
+            try:
+                original_sleep(seconds)
+            finally:
+                # Poll intervals of explicit waits are accounted as wait time
+                if profiler._wait_depth == 0 and threading.get_ident() == profiler._thread_id:
+                    profiler.sleep_time += time.perf_counter() - start
+
+        WebDriverWait.until = self._timed_wait(self._originals['until'])
+        WebDriverWait.until_not = self._timed_wait(self._originals['until_not'])
+        time.sleep = sleep
+        self.installed = True
+
+    def uninstall(self):
+        """Restore the patched functions"""
+        if not self.installed:
+            return
+        WebDriverWait.until = self._originals['until']
+        WebDriverWait.until_not = self._originals['until_not']
+        time.sleep = self._originals['sleep']
+        self.installed = False
+
+    def _timed_wait(self, original):
+        """Wrap a WebDriverWait method so its duration counts as wait time"""
+        profiler = self
+
+        def wait_method(wait, method, message=""):
+            profiler._wait_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(wait, method, message)
+            finally:
+                profiler._wait_depth -= 1
+                if profiler._wait_depth == 0:
+                    profiler.wait_time += time.perf_counter() - start
+
+        return wait_method
+
+    def _snapshot(self):
+        """Return the current counter values"""
+        return (time.perf_counter(), command_tracer.commands, command_tracer.total_time,
+                self.wait_time, self.sleep_time)
+
+    def start_step(self, scenario, step):
+        """Start measuring a step"""
+        self._current = (scenario, step, self._snapshot())
+
+    def finish_step(self, nodeid, status):
+        """Finish measuring the current step and return its record"""
+        if self._current is None:
+            return None
+        scenario, step, before = self._current
+        self._current = None
+        after = self._snapshot()
+        return {
+            'nodeid': nodeid,
+            'feature': scenario.feature.name,
+            'scenario': scenario.name,
+            'step': f"{step.keyword} {step.name}",
+            'status': status,
+            'wall_ms': round((after[0] - before[0]) * 1000, 1),
+            'commands': after[1] - before[1],
+            'command_ms': round((after[2] - before[2]) * 1000, 1),
+            'wait_ms': round((after[3] - before[3]) * 1000, 1),
+            'sleep_ms': round((after[4] - before[4]) * 1000, 1),
+        }
+
+    @staticmethod
+    def report_to_allure(record):
+        """Add the step record to Allure as a step with its figures as parameters"""
+        params = {key: str(record[key]) for key in ('wall_ms', 'commands', 'command_ms', 'wait_ms', 'sleep_ms')}
+        step_uuid = str(uuid4())
+        plugin_manager.hook.start_step(uuid=step_uuid, title=f"[timing] {record['step']}", params=params)
+        plugin_manager.hook.stop_step(uuid=step_uuid, title=record['step'], exc_type=None, exc_val=None, exc_tb=None)
+
+    @staticmethod
+    def write_json(records, output_path):
+        """Write all step records to a JSON file"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'steps': records}, f, indent=2)
+        return str(path)
+
+    @staticmethod
+    def slowest_steps(records, top_n):
+        """Return the top-N slowest step records"""
+        return sorted(records, key=lambda record: record['wall_ms'], reverse=True)[:top_n]
+
+
+# Global step profiler instance
+step_profiler = StepProfiler()